@@ -0,0 +1,374 @@
+"""
+Board-Kennzahlen: Cumulative Flow, WIP, Lead- und Cycle-Time
+(GET /boards/{id}/metrics).
+
+Statt bei jedem Abruf die History zu scannen (column_id-Änderungen als
+Strings), führt crud zwei verdichtete Tabellen mit:
+
+- analytics_column_days: Zu- und Abgänge pro Spalte und Tag. Die
+  Kartenzahl am Ende eines Tages ist die Summe bis dahin.
+- analytics_card_transitions: wann eine Karte welche Spalte betreten
+  hat; die Erstellung zählt als Betreten der ersten Spalte.
+
+crud meldet Erstellen, Verschieben und Löschen (entered(), moved(),
+left()). Die Einträge liegen bis zum Commit in der Session und werden
+direkt davor in derselben Transaktion geschrieben: ein INSERT für die
+Übergänge, ein Upsert pro Spalte und Tag.
+
+Ausgewertet wird mit NumPy auf kompakten Arrays. Die letzte Spalte
+eines Boards gilt als "fertig", die erste als "noch nicht begonnen":
+- Lead Time:  Erstellung bis zum letzten Eintritt in die letzte Spalte
+- Cycle Time: erster Eintritt in eine andere als die erste Spalte bis dahin
+Gezählt werden Karten, die im Zeitraum fertig wurden und noch dort liegen.
+
+Neuaufbau aus der History (Bestandsdatenbanken werden beim Anlegen der
+Tabellen automatisch befüllt):
+
+    python -m app.analytics rebuild
+"""
+import sys
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+_PENDING_TRANSITIONS = "analytics_pending_transitions"
+_PENDING_DAYS = "analytics_pending_days"
+
+# Karten pro Durchgang beim Neuaufbau
+REBUILD_CARD_BATCH = 1000
+
+# Perzentile für Lead- und Cycle-Time
+PERCENTILES = (50, 85, 95)
+
+
+# ---------- Erfassen ----------
+
+
+def _count(db: Session, column_id: int, at: datetime, arrivals: int, departures: int) -> None:
+    days = db.info.setdefault(_PENDING_DAYS, {})
+    counts = days.setdefault((column_id, at.date()), [0, 0])
+    counts[0] += arrivals
+    counts[1] += departures
+
+
+def entered(db: Session, card_id: int, column_id: int, at: Optional[datetime] = None) -> None:
+    """Karte ist in eine Spalte gekommen (erstellt oder verschoben)."""
+    at = at or datetime.utcnow()
+    db.info.setdefault(_PENDING_TRANSITIONS, []).append(
+        {"card_id": card_id, "column_id": column_id, "entered_at": at}
+    )
+    _count(db, column_id, at, 1, 0)
+
+
+def left(db: Session, column_id: int, at: Optional[datetime] = None) -> None:
+    """Karte hat eine Spalte verlassen (verschoben oder gelöscht)."""
+    _count(db, column_id, at or datetime.utcnow(), 0, 1)
+
+
+def moved(db: Session, card_id: int, from_column_id: int, to_column_id: int) -> None:
+    at = datetime.utcnow()
+    left(db, from_column_id, at)
+    entered(db, card_id, to_column_id, at)
+
+
+def discard(db: Session, card_ids) -> None:
+    """Verwirft noch nicht geschriebene Übergänge endgültig gelöschter Karten."""
+    rows = db.info.get(_PENDING_TRANSITIONS)
+    if rows:
+        card_ids = set(card_ids)
+        rows[:] = [row for row in rows if row["card_id"] not in card_ids]
+
+
+def remove_cards(db: Session, card_ids) -> None:
+    """Übergänge endgültig gelöschter Karten (IDs oder Unterabfrage)."""
+    db.execute(
+        delete(models.CardTransition)
+        .where(models.CardTransition.card_id.in_(card_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def remove_columns(db: Session, column_ids) -> None:
+    """Tageswerte endgültig gelöschter Spalten (IDs oder Unterabfrage)."""
+    db.execute(
+        delete(models.ColumnDay)
+        .where(models.ColumnDay.column_id.in_(column_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _upsert_days(db: Session, rows: list[dict]) -> None:
+    # Gleichzeitige Transaktionen zählen dieselbe Zeile hoch, daher
+    # INSERT ... ON CONFLICT statt Lesen und Schreiben
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    table = models.ColumnDay.__table__
+    statement = dialect.insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.column_id, table.c.day],
+        set_={
+            "arrivals": table.c.arrivals + statement.excluded.arrivals,
+            "departures": table.c.departures + statement.excluded.departures,
+        },
+    )
+    db.execute(statement, rows)
+
+
+def _write(db: Session, transitions: list[dict], days: dict) -> None:
+    if transitions:
+        db.execute(insert(models.CardTransition.__table__), transitions)
+    if days:
+        _upsert_days(db, [
+            {"column_id": column_id, "day": day, "arrivals": arrivals, "departures": departures}
+            for (column_id, day), (arrivals, departures) in sorted(days.items())
+        ])
+
+
+def flush(db: Session) -> None:
+    """Schreibt gesammelte Einträge sofort (z.B. blockweise beim Import)."""
+    transitions = db.info.pop(_PENDING_TRANSITIONS, None)
+    days = db.info.pop(_PENDING_DAYS, None)
+    if transitions or days:
+        _write(db, transitions or [], days or {})
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session: Session) -> None:
+    flush(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_TRANSITIONS, None)
+    session.info.pop(_PENDING_DAYS, None)
+
+
+# ---------- Auswerten ----------
+
+
+def _day_offsets(days, start: date) -> np.ndarray:
+    return (np.array(days, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+
+
+def cumulative_flow(db: Session, column_ids: list[int], start: date, end: date) -> np.ndarray:
+    """Kartenzahl pro Spalte am Ende jedes Tages: Matrix (Spalten x Tage)."""
+    position = {column_id: i for i, column_id in enumerate(column_ids)}
+    net = models.ColumnDay.arrivals - models.ColumnDay.departures
+
+    # Stand vor dem Zeitraum
+    before = np.zeros(len(column_ids), dtype=np.int64)
+    rows = (
+        db.query(models.ColumnDay.column_id, func.sum(net))
+        .filter(models.ColumnDay.column_id.in_(column_ids), models.ColumnDay.day < start)
+        .group_by(models.ColumnDay.column_id)
+        .all()
+    )
+    if rows:
+        ids, sums = zip(*rows)
+        before[[position[i] for i in ids]] = sums
+
+    deltas = np.zeros((len(column_ids), (end - start).days + 1), dtype=np.int64)
+    rows = (
+        db.query(models.ColumnDay.column_id, models.ColumnDay.day, net)
+        .filter(
+            models.ColumnDay.column_id.in_(column_ids),
+            models.ColumnDay.day >= start,
+            models.ColumnDay.day <= end,
+        )
+        .all()
+    )
+    if rows:
+        ids, days, values = zip(*rows)
+        deltas[[position[i] for i in ids], _day_offsets(days, start)] = values
+
+    return before[:, None] + np.cumsum(deltas, axis=1)
+
+
+def _durations(hours: np.ndarray) -> dict:
+    if hours.size == 0:
+        return {"count": 0, "mean": None, **{f"p{p}": None for p in PERCENTILES}}
+    values = np.percentile(hours, PERCENTILES)
+    return {
+        "count": int(hours.size),
+        "mean": round(float(hours.mean()), 2),
+        **{f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, values)},
+    }
+
+
+def flow_times(db: Session, first_column_id: int, done_column_id: int, since: datetime) -> tuple[dict, dict]:
+    """Lead- und Cycle-Time (Stunden) der Karten, die seit `since` fertig wurden."""
+    transition = models.CardTransition
+    done = (
+        select(transition.card_id)
+        .where(transition.column_id == done_column_id)
+        .group_by(transition.card_id)
+        .having(func.max(transition.entered_at) >= since)
+        .subquery()
+    )
+    rows = (
+        db.query(transition.card_id, transition.column_id, transition.entered_at)
+        .join(done, done.c.card_id == transition.card_id)
+        .join(models.Card, models.Card.id == transition.card_id)
+        .filter(models.Card.column_id == done_column_id, models.Card.deleted_at.is_(None))
+        .all()
+    )
+    if not rows:
+        return _durations(np.empty(0)), _durations(np.empty(0))
+
+    card_ids, column_ids, entered_at = zip(*rows)
+    column_ids = np.array(column_ids)
+    seconds = np.array(entered_at, dtype="datetime64[us]").astype(np.int64) / 1e6
+    cards, index = np.unique(np.array(card_ids), return_inverse=True)
+
+    created = np.full(cards.size, np.inf)
+    np.minimum.at(created, index, seconds)
+    finished = np.full(cards.size, -np.inf)
+    np.maximum.at(finished, index, np.where(column_ids == done_column_id, seconds, -np.inf))
+    started = np.full(cards.size, np.inf)
+    np.minimum.at(started, index, np.where(column_ids != first_column_id, seconds, np.inf))
+
+    lead = (finished - created) / 3600
+    cycle = (finished - started)[np.isfinite(started)] / 3600
+    return _durations(lead), _durations(cycle)
+
+
+def board_metrics(db: Session, board_id: int, days: int, now: Optional[datetime] = None) -> dict:
+    """Kennzahlen der letzten `days` Tage (einschließlich heute, UTC)."""
+    now = now or datetime.utcnow()
+    end = now.date()
+    start = end - timedelta(days=days - 1)
+    columns = (
+        db.query(models.KanbanColumn.id, models.KanbanColumn.title)
+        .filter(
+            models.KanbanColumn.board_id == board_id,
+            models.KanbanColumn.deleted_at.is_(None),
+        )
+        .order_by(models.KanbanColumn.position, models.KanbanColumn.id)
+        .all()
+    )
+    column_ids = [column.id for column in columns]
+
+    flow = cumulative_flow(db, column_ids, start, end)
+    if column_ids:
+        lead_time, cycle_time = flow_times(
+            db, column_ids[0], column_ids[-1], datetime.combine(start, time.min)
+        )
+    else:
+        lead_time = cycle_time = _durations(np.empty(0))
+
+    return {
+        "board_id": board_id,
+        "days": [start + timedelta(days=i) for i in range(days)],
+        "columns": [
+            {
+                "column_id": column.id,
+                "title": column.title,
+                "wip": int(counts[-1]),
+                "counts": counts.tolist(),
+            }
+            for column, counts in zip(columns, flow)
+        ],
+        "lead_time": lead_time,
+        "cycle_time": cycle_time,
+    }
+
+
+# ---------- Neuaufbau ----------
+
+
+def _card_transitions(card, moves: list) -> list[tuple[int, datetime]]:
+    """(Spalte, Zeitpunkt) aller Eintritte einer Karte, rekonstruiert aus der History."""
+    first_column_id = int(moves[0].old_value) if moves else card.column_id
+    entries = [(first_column_id, card.created_at)]
+    entries.extend((int(move.new_value), move.created_at) for move in moves)
+    return entries
+
+
+def rebuild(db: Session) -> int:
+    """
+    Baut beide Tabellen aus Karten und History neu auf; liefert die
+    Anzahl der Karten. Endgültig gelöschte Karten und archivierte bzw.
+    verdichtete History fehlen in der Rekonstruktion.
+    """
+    db.execute(delete(models.CardTransition))
+    db.execute(delete(models.ColumnDay))
+    days: dict[tuple[int, date], list[int]] = {}
+    rebuilt, last_id = 0, 0
+
+    while True:
+        cards = (
+            db.query(
+                models.Card.id,
+                models.Card.column_id,
+                models.Card.created_at,
+                models.Card.deleted_at,
+            )
+            .filter(models.Card.id > last_id)
+            .order_by(models.Card.id)
+            .limit(REBUILD_CARD_BATCH)
+            .all()
+        )
+        if not cards:
+            break
+        last_id = cards[-1].id
+
+        moves: dict[int, list] = {}
+        for move in (
+            db.query(
+                models.CardHistory.card_id,
+                models.CardHistory.old_value,
+                models.CardHistory.new_value,
+                models.CardHistory.created_at,
+            )
+            .filter(
+                models.CardHistory.card_id.in_([card.id for card in cards]),
+                models.CardHistory.action == "update",
+                models.CardHistory.field == "column_id",
+            )
+            .order_by(models.CardHistory.card_id, models.CardHistory.created_at, models.CardHistory.id)
+        ):
+            moves.setdefault(move.card_id, []).append(move)
+
+        transitions = []
+        for card in cards:
+            entries = _card_transitions(card, moves.get(card.id, []))
+            previous = None
+            for column_id, at in entries:
+                transitions.append({"card_id": card.id, "column_id": column_id, "entered_at": at})
+                days.setdefault((column_id, at.date()), [0, 0])[0] += 1
+                if previous is not None:
+                    days.setdefault((previous, at.date()), [0, 0])[1] += 1
+                previous = column_id
+            if card.deleted_at is not None:
+                days.setdefault((previous, card.deleted_at.date()), [0, 0])[1] += 1
+        _write(db, transitions, {})
+        db.commit()
+        rebuilt += len(cards)
+
+    _write(db, [], days)
+    db.commit()
+    return rebuilt
+
+
+def main(argv: list[str]) -> int:
+    command = argv[1] if len(argv) > 1 else "rebuild"
+    if command != "rebuild":
+        print(__doc__)
+        return 2
+
+    db = SessionLocal()
+    try:
+        print(f"Kennzahlen für {rebuild(db)} Karten neu aufgebaut")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
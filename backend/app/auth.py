@@ -0,0 +1,121 @@
+"""
+Signierte Session-Tokens und Berechtigungs-Cache.
+
+POST /login stellt ein HMAC-signiertes Token aus (user_id + Ablaufzeit).
+Weitere Requests schicken es als "Authorization: Bearer <token>"; die
+Prüfung braucht weder Passwort noch Datenbank. Die Berechtigungen des
+Benutzers liegen kurzzeitig im Speicher und werden bei Änderungen über
+crud.update_user sofort verworfen.
+
+Mehrere Worker brauchen ein gemeinsames AUTH_SECRET. Ohne Angabe wird
+pro Prozess ein zufälliges Secret erzeugt (Tokens überleben dann keinen
+Neustart).
+"""
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException
+
+from . import models
+from .config import settings
+
+_SECRET = (settings.auth_secret or secrets.token_urlsafe(32)).encode()
+
+PERMISSIONS = ("is_admin", "can_view", "can_edit", "can_delete")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_SECRET, payload.encode(), hashlib.sha256).digest())
+
+
+def issue_token(user_id: int, ttl: int = settings.auth_token_ttl) -> str:
+    payload = _b64encode(json.dumps({"sub": user_id, "exp": int(time.time()) + ttl}).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def unauthorized(detail: str = "Invalid token") -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+def verify_token(token: str) -> int:
+    """Liefert die user_id eines gültigen Tokens, sonst 401."""
+    try:
+        payload, signature = token.split(".")
+        if not hmac.compare_digest(signature, _sign(payload)):
+            raise ValueError("bad signature")
+        claims = json.loads(_b64decode(payload))
+        user_id, expires = int(claims["sub"]), int(claims["exp"])
+    except (ValueError, KeyError, TypeError):
+        raise unauthorized()
+    if expires < time.time():
+        raise unauthorized("Token expired")
+    return user_id
+
+
+@dataclass(frozen=True)
+class Identity:
+    user_id: int
+    is_active: bool
+    is_admin: bool
+    can_view: bool
+    can_edit: bool
+    can_delete: bool
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Identity":
+        return cls(
+            user_id=user.id,
+            is_active=bool(user.is_active),
+            **{name: bool(getattr(user, name)) for name in PERMISSIONS},
+        )
+
+    def allows(self, permission: str) -> bool:
+        # Admins dürfen alles
+        return self.is_admin or getattr(self, permission)
+
+
+class PermissionCache:
+    """Berechtigungen pro user_id mit kurzer TTL (thread-sicher)."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: dict[int, tuple[float, Identity]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[Identity]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(user_id, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, identity: Identity) -> None:
+        with self._lock:
+            self._entries[identity.user_id] = (time.monotonic() + self.ttl, identity)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+permission_cache = PermissionCache(ttl=settings.auth_permission_ttl)
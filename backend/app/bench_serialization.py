@@ -0,0 +1,145 @@
+"""
+Benchmark: Serialisierung großer Antworten, ORM + response_model gegen
+den Schnellpfad (Tupel-Abfrage + orjson, siehe responses.py).
+
+Gemessen wird pro Kartenanzahl jeweils Abfrage + Serialisierung bis zu
+den fertigen JSON-Bytes, ohne HTTP-Overhead:
+
+- Board-Snapshot (GET /boards/{id}/full), alle Karten auf einem Board
+- kompletter Durchlauf durch GET /cards/ mit maximaler Seitengröße
+
+Für den bisherigen Pfad wird das nachgebildet, was FastAPI mit einem
+response_model macht: Validierung aus den ORM-Attributen, Ausgabe im
+JSON-Modus, json.dumps.
+
+Aufruf:
+
+    python -m app.bench_serialization [ANZAHL_KARTEN ...]   (Standard: 10000 100000)
+"""
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from . import crud, models, schemas
+from .pagination import MAX_PAGE_SIZE
+from .responses import FastJSONResponse
+
+SEED_COLUMNS = 10
+REPEAT = 3
+
+
+def seed(db: Session, card_count: int) -> int:
+    board = models.Board(name="Benchmark")
+    db.add(board)
+    db.flush()
+    columns = [
+        models.KanbanColumn(title=f"Spalte {i}", position=i, board_id=board.id)
+        for i in range(SEED_COLUMNS)
+    ]
+    db.add_all(columns)
+    db.flush()
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "title": f"Karte {n}",
+            "description": "Beschreibung " * 5,
+            "due_date": now + timedelta(days=n % 30),
+            "created_at": now + timedelta(microseconds=n),
+            "color": "#16a34a",
+            "rank": f"{n:08d}",
+            "column_id": columns[n % SEED_COLUMNS].id,
+            "board_id": board.id,
+        }
+        for n in range(card_count)
+    ]
+    db.execute(insert(models.Card.__table__), rows)
+    db.commit()
+    return board.id
+
+
+def _validated_json(adapter: TypeAdapter, value) -> bytes:
+    model = adapter.validate_python(value, from_attributes=True)
+    return json.dumps(adapter.dump_python(model, mode="json")).encode()
+
+
+def _fast_json(value) -> bytes:
+    return FastJSONResponse(value).body
+
+
+def snapshot_orm(db: Session, board_id: int) -> bytes:
+    return _validated_json(TypeAdapter(schemas.BoardFull), crud.get_board_full(db, board_id))
+
+
+def snapshot_fast(db: Session, board_id: int) -> bytes:
+    return _fast_json(crud.get_board_full(db, board_id, as_rows=True))
+
+
+def _walk_cards(db: Session, as_rows: bool, serialize: Callable[[dict], bytes]) -> int:
+    """Blättert durch alle Karten; liefert die Gesamtgröße in Bytes."""
+    size, cursor = 0, None
+    while True:
+        items, cursor = crud.get_cards(db, cursor=cursor, limit=MAX_PAGE_SIZE, as_rows=as_rows)
+        size += len(serialize({"items": items, "next_cursor": cursor}))
+        if cursor is None:
+            return size
+
+
+def cards_orm(db: Session, board_id: int) -> int:
+    adapter = TypeAdapter(schemas.CardPage)
+    return _walk_cards(db, False, lambda page: _validated_json(adapter, page))
+
+
+def cards_fast(db: Session, board_id: int) -> int:
+    return _walk_cards(db, True, _fast_json)
+
+
+CASES = [
+    ("GET /boards/{id}/full", snapshot_orm, snapshot_fast),
+    ("GET /cards/ (alle Seiten)", cards_orm, cards_fast),
+]
+
+
+def measure(db: Session, fn, board_id: int) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        db.expunge_all()
+        start = time.perf_counter()
+        fn(db, board_id)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run(card_count: int) -> None:
+    engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    models.Base.metadata.create_all(bind=engine)
+    with Session(bind=engine, expire_on_commit=False) as db:
+        board_id = seed(db, card_count)
+        for name, orm_fn, fast_fn in CASES:
+            orm_time = measure(db, orm_fn, board_id)
+            fast_time = measure(db, fast_fn, board_id)
+            print(
+                f"{card_count:>7} Karten  {name:<28} "
+                f"ORM {orm_time * 1000:8.1f} ms   schnell {fast_time * 1000:8.1f} ms   "
+                f"Faktor {orm_time / fast_time:4.1f}"
+            )
+    engine.dispose()
+
+
+def main(argv: list[str]) -> int:
+    counts = [int(arg) for arg in argv[1:]] or [10_000, 100_000]
+    for count in counts:
+        run(count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,215 @@
+"""
+Read-Through-Cache für häufig gelesene, selten geänderte Listen:
+GET /boards/, GET /users/ und GET /boards/{id}/columns.
+
+Gespeichert werden die fertigen JSON-Bytes der Antwort. Jeder Eintrag
+gehört zu einem Bereich ("boards", "users", "board:<id>") mit eigenem
+Generationszähler; der Schlüssel enthält die Generation, die *vor* dem
+Laden aus der Datenbank gelesen wurde. Schreibzugriffe erhöhen nach dem
+Commit die Generation ihres Bereichs:
+
+- Boards, Spalten, Karten: über das Änderungsprotokoll (changes.on_commit)
+- Benutzer: direkt in den crud-Funktionen
+
+Ein Read, der mit einem Write überlappt, legt sein Ergebnis höchstens
+unter der alten Generation ab, die nie wieder gelesen wird. Innerhalb
+eines Workers sieht jeder Request nach einem Commit also den neuen
+Stand; die TTL begrenzt nur, wie lange Schreibzugriffe am crud vorbei
+(z.B. direkt in der Datenbank) sichtbar veraltet bleiben.
+
+Backends (per RESPONSE_CACHE):
+- "memory": LRU mit TTL pro Prozess. Bei mehreren Workern erfährt ein
+            Worker nichts von Writes der anderen (veraltet bis zur TTL).
+- "redis":  gemeinsamer Speicher für alle Worker (RESPONSE_CACHE_URL,
+            benötigt das Paket redis)
+- "none":   Cache aus
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+from . import changes
+from .config import settings
+from .responses import FastJSONResponse
+
+
+class CacheBackend:
+    """
+    Schnittstelle für Cache-Speicher. Ein gemeinsamer Speicher für mehrere
+    Worker muss generation()/bump() atomar über alle Prozesse umsetzen.
+    Backends mit Netzwerkzugriff setzen blocking = True, die Routen rufen
+    sie dann im Threadpool auf.
+    """
+
+    name = "none"
+    blocking = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes) -> None:
+        pass
+
+    def generation(self, scope: str) -> int:
+        return 0
+
+    def bump(self, scope: str) -> None:
+        pass
+
+    def size(self) -> int:
+        return 0
+
+
+class MemoryBackend(CacheBackend):
+    """LRU mit TTL pro Prozess (thread-sicher)."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, scope: str) -> int:
+        return self._generations.get(scope, 0)
+
+    def bump(self, scope: str) -> None:
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Gemeinsamer Cache aller Worker. Einträge laufen über die TTL von
+    Redis ab (maxmemory-policy allkeys-lru empfohlen), die Generationen
+    sind einfache Zähler (INCR).
+    """
+
+    name = "redis"
+    blocking = True
+
+    def __init__(self, url: str, ttl: float, prefix: str = "kanban:cache:") -> None:
+        import redis  # optional, nur für dieses Backend nötig
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self.client.set(self.prefix + key, value, px=int(self.ttl * 1000))
+
+    def generation(self, scope: str) -> int:
+        return int(self.client.get(f"{self.prefix}gen:{scope}") or 0)
+
+    def bump(self, scope: str) -> None:
+        self.client.incr(f"{self.prefix}gen:{scope}")
+
+    def size(self) -> int:
+        return self.client.dbsize()
+
+
+def board_scope(board_id: int) -> str:
+    return f"board:{board_id}"
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        changes.on_commit(self._on_commit)
+
+    def _on_commit(self, events: list[dict]) -> None:
+        # Läuft im Thread des Requests, der committet hat, also bevor
+        # dessen Antwort rausgeht
+        scopes = {board_scope(event["board_id"]) for event in events}
+        if any(event["entity"] == "board" for event in events):
+            scopes.add("boards")
+        for scope in scopes:
+            self.backend.bump(scope)
+
+    def invalidate(self, scope: str) -> None:
+        self.backend.bump(scope)
+
+    def _lookup(self, scope: str, name: str) -> tuple[str, Optional[bytes]]:
+        key = f"{scope}:{self.backend.generation(scope)}:{name}"
+        return key, self.backend.get(key)
+
+    async def json(
+        self,
+        scope: str,
+        name: str,
+        load: Callable[[], Awaitable[Any]],
+    ) -> Response:
+        """
+        Antwort aus dem Cache, sonst load() ausführen und ablegen. `name`
+        unterscheidet Einträge innerhalb eines Bereichs und dient als
+        Kategorie für die Hit/Miss-Zähler.
+        """
+        call = run_in_threadpool if self.backend.blocking else _call
+        key, body = await call(self._lookup, scope, name)
+        if body is not None:
+            self.hits[name] = self.hits.get(name, 0) + 1
+        else:
+            self.misses[name] = self.misses.get(name, 0) + 1
+            body = FastJSONResponse(await load()).body
+            await call(self.backend.set, key, body)
+        return Response(content=body, media_type="application/json")
+
+    def metrics(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "entries": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+async def _call(fn, *args):
+    return fn(*args)
+
+
+def create_backend(name: str = settings.response_cache) -> CacheBackend:
+    if name == "memory":
+        return MemoryBackend(
+            max_entries=settings.response_cache_max_entries,
+            ttl=settings.response_cache_ttl,
+        )
+    if name == "redis":
+        return RedisBackend(settings.response_cache_url, ttl=settings.response_cache_ttl)
+    if name == "none":
+        return CacheBackend()
+    raise ValueError(f"Unknown RESPONSE_CACHE: {name}")
+
+
+response_cache = ResponseCache(create_backend())
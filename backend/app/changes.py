@@ -0,0 +1,248 @@
+"""
+Änderungsprotokoll für die Delta-Synchronisation.
+
+Jede Mutation an Boards, Spalten und Karten schreibt in derselben
+Transaktion eine Zeile in `changes`. Clients merken sich die höchste
+gesehene `seq` und holen mit GET /boards/{id}/changes?since=... nur
+noch die seitdem geänderten Zeilen plus Tombstones für Löschungen.
+"""
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+# Maximale Anzahl Protokollzeilen pro Delta-Abruf
+MAX_CHANGES_PER_PAGE = 1000
+
+# Zähler in list_versions für GET /boards/
+BOARDS_LIST = "boards"
+
+# Höchstens so viele IDs pro Commit-Event; darüber "ids": None (Clients
+# holen die Änderungen ohnehin über /changes)
+MAX_EVENT_IDS = 100
+
+_LOCKED_BOARDS = "changes_locked_boards"
+_PENDING_EVENTS = "changes_pending_events"
+
+# Callbacks, die nach jedem Commit die darin protokollierten Änderungen
+# als kompakte Events erhalten (z.B. Live-Updates, siehe realtime.py)
+_commit_listeners: list[Callable[[list[dict]], None]] = []
+
+
+def on_commit(listener: Callable[[list[dict]], None]) -> None:
+    _commit_listeners.append(listener)
+
+
+def _lock_board(db: Session, board_id: int) -> None:
+    """
+    Sperrt die Board-Zeile bis zum Ende der Transaktion. Dadurch werden
+    seq-Werte eines Boards in Commit-Reihenfolge vergeben und ein Client
+    kann keine Änderung "überspringen". SQLite serialisiert Schreiber
+    ohnehin; dort entfällt die Abfrage ganz.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return
+    locked = db.info.setdefault(_LOCKED_BOARDS, set())
+    if board_id in locked:
+        return
+    db.query(models.Board.id).filter(models.Board.id == board_id).with_for_update().first()
+    locked.add(board_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    session.info.pop(_LOCKED_BOARDS, None)
+    events = session.info.pop(_PENDING_EVENTS, None)
+    if events:
+        for listener in _commit_listeners:
+            listener(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_LOCKED_BOARDS, None)
+    session.info.pop(_PENDING_EVENTS, None)
+
+
+def record_change(
+    db: Session,
+    board_id: int,
+    entity: str,
+    entity_id: int,
+    op: str = UPSERT,
+) -> None:
+    record_changes(db, board_id, entity, [entity_id], op)
+
+
+def record_changes(
+    db: Session,
+    board_id: int,
+    entity: str,
+    entity_ids: Iterable[int],
+    op: str = UPSERT,
+) -> None:
+    """Protokolliert mehrere Entitäten eines Boards mit einem INSERT."""
+    rows = [
+        {"board_id": board_id, "entity": entity, "entity_id": entity_id, "op": op}
+        for entity_id in entity_ids
+    ]
+    if not rows:
+        return
+    _lock_board(db, board_id)
+    if entity == "board":
+        _bump_list_version(db, BOARDS_LIST)
+    seq = max(db.execute(insert(models.Change).returning(models.Change.seq), rows).scalars())
+    ids = [row["entity_id"] for row in rows]
+
+    # Aufeinanderfolgende Aufrufe für dasselbe Board, dieselbe Entität und
+    # Operation (z.B. die Blöcke eines Imports) ergeben ein Event; so
+    # wächst der Puffer bis zum Commit nicht mit der Zahl der Zeilen
+    events = db.info.setdefault(_PENDING_EVENTS, [])
+    last = events[-1] if events else None
+    if last is not None and (last["board_id"], last["entity"], last["op"]) == (board_id, entity, op):
+        last["seq"] = seq
+        ids = last["ids"] + ids if last["ids"] is not None else None
+    else:
+        last = {"board_id": board_id, "seq": seq, "entity": entity, "op": op}
+        events.append(last)
+    last["ids"] = ids if ids is not None and len(ids) <= MAX_EVENT_IDS else None
+
+
+def current_cursor(db: Session, board_id: int) -> int:
+    return (
+        db.query(func.max(models.Change.seq))
+        .filter(models.Change.board_id == board_id)
+        .scalar()
+    ) or 0
+
+
+def column_cursor(db: Session, column_id: int) -> int:
+    """current_cursor() des Boards, zu dem die Spalte gehört (0 = unbekannt)."""
+    board_id = (
+        select(models.KanbanColumn.board_id)
+        .where(models.KanbanColumn.id == column_id)
+        .scalar_subquery()
+    )
+    return (
+        db.query(func.max(models.Change.seq))
+        .filter(models.Change.board_id == board_id)
+        .scalar()
+    ) or 0
+
+
+def _bump_list_version(db: Session, name: str) -> None:
+    # Sperrt die Zeile bis zum Commit: gleichzeitige Board-Änderungen
+    # erhöhen den Zähler nacheinander
+    db.execute(
+        update(models.ListVersion)
+        .where(models.ListVersion.name == name)
+        .values(version=models.ListVersion.version + 1)
+    )
+
+
+def list_version(db: Session, name: str) -> int:
+    """
+    Version einer Liste über alle Boards. Anders als max(seq) kann sie
+    nicht stehen bleiben, wenn auf Postgres eine kleinere seq eines anderen
+    Boards erst später committet wird.
+    """
+    return (
+        db.query(models.ListVersion.version)
+        .filter(models.ListVersion.name == name)
+        .scalar()
+    ) or 0
+
+
+def seed_list_versions(db: Session) -> None:
+    """Bestandsdatenbanken: oberhalb aller bisher als ETag ausgegebenen seq starten."""
+    db.execute(
+        update(models.ListVersion).values(
+            version=select(func.coalesce(func.max(models.Change.seq), 0)).scalar_subquery()
+        )
+    )
+    db.commit()
+
+
+def get_changes(
+    db: Session,
+    board_id: int,
+    since: int,
+    limit: int = MAX_CHANGES_PER_PAGE,
+) -> dict:
+    """
+    Fasst alle Änderungen eines Boards nach `since` zusammen: pro Entität
+    zählt nur die letzte Operation. Upserts werden mit dem aktuellen
+    Zeilenstand geliefert, Löschungen als Tombstones.
+    """
+    rows = (
+        db.query(models.Change)
+        .filter(models.Change.board_id == board_id, models.Change.seq > since)
+        .order_by(models.Change.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest: dict[tuple[str, int], str] = {}
+    for row in rows:
+        latest[(row.entity, row.entity_id)] = row.op
+
+    def upserted(entity: str) -> list[int]:
+        return [eid for (e, eid), op in latest.items() if e == entity and op == UPSERT]
+
+    board: Optional[models.Board] = None
+    if upserted("board"):
+        board = (
+            db.query(models.Board)
+            .filter(models.Board.id == board_id, models.Board.deleted_at.is_(None))
+            .first()
+        )
+
+    columns = []
+    column_ids = upserted("column")
+    if column_ids:
+        columns = (
+            db.query(models.KanbanColumn)
+            .filter(models.KanbanColumn.id.in_(column_ids))
+            .filter(models.KanbanColumn.board_id == board_id)
+            .filter(models.KanbanColumn.deleted_at.is_(None))
+            .order_by(models.KanbanColumn.position)
+            .all()
+        )
+
+    cards = []
+    card_ids = upserted("card")
+    if card_ids:
+        cards = (
+            db.query(models.Card)
+            .filter(models.Card.id.in_(card_ids))
+            .filter(models.Card.board_id == board_id)
+            .filter(models.Card.deleted_at.is_(None))
+            .order_by(models.Card.rank, models.Card.id)
+            .all()
+        )
+
+    # Nicht mehr (auf diesem Board) vorhandene Upserts sind faktisch gelöscht
+    found = {("column", c.id) for c in columns} | {("card", c.id) for c in cards}
+    if board is not None:
+        found.add(("board", board.id))
+    deleted = [
+        {"entity": entity, "id": entity_id}
+        for (entity, entity_id), op in latest.items()
+        if op == DELETE or (entity, entity_id) not in found
+    ]
+
+    return {
+        "cursor": rows[-1].seq if rows else since,
+        "has_more": has_more,
+        "board": board,
+        "columns": columns,
+        "cards": cards,
+        "deleted": deleted,
+    }
@@ -0,0 +1,72 @@
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    """
+    Zentrale Konfiguration, gelesen aus Umgebungsvariablen
+    (Groß-/Kleinschreibung egal, z.B. DATABASE_URL, DB_POOL_SIZE).
+    """
+
+    # Standard: lokal SQLite (für Entwicklung)
+    database_url: str = "sqlite:///./kanban.db"
+    # Schema beim Start der App nachziehen; bei mehreren Workern besser
+    # abschalten und vorher einmal python -m app.migrations ausführen
+    migrate_on_startup: bool = True
+
+    # Async-Modus: Requests laufen über einen async Engine (asyncpg / aiosqlite)
+    db_async: bool = False
+
+    # Connection-Pool
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0        # Sekunden Warten auf eine freie Verbindung
+    db_pool_recycle: int = 1800          # Verbindungen nach n Sekunden erneuern, -1 = nie
+    db_pool_pre_ping: bool = True        # tote Verbindungen nach Leerlauf erkennen
+
+    # Live-Updates: "memory" oder "database" (siehe realtime.py)
+    realtime_broker: str = "memory"
+
+    # Passwort-Hashing (siehe security.py)
+    password_hash_rounds: int = 29000     # PBKDF2-Runden; Änderung -> Rehash beim Login
+    password_hash_workers: int = 2        # Prozesse im Hash-Pool
+    password_hash_max_pending: int = 32   # darüber antwortet der Server mit 429
+
+    # Session-Tokens (siehe auth.py)
+    auth_secret: str = ""                 # leer = zufällig pro Prozess
+    auth_token_ttl: int = 12 * 3600       # Sekunden
+    auth_permission_ttl: float = 30.0     # Sekunden im Berechtigungs-Cache
+    # Requests ohne Token zulassen (nur für alte Clients mit x-user-id);
+    # sonst antwortet jede geschützte Route mit 401
+    auth_allow_anonymous: bool = False
+
+    # Karten-History: "inline" oder "queue" (Write-Behind, siehe history.py)
+    history_mode: str = "inline"
+    history_spool_dir: str = "./history-spool"
+    history_batch_size: int = 500         # Flush spätestens ab so vielen Zeilen
+    history_flush_seconds: float = 1.0
+    history_fsync: bool = True            # Journal nach jedem Commit auf die Platte
+
+    # Aufbewahrung der History (siehe retention.py)
+    history_compact_after_hours: int = 24       # jüngere Einträge bleiben unverändert
+    history_compact_gap_seconds: int = 3600     # max. Abstand zweier Edits in einem Lauf
+    history_retention_days: int = 90            # danach ins Archiv
+    history_archive: str = "table"              # "table" oder "files"
+    history_archive_dir: str = "./history-archive"
+
+    # Löschen von Karten, Spalten und Boards (siehe trash.py):
+    # "hard" = sofort per Bulk-DELETE, "trash" = nur markieren
+    delete_mode: str = "hard"
+    trash_retention_hours: int = 24       # danach löscht python -m app.trash endgültig
+
+    # Volltextsuche (siehe search.py): Textsuchkonfiguration von Postgres,
+    # z.B. "german" für Stemming; nach Änderung python -m app.search rebuild
+    search_config: str = "simple"
+
+    # Response-Cache: "memory", "redis" oder "none" (siehe cache.py)
+    response_cache: str = "memory"
+    response_cache_ttl: float = 60.0            # Sekunden
+    response_cache_max_entries: int = 1024      # nur "memory"
+    response_cache_url: str = "redis://localhost:6379/0"
+
+
+settings = Settings()
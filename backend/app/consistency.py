@@ -0,0 +1,89 @@
+"""
+Konsistenzprüfung für denormalisierte Spalten.
+
+cards.board_id ist eine Kopie von columns.board_id der Spalte, in der
+die Karte liegt. crud hält sie aktuell (create_card, update_card beim
+Verschieben, update_column beim Board-Wechsel). Schreibzugriffe am crud
+vorbei können sie verfälschen; check() findet solche Karten, repair()
+setzt sie mit einem einzigen UPDATE zurück. repair() dient auch als
+Backfill, wenn die Spalte in einer Bestandsdatenbank angelegt wird.
+
+Aufruf (Exit-Code 1, wenn bei "check" Abweichungen gefunden werden):
+
+    python -m app.consistency [check|repair]
+"""
+import sys
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+# Höchstens so viele Abweichungen listet check() auf
+CHECK_LIMIT = 100
+
+
+def _column_board_id():
+    """board_id der Spalte einer Karte (korrelierte Unterabfrage)."""
+    return (
+        select(models.KanbanColumn.board_id)
+        .where(models.KanbanColumn.id == models.Card.column_id)
+        .scalar_subquery()
+    )
+
+
+def _inconsistent():
+    expected = _column_board_id()
+    return or_(models.Card.board_id.is_(None), models.Card.board_id != expected)
+
+
+def check(db: Session, limit: int = CHECK_LIMIT) -> list[dict]:
+    """Karten, deren board_id nicht zur Spalte passt: {card_id, board_id, expected}."""
+    rows = (
+        db.query(
+            models.Card.id.label("card_id"),
+            models.Card.board_id,
+            _column_board_id().label("expected"),
+        )
+        .filter(_inconsistent())
+        .order_by(models.Card.id)
+        .limit(limit)
+    )
+    return [row._asdict() for row in rows]
+
+
+def repair(db: Session) -> int:
+    """Setzt board_id aller abweichenden Karten; liefert die Anzahl."""
+    result = db.execute(
+        update(models.Card.__table__)
+        .where(_inconsistent())
+        .values(board_id=_column_board_id())
+    )
+    db.commit()
+    return result.rowcount
+
+
+def main(argv: list[str]) -> int:
+    command = argv[1] if len(argv) > 1 else "check"
+    if command not in ("check", "repair"):
+        print(__doc__)
+        return 2
+
+    db = SessionLocal()
+    try:
+        if command == "repair":
+            print(f"{repair(db)} Karten korrigiert")
+            return 0
+        mismatches = check(db)
+        for row in mismatches:
+            print(f"Karte {row['card_id']}: board_id {row['board_id']}, erwartet {row['expected']}")
+        more = " (oder mehr)" if len(mismatches) == CHECK_LIMIT else ""
+        print(f"{len(mismatches)} Abweichungen{more}")
+        return 1 if mismatches else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,10 +1,146 @@
+from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from passlib.hash import pbkdf2_sha256
+from sqlalchemy import bindparam, case, delete, func, select, tuple_, update
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.exc import StaleDataError
+
+from . import analytics, auth, cache, changes, history, models, ranking, retention, schemas, search
+from .config import settings
+from .pagination import DEFAULT_PAGE_SIZE, decode_cursor, split_page
+
+# ---------- Schnellpfad ----------
+#
+# Lesefunktionen mit as_rows=True laden statt ORM-Objekten nur die
+# Spalten des jeweiligen Response-Schemas als Tupel und liefern dicts.
+# Die Routen geben diese direkt als FastJSONResponse aus (ohne
+# Pydantic-Validierung pro Zeile, siehe responses.py).
+
+
+def _columns(model, schema) -> list:
+    return [getattr(model, name).label(name) for name in schema.model_fields]
+
+
+def _dicts(rows) -> list[dict]:
+    return [row._asdict() for row in rows]
+
+
+BOARD_COLUMNS = _columns(models.Board, schemas.Board)
+USER_COLUMNS = _columns(models.User, schemas.User)
+COLUMN_COLUMNS = _columns(models.KanbanColumn, schemas.Column)
+CARD_COLUMNS = _columns(models.Card, schemas.Card)
+ASSIGNED_CARD_COLUMNS = CARD_COLUMNS + [
+    models.Board.name.label("board_name"),
+    models.KanbanColumn.title.label("column_title"),
+]
+
+
+# ---------- Optimistic Locking ----------
+#
+# Karten und Spalten haben eine version-Spalte (version_id_col im
+# Mapper): jedes UPDATE/DELETE läuft als "... WHERE id = ? AND
+# version = ?" und zählt sie hoch. Clients schicken die Version, die sie
+# kennen (Feld version oder If-Match); passt sie nicht, gibt es 409.
+
+
+def _check_version(obj, expected: Optional[int]) -> None:
+    if expected is not None and obj.version != expected:
+        raise HTTPException(status_code=409, detail="Version conflict")
+
+
+def _save(db: Session, commit: bool) -> None:
+    """Commit bzw. Flush; ein zwischenzeitlich geändertes Objekt wird zu 409."""
+    try:
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Version conflict")
+
+
+# ---------- Löschen ----------
+#
+# Karten, Spalten und Boards werden set-basiert gelöscht: ein DELETE pro
+# Tabelle, ohne Objekte zu laden (die ORM-Kaskade würde jede Karte
+# einzeln laden und löschen). Mit DELETE_MODE=trash werden die Zeilen
+# nur per UPDATE markiert (deleted_at) und für Lesezugriffe
+# ausgeblendet; trash.purge() löscht sie später endgültig.
+
+
+def _trash_mode() -> bool:
+    return settings.delete_mode == "trash"
+
+
+def _card_ids(db: Session, condition) -> list[int]:
+    """IDs der (nicht gelöschten) Karten, für Tombstones im Änderungsprotokoll."""
+    return [
+        card_id
+        for (card_id,) in db.query(models.Card.id).filter(
+            condition, models.Card.deleted_at.is_(None)
+        )
+    ]
+
+
+def _remove_cards(db: Session, condition, now: datetime) -> None:
+    """Karten (samt History) löschen bzw. in den Papierkorb legen."""
+    if _trash_mode():
+        db.execute(
+            update(models.Card)
+            .where(condition, models.Card.deleted_at.is_(None))
+            .values(deleted_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        return
+    if history.has_pending(db):
+        # z.B. Batch: erst Karte geändert, dann ihre Spalte gelöscht
+        card_ids = _card_ids(db, condition)
+        history.discard(db, card_ids)
+        analytics.discard(db, card_ids)
+    purge_cards(db, condition)
+
+
+def _archive_history(db: Session, card_id: int) -> None:
+    """
+    Vor dem endgültigen Löschen einer einzelnen Karte: die ganze History,
+    auch noch nicht geschriebene Einträge (z.B. der Lösch-Eintrag), geht
+    beim Commit ins Archiv und bleibt über GET /cards/{id}/history lesbar.
+    """
+    table = models.CardHistory.__table__
+    rows = [dict(row) for row in db.execute(select(table).where(table.c.card_id == card_id)).mappings()]
+    pending = history.discard(db, [card_id])
+    for row, row_id in zip(pending, history.allocate_ids(db, len(pending))):
+        row["id"] = row_id
+    retention.archive_on_commit(db, rows + pending)
+
+
+def purge_cards(db: Session, condition) -> None:
+    """Löscht Karten samt History, Suchindex und Übergängen endgültig."""
+    card_ids = select(models.Card.id).where(condition)
+    search.index.remove(db, card_ids)
+    analytics.remove_cards(db, card_ids)
+    db.execute(
+        delete(models.CardHistory)
+        .where(models.CardHistory.card_id.in_(select(models.Card.id).where(condition)))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(models.Card).where(condition).execution_options(synchronize_session=False)
+    )
+
+
+def _remove(db: Session, model, condition, now: datetime) -> None:
+    if _trash_mode():
+        statement = update(model).where(condition).values(deleted_at=now)
+    else:
+        if model is models.KanbanColumn:
+            analytics.remove_columns(db, select(models.KanbanColumn.id).where(condition))
+        statement = delete(model).where(condition)
+    db.execute(statement.execution_options(synchronize_session=False))
 
-from . import models, schemas
 
 # ---------- Boards ----------
 
@@ -15,13 +151,25 @@ def create_board(db: Session, board: schemas.BoardCreate) -> models.Board:
         color=board.color,
     )
     db.add(db_board)
+    db.flush()
+    changes.record_change(db, db_board.id, "board", db_board.id)
     db.commit()
     db.refresh(db_board)
     return db_board
 
 
-def get_boards(db: Session) -> list[models.Board]:
-    return db.query(models.Board).order_by(models.Board.created_at).all()
+def get_boards(db: Session, as_rows: bool = False) -> list:
+    query = db.query(*BOARD_COLUMNS) if as_rows else db.query(models.Board)
+    query = query.filter(models.Board.deleted_at.is_(None)).order_by(models.Board.created_at)
+    return _dicts(query) if as_rows else query.all()
+
+
+def get_board(db: Session, board_id: int) -> Optional[models.Board]:
+    return (
+        db.query(models.Board)
+        .filter(models.Board.id == board_id, models.Board.deleted_at.is_(None))
+        .first()
+    )
 
 
 def update_board(
@@ -29,7 +177,7 @@ def update_board(
     board_id: int,
     board_update: schemas.BoardUpdate
 ) -> models.Board:
-    db_board = db.query(models.Board).filter(models.Board.id == board_id).first()
+    db_board = get_board(db, board_id)
     if not db_board:
         raise HTTPException(status_code=404, detail="Board not found")
 
@@ -38,17 +186,85 @@ def update_board(
     if board_update.color is not None:
         db_board.color = board_update.color
 
+    changes.record_change(db, board_id, "board", board_id)
     db.commit()
     db.refresh(db_board)
     return db_board
 
 
-# ---------- Users ----------
+def delete_board(db: Session, board_id: int) -> bool:
+    """Löscht ein Board mit allen Spalten, Karten und deren History."""
+    if get_board(db, board_id) is None:
+        return False
+
+    now = datetime.utcnow()
+    # Ein Tombstone genügt: Clients verwerfen mit dem Board alles darauf
+    changes.record_change(db, board_id, "board", board_id, changes.DELETE)
+    _remove_cards(db, models.Card.board_id == board_id, now)
+    _remove(db, models.KanbanColumn, models.KanbanColumn.board_id == board_id, now)
+    _remove(db, models.Board, models.Board.id == board_id, now)
+    db.commit()
+    return True
+
+
+def get_board_full(db: Session, board_id: int, as_rows: bool = False):
+    """
+    Lädt ein Board inkl. sortierter Spalten und deren Karten.
+    Unabhängig von der Spaltenanzahl werden genau drei Abfragen ausgeführt
+    (Board, Spalten, Karten per IN-Liste).
+    """
+    if as_rows:
+        return _board_full_rows(db, board_id)
+
+    db_board = get_board(db, board_id)
+    if not db_board:
+        return None
+
+    # Cursor vor den Daten lesen: spätere Änderungen liefert /changes erneut
+    db_board.cursor = changes.current_cursor(db, board_id)
+    columns = get_columns_by_board(db, board_id, with_cards=True)
+    # Relationship befüllen, ohne das Board als geändert zu markieren
+    set_committed_value(db_board, "columns", columns)
+    return db_board
+
 
+def _board_full_rows(db: Session, board_id: int) -> Optional[dict]:
+    board = (
+        db.query(*BOARD_COLUMNS)
+        .filter(models.Board.id == board_id, models.Board.deleted_at.is_(None))
+        .first()
+    )
+    if board is None:
+        return None
+
+    result = board._asdict()
+    result["cursor"] = changes.current_cursor(db, board_id)
+    result["columns"] = get_columns_by_board(db, board_id, as_rows=True)
+    cards_by_column: dict[int, list[dict]] = {}
+    for column in result["columns"]:
+        column["cards"] = cards_by_column.setdefault(column["id"], [])
+
+    if cards_by_column:
+        # Über cards.board_id statt IN-Liste der Spalten: ein Index-Bereich
+        cards = (
+            db.query(*CARD_COLUMNS)
+            .filter(models.Card.board_id == board_id, models.Card.deleted_at.is_(None))
+            .order_by(models.Card.rank, models.Card.id)
+        )
+        for card in cards:
+            cards_by_column[card.column_id].append(card._asdict())
+    return result
+
+
+# ---------- Users ----------
 
-def create_user(db: Session, user: schemas.UserCreate) -> models.User:
-    hashed = pbkdf2_sha256.hash(user.password)
 
+def create_user(
+    db: Session,
+    user: schemas.UserCreate,
+    password_hash: str,
+) -> models.User:
+    """password_hash kommt aus security.hash_password (Prozess-Pool)."""
     # Prüfen, ob es bereits User gibt
     user_count = db.query(models.User).count()
     is_first = user_count == 0
@@ -57,7 +273,7 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     db_user = models.User(
         name=user.name,
         email=user.email,
-        password_hash=hashed,
+        password_hash=password_hash,
         is_admin=is_first,
         is_active=is_first,
         can_view=True if is_first else False,
@@ -66,21 +282,33 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     )
     db.add(db_user)
     db.commit()
+    cache.response_cache.invalidate("users")
     db.refresh(db_user)
     return db_user
 
 
-def get_users(db: Session) -> list[models.User]:
+def get_users(db: Session, as_rows: bool = False) -> list:
+    if as_rows:
+        return _dicts(db.query(*USER_COLUMNS).order_by(models.User.name))
     return db.query(models.User).order_by(models.User.name).all()
 
 
-def authenticate_user(db: Session, name: str, password: str) -> Optional[models.User]:
-    user = db.query(models.User).filter(models.User.name == name).first()
-    if not user:
-        return None
-    if not pbkdf2_sha256.verify(password, user.password_hash):
-        return None
-    return user
+def get_user(db: Session, user_id: int) -> Optional[models.User]:
+    return db.query(models.User).filter(models.User.id == user_id).first()
+
+
+def get_user_by_name(db: Session, name: str) -> Optional[models.User]:
+    return db.query(models.User).filter(models.User.name == name).first()
+
+
+def update_password_hash(db: Session, user_id: int, password_hash: str) -> None:
+    """Rehash beim Login, wenn sich die Kostenparameter geändert haben."""
+    db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(password_hash=password_hash)
+    )
+    db.commit()
 
 
 def update_user(db: Session, user_id: int, data: schemas.UserUpdate) -> Optional[models.User]:
@@ -93,6 +321,9 @@ def update_user(db: Session, user_id: int, data: schemas.UserUpdate) -> Optional
         setattr(user, key, value)
 
     db.commit()
+    # Rechte können sich geändert haben
+    auth.permission_cache.invalidate(user_id)
+    cache.response_cache.invalidate("users")
     db.refresh(user)
     return user
 
@@ -100,7 +331,7 @@ def update_user(db: Session, user_id: int, data: schemas.UserUpdate) -> Optional
 def change_user_password(
     db: Session,
     user_id: int,
-    new_password: str,
+    password_hash: str,
 ) -> models.User:
     """
     Wird genutzt, wenn der Benutzer selbst (nach Login) sein Passwort ändert.
@@ -110,9 +341,10 @@ def change_user_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password_hash = pbkdf2_sha256.hash(new_password)
+    user.password_hash = password_hash
     user.must_change_password = False
     db.commit()
+    cache.response_cache.invalidate("users")
     db.refresh(user)
     return user
 
@@ -120,7 +352,7 @@ def change_user_password(
 def admin_reset_password(
     db: Session,
     user_id: int,
-    new_password: str,
+    password_hash: str,
 ) -> models.User:
     """
     Wird vom Admin genutzt, um ein neues (temporäres) Passwort zu setzen.
@@ -131,9 +363,10 @@ def admin_reset_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password_hash = pbkdf2_sha256.hash(new_password)
+    user.password_hash = password_hash
     user.must_change_password = True
     db.commit()
+    cache.response_cache.invalidate("users")
     db.refresh(user)
     return user
 
@@ -141,7 +374,11 @@ def admin_reset_password(
 # ---------- Columns ----------
 
 
-def create_column(db: Session, column: schemas.ColumnCreate) -> models.KanbanColumn:
+def create_column(
+    db: Session,
+    column: schemas.ColumnCreate,
+    commit: bool = True,
+) -> models.KanbanColumn:
     position = column.position if column.position is not None else 0
     db_column = models.KanbanColumn(
         title=column.title,
@@ -150,34 +387,66 @@ def create_column(db: Session, column: schemas.ColumnCreate) -> models.KanbanCol
         color=column.color,
     )
     db.add(db_column)
-    db.commit()
-    db.refresh(db_column)
+    db.flush()
+    changes.record_change(db, db_column.board_id, "column", db_column.id)
+    if commit:
+        db.commit()
+        db.refresh(db_column)
     return db_column
 
 
-def get_columns_by_board(db: Session, board_id: int) -> list[models.KanbanColumn]:
+def get_column(db: Session, column_id: int) -> Optional[models.KanbanColumn]:
     return (
         db.query(models.KanbanColumn)
-        .filter(models.KanbanColumn.board_id == board_id)
-        .order_by(models.KanbanColumn.position)
-        .all()
+        .filter(models.KanbanColumn.id == column_id, models.KanbanColumn.deleted_at.is_(None))
+        .first()
     )
 
 
+def get_all_columns(db: Session, as_rows: bool = False) -> list:
+    query = db.query(*COLUMN_COLUMNS) if as_rows else db.query(models.KanbanColumn)
+    query = query.filter(models.KanbanColumn.deleted_at.is_(None)).order_by(
+        models.KanbanColumn.position
+    )
+    return _dicts(query) if as_rows else query.all()
+
+
+def get_columns_by_board(
+    db: Session,
+    board_id: int,
+    with_cards: bool = False,
+    as_rows: bool = False,
+) -> list:
+    query = db.query(*COLUMN_COLUMNS) if as_rows else db.query(models.KanbanColumn)
+    query = query.filter(
+        models.KanbanColumn.board_id == board_id,
+        models.KanbanColumn.deleted_at.is_(None),
+    ).order_by(models.KanbanColumn.position)
+    if as_rows:
+        return _dicts(query)
+    if with_cards:
+        # Karten aller Spalten in einer einzigen IN-Abfrage nachladen
+        query = query.options(
+            selectinload(models.KanbanColumn.cards.and_(models.Card.deleted_at.is_(None)))
+        )
+    return query.all()
+
+
 def update_column(
     db: Session,
     column_id: int,
     column_data: schemas.ColumnUpdate,
+    commit: bool = True,
+    expected_version: Optional[int] = None,
 ) -> Optional[models.KanbanColumn]:
-    db_column = (
-        db.query(models.KanbanColumn)
-        .filter(models.KanbanColumn.id == column_id)
-        .first()
-    )
-    if not db_column:
+    db_column = db.get(models.KanbanColumn, column_id)
+    if not db_column or db_column.deleted_at is not None:
         return None
 
     data = column_data.dict(exclude_unset=True)
+    version = data.pop("version", None)
+    _check_version(db_column, expected_version if expected_version is not None else version)
+    old_board_id = db_column.board_id
 
     if "title" in data:
         db_column.title = data["title"]
@@ -188,40 +457,101 @@ def update_column(
     if "color" in data:
         db_column.color = data["color"]
 
-    db.commit()
-    db.refresh(db_column)
+    changes.record_change(db, db_column.board_id, "column", column_id)
+    if db_column.board_id != old_board_id:
+        # Spalte samt Karten wandert auf ein anderes Board
+        card_ids = _card_ids(db, models.Card.column_id == column_id)
+        db.execute(
+            update(models.Card)
+            .where(models.Card.column_id == column_id)
+            .values(board_id=db_column.board_id)
+        )
+        changes.record_change(db, old_board_id, "column", column_id, changes.DELETE)
+        changes.record_changes(db, old_board_id, "card", card_ids, changes.DELETE)
+        changes.record_changes(db, db_column.board_id, "card", card_ids)
+
+    # Kein refresh nötig: version und updated_at setzt das UPDATE selbst
+    _save(db, commit)
     return db_column
 
 
-# ---------- Cards & History ----------
+def delete_column(db: Session, column_id: int, commit: bool = True) -> bool:
+    db_column = db.get(models.KanbanColumn, column_id)
+    if not db_column or db_column.deleted_at is not None:
+        return False
+
+    now = datetime.utcnow()
+    condition = models.Card.column_id == column_id
+    card_ids = _card_ids(db, condition)
+    changes.record_change(db, db_column.board_id, "column", column_id, changes.DELETE)
+    changes.record_changes(db, db_column.board_id, "card", card_ids, changes.DELETE)
 
+    _remove_cards(db, condition, now)
+    _remove(db, models.KanbanColumn, models.KanbanColumn.id == column_id, now)
+    if commit:
+        db.commit()
+    return True
 
-def create_card_history(
+
+def reorder_columns(
     db: Session,
-    card_id: int,
-    user_id: Optional[int],
-    action: str,
-    field: Optional[str] = None,
-    old_value: Optional[str] = None,
-    new_value: Optional[str] = None,
-):
-    entry = models.CardHistory(
-        card_id=card_id,
-        user_id=user_id,
-        action=action,
-        field=field,
-        old_value=old_value,
-        new_value=new_value,
-    )
-    db.add(entry)
-    return entry
+    board_id: int,
+    column_ids: list[int],
+) -> list[models.KanbanColumn]:
+    """
+    Setzt die Reihenfolge aller Spalten eines Boards in einer Transaktion
+    mit einem einzigen UPDATE (position = Index + 1).
+    Die Liste muss genau die aktuellen Spalten des Boards enthalten.
+    """
+    current_ids = {
+        column_id
+        for (column_id,) in db.query(models.KanbanColumn.id).filter(
+            models.KanbanColumn.board_id == board_id,
+            models.KanbanColumn.deleted_at.is_(None),
+        )
+    }
+    if len(column_ids) != len(set(column_ids)) or set(column_ids) != current_ids:
+        raise HTTPException(
+            status_code=400,
+            detail="column_ids must contain each column of the board exactly once",
+        )
+
+    if column_ids:
+        positions = {column_id: index + 1 for index, column_id in enumerate(column_ids)}
+        db.execute(
+            update(models.KanbanColumn)
+            .where(
+                models.KanbanColumn.board_id == board_id,
+                models.KanbanColumn.deleted_at.is_(None),
+            )
+            .values(
+                position=case(positions, value=models.KanbanColumn.id),
+                version=models.KanbanColumn.version + 1,
+            )
+            .execution_options(synchronize_session="fetch")
+        )
+        changes.record_changes(db, board_id, "column", column_ids)
+    db.commit()
+    return get_columns_by_board(db, board_id)
+
+
+# ---------- Cards & History ----------
+
+# Felder im Suchindex (siehe search.py)
+SEARCHED_FIELDS = ("title", "description", "link")
 
 
 def create_card(
     db: Session,
     card: schemas.CardCreate,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    commit: bool = True,
+    refs: Optional["_BatchRefs"] = None,
 ) -> models.Card:
+    board_id = _column_board(db, card.column_id, refs)
+    if board_id is None:
+        raise HTTPException(status_code=404, detail="Column not found")
+
     db_card = models.Card(
         title=card.title,
         description=card.description,
@@ -230,34 +560,339 @@ def create_card(
         color=card.color,
         assignee_id=card.assignee_id,
         link=card.link,
+        rank=_append_rank(db, card.column_id, refs),
+        board_id=board_id,
     )
     db.add(db_card)
-    db.commit()
-    db.refresh(db_card)
+    db.flush()
+    changes.record_change(db, board_id, "card", db_card.id)
+    search.mark(db, db_card.id)
+    analytics.entered(db, db_card.id, card.column_id)
 
-    # History: Erstellung
-    create_card_history(
+    # History: Erstellung (wird mit dem Commit geschrieben, siehe history.py)
+    history.add(
         db,
         card_id=db_card.id,
         user_id=user_id,
         action="create",
-        field=None,
-        old_value=None,
         new_value=db_card.title,
     )
-    db.commit()
+    if commit:
+        db.commit()
 
     return db_card
 
 
+def get_cards(
+    db: Session,
+    board_id: Optional[int] = None,
+    column_id: Optional[int] = None,
+    assignee_id: Optional[int] = None,
+    color: Optional[str] = None,
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    as_rows: bool = False,
+) -> tuple[list, Optional[str]]:
+    """
+    Keyset-Pagination über (created_at, id): jede Seite ist eine
+    Index-Range-Abfrage, egal wie weit der Client schon geblättert hat.
+    Liefert (Karten, Cursor für die nächste Seite oder None).
+    """
+    query = db.query(*CARD_COLUMNS) if as_rows else db.query(models.Card)
+    query = query.filter(models.Card.deleted_at.is_(None))
+
+    if board_id is not None:
+        query = query.filter(models.Card.board_id == board_id)
+    if column_id is not None:
+        query = query.filter(models.Card.column_id == column_id)
+    if assignee_id is not None:
+        query = query.filter(models.Card.assignee_id == assignee_id)
+    if color is not None:
+        query = query.filter(models.Card.color == color)
+    if due_from is not None:
+        query = query.filter(models.Card.due_date >= due_from)
+    if due_to is not None:
+        query = query.filter(models.Card.due_date < due_to)
+
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor, datetime, int)
+        query = query.filter(
+            tuple_(models.Card.created_at, models.Card.id)
+            > tuple_(last_created_at, last_id)
+        )
+
+    rows = (
+        query.order_by(models.Card.created_at, models.Card.id)
+        .limit(limit + 1)
+        .all()
+    )
+    page, next_cursor = split_page(rows, limit, key=lambda c: (c.created_at, c.id))
+    return (_dicts(page) if as_rows else page), next_cursor
+
+
+def get_card(db: Session, card_id: int) -> Optional[models.Card]:
+    return (
+        db.query(models.Card)
+        .filter(models.Card.id == card_id, models.Card.deleted_at.is_(None))
+        .first()
+    )
+
+
+def search_cards(
+    db: Session,
+    q: str,
+    board_id: Optional[int] = None,
+    assignee_id: Optional[int] = None,
+    color: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    as_rows: bool = False,
+) -> tuple[list, Optional[str]]:
+    """
+    Volltextsuche (siehe search.py), sortiert nach Relevanz unter den
+    höchstens search.MAX_CANDIDATES neuesten Treffern. Keyset-Pagination
+    über (score, id); jede Seite bewertet nur diese Kandidaten.
+    """
+    words = search.terms(q)
+    if not words:
+        return [], None
+
+    hits = search.candidates(words)
+    columns = CARD_COLUMNS if as_rows else [models.Card]
+    query = (
+        db.query(*columns, hits.c.score.label("search_score"))
+        .join(hits, hits.c.card_id == models.Card.id)
+        .filter(models.Card.deleted_at.is_(None))
+    )
+    if board_id is not None:
+        query = query.filter(models.Card.board_id == board_id)
+    if assignee_id is not None:
+        query = query.filter(models.Card.assignee_id == assignee_id)
+    if color is not None:
+        query = query.filter(models.Card.color == color)
+    if cursor:
+        last_score, last_id = decode_cursor(cursor, float, int)
+        query = query.filter(
+            tuple_(hits.c.score, models.Card.id) > tuple_(last_score, last_id)
+        )
+
+    rows = query.order_by(hits.c.score, models.Card.id).limit(limit + 1).all()
+    page, next_cursor = split_page(
+        rows, limit, key=lambda row: (row.search_score, row.id if as_rows else row.Card.id)
+    )
+    if as_rows:
+        return [_without_score(row._asdict()) for row in page], next_cursor
+    return [row.Card for row in page], next_cursor
+
+
+def _without_score(card: dict) -> dict:
+    del card["search_score"]
+    return card
+
+
+def get_assigned_cards(
+    db: Session,
+    user_id: int,
+    due: Optional[str] = None,
+    soon_days: int = 7,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    now: Optional[datetime] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Karten eines Benutzers über alle Boards, nach Fälligkeit sortiert
+    (ohne Datum zuletzt), mit Board- und Spaltennamen.
+    due="overdue": fällig vor now, due="soon": in den nächsten soon_days Tagen.
+
+    Keyset über (due_date, id) auf ix_cards_assignee_id_due_date_id. Damit
+    "ohne Datum zuletzt" keinen Sortierschritt braucht, laufen zwei
+    Index-Range-Abfragen nacheinander: erst die Karten mit Datum, dann
+    (nach id) die ohne. Ein Cursor mit due_date None steht in der zweiten.
+    """
+    now = now or datetime.utcnow()
+    last_due, last_id = decode_cursor(cursor, datetime, int) if cursor else (None, None)
+
+    query = (
+        db.query(*ASSIGNED_CARD_COLUMNS)
+        .join(models.Board, models.Board.id == models.Card.board_id)
+        .join(models.KanbanColumn, models.KanbanColumn.id == models.Card.column_id)
+        .filter(models.Card.assignee_id == user_id, models.Card.deleted_at.is_(None))
+    )
+
+    rows = []
+    if last_id is None or last_due is not None:
+        dated = query.filter(models.Card.due_date.is_not(None))
+        if due == "overdue":
+            dated = dated.filter(models.Card.due_date < now)
+        elif due == "soon":
+            dated = dated.filter(
+                models.Card.due_date >= now,
+                models.Card.due_date < now + timedelta(days=soon_days),
+            )
+        if last_due is not None:
+            dated = dated.filter(
+                tuple_(models.Card.due_date, models.Card.id) > tuple_(last_due, last_id)
+            )
+        rows = dated.order_by(models.Card.due_date, models.Card.id).limit(limit + 1).all()
+
+    if due is None and len(rows) <= limit:
+        undated = query.filter(models.Card.due_date.is_(None))
+        if last_due is None and last_id is not None:
+            undated = undated.filter(models.Card.id > last_id)
+        rows += undated.order_by(models.Card.id).limit(limit + 1 - len(rows)).all()
+
+    page, next_cursor = split_page(rows, limit, key=lambda c: (c.due_date, c.id))
+    return _dicts(page), next_cursor
+
+
+def get_cards_by_column(db: Session, column_id: int, as_rows: bool = False) -> list:
+    query = db.query(*CARD_COLUMNS) if as_rows else db.query(models.Card)
+    query = query.filter(
+        models.Card.column_id == column_id,
+        models.Card.deleted_at.is_(None),
+    ).order_by(models.Card.rank, models.Card.id)
+    return _dicts(query) if as_rows else query.all()
+
+
+def _column_board_id(db: Session, column_id: int) -> Optional[int]:
+    return (
+        db.query(models.KanbanColumn.board_id)
+        .filter(models.KanbanColumn.id == column_id, models.KanbanColumn.deleted_at.is_(None))
+        .scalar()
+    )
+
+
+def _last_rank(db: Session, column_id: int) -> Optional[str]:
+    return (
+        db.query(func.max(models.Card.rank))
+        .filter(models.Card.column_id == column_id)
+        .scalar()
+    )
+
+
+def _column_board(db: Session, column_id: int, refs: Optional["_BatchRefs"]) -> Optional[int]:
+    """_column_board_id, im Batch aus der Vorabfrage."""
+    if refs is not None and column_id in refs.column_boards:
+        return refs.column_boards[column_id]
+    return _column_board_id(db, column_id)
+
+
+def _append_rank(db: Session, column_id: int, refs: Optional["_BatchRefs"]) -> str:
+    """Rang am Ende der Spalte; im Batch ohne erneute max(rank)-Abfrage."""
+    if refs is None:
+        return ranking.rank_between(_last_rank(db, column_id), None)
+    if column_id not in refs.last_ranks:
+        refs.last_ranks[column_id] = _last_rank(db, column_id)
+    rank = ranking.rank_between(refs.last_ranks[column_id], None)
+    refs.last_ranks[column_id] = rank
+    return rank
+
+
+def _neighbour_rank(db: Session, card_id: int, column_id: int, rank: str, above: bool) -> Optional[str]:
+    """Nächster Rang direkt über (above) bzw. unter einem Rang in der Spalte."""
+    query = db.query(models.Card.rank).filter(
+        models.Card.column_id == column_id,
+        models.Card.id != card_id,
+    )
+    if above:
+        query = query.filter(models.Card.rank < rank).order_by(models.Card.rank.desc())
+    else:
+        query = query.filter(models.Card.rank > rank).order_by(models.Card.rank)
+    row = query.first()
+    return row[0] if row else None
+
+
+def _placement_rank(
+    db: Session,
+    card_id: int,
+    column_id: int,
+    after_card_id: Optional[int],
+    before_card_id: Optional[int],
+    retry: bool = True,
+) -> str:
+    """
+    Rang für eine Karte, die zwischen after_card_id und before_card_id
+    in column_id platziert wird. Fehlt einer der beiden Nachbarn, wird
+    der direkte Nachbar in der Spalte ermittelt.
+    """
+    neighbours = {}
+    for neighbour_id in (after_card_id, before_card_id):
+        if neighbour_id is None:
+            continue
+        neighbour = (
+            db.query(models.Card.rank, models.Card.column_id)
+            .filter(models.Card.id == neighbour_id)
+            .first()
+        )
+        if not neighbour or neighbour.column_id != column_id or neighbour_id == card_id:
+            raise HTTPException(status_code=400, detail="Invalid neighbour card")
+        neighbours[neighbour_id] = neighbour.rank
+
+    lower = neighbours.get(after_card_id)
+    upper = neighbours.get(before_card_id)
+    if before_card_id is None:
+        upper = _neighbour_rank(db, card_id, column_id, lower, above=False)
+    if after_card_id is None:
+        lower = _neighbour_rank(db, card_id, column_id, upper, above=True)
+
+    try:
+        return ranking.rank_between(lower, upper)
+    except ValueError:
+        if not retry or (lower is not None and upper is not None and lower > upper):
+            raise HTTPException(status_code=400, detail="Invalid neighbour card")
+        # Gleiche Ränge (z.B. durch parallele Inserts): Spalte neu verteilen
+        rebalance_column_ranks(db, column_id, commit=False)
+        return _placement_rank(
+            db, card_id, column_id, after_card_id, before_card_id, retry=False
+        )
+
+
+def rebalance_column_ranks(db: Session, column_id: int, commit: bool = True) -> None:
+    """
+    Verteilt die Ränge einer Spalte neu, wenn sie durch wiederholtes
+    Einfügen an derselben Stelle zu lang geworden sind. Die Reihenfolge
+    bleibt erhalten; Karten ohne Rang kommen nach created_at ans Ende.
+    """
+    rows = (
+        db.query(models.Card.id)
+        .filter(models.Card.column_id == column_id)
+        .order_by(
+            models.Card.rank.is_(None),
+            models.Card.rank,
+            models.Card.created_at,
+            models.Card.id,
+        )
+        .all()
+    )
+    ranks = ranking.spread_ranks(len(rows))
+    if rows:
+        # Core-UPDATE ohne version: der Rang wird vom Server verwaltet und
+        # soll laufende Bearbeitungen der Karten nicht in 409 laufen lassen
+        cards = models.Card.__table__
+        db.execute(
+            update(cards).where(cards.c.id == bindparam("_id")).values(rank=bindparam("rank")),
+            [{"_id": card_id, "rank": rank} for (card_id,), rank in zip(rows, ranks)],
+        )
+        changes.record_changes(
+            db, _column_board_id(db, column_id), "card", [card_id for (card_id,) in rows]
+        )
+    if commit:
+        db.commit()
+
+
 def update_card(
     db: Session,
     card_id: int,
     card_update: schemas.CardUpdate,
     user_id: Optional[int] = None,
+    commit: bool = True,
+    expected_version: Optional[int] = None,
+    refs: Optional["_BatchRefs"] = None,
 ) -> models.Card:
-    db_card = db.query(models.Card).filter(models.Card.id == card_id).first()
-    if not db_card:
+    db_card = db.get(models.Card, card_id)
+    if not db_card or db_card.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Card not found")
 
     # vorherige Werte merken
@@ -271,12 +906,40 @@ def update_card(
         "link": db_card.link,
     }
 
+    data = card_update.dict(exclude_unset=True)
+    version = data.pop("version", None)
+    _check_version(db_card, expected_version if expected_version is not None else version)
+    after_card_id = data.pop("after_card_id", None)
+    before_card_id = data.pop("before_card_id", None)
+    target_column_id = data.get("column_id", db_card.column_id)
+
+    # Das Board steht auf der Karte; nachgeschlagen wird nur das Ziel
+    old_board_id = new_board_id = db_card.board_id
+    if target_column_id != db_card.column_id:
+        new_board_id = _column_board(db, target_column_id, refs)
+        if new_board_id is None:
+            raise HTTPException(status_code=404, detail="Column not found")
+
+    # Rang nur ändern, wenn die Karte platziert oder verschoben wird
+    if after_card_id is not None or before_card_id is not None:
+        db_card.rank = _placement_rank(
+            db, db_card.id, target_column_id, after_card_id, before_card_id
+        )
+        last_rank = refs.last_ranks.get(target_column_id) if refs is not None else None
+        if last_rank is not None and db_card.rank > last_rank:
+            refs.last_ranks[target_column_id] = db_card.rank
+    elif target_column_id != db_card.column_id:
+        db_card.rank = _append_rank(db, target_column_id, refs)
+
     # Card aktualisieren
-    for field, value in card_update.dict(exclude_unset=True).items():
+    for field, value in data.items():
         setattr(db_card, field, value)
+    if new_board_id != old_board_id:
+        db_card.board_id = new_board_id
 
-    db.commit()
-    db.refresh(db_card)
+    if new_board_id != old_board_id:
+        changes.record_change(db, old_board_id, "card", card_id, changes.DELETE)
+    changes.record_change(db, new_board_id, "card", card_id)
 
     # nachher-Werte
     after = {
@@ -289,10 +952,14 @@ def update_card(
         "link": db_card.link,
     }
 
-    # Unterschiede loggen
+    # Unterschiede loggen, ein Commit für Karte und History
     for field in before.keys():
         if before[field] != after[field]:
-            create_card_history(
+            if field in SEARCHED_FIELDS:
+                search.mark(db, db_card.id)
+            if field == "column_id":
+                analytics.moved(db, db_card.id, int(before[field]), db_card.column_id)
+            history.add(
                 db,
                 card_id=db_card.id,
                 user_id=user_id,
@@ -302,45 +969,293 @@ def update_card(
                 new_value=after[field],
             )
 
-    db.commit()
+    _save(db, commit)
     return db_card
 
 
 def delete_card(
     db: Session,
     card_id: int,
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    commit: bool = True,
 ):
-    db_card = db.query(models.Card).filter(models.Card.id == card_id).first()
-    if not db_card:
+    db_card = db.get(models.Card, card_id)
+    if not db_card or db_card.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Card not found")
 
-    title_before = db_card.title
-
-    db.delete(db_card)
+    changes.record_change(db, db_card.board_id, "card", card_id, changes.DELETE)
+    analytics.left(db, db_card.column_id)
 
-    # History: Delete
-    create_card_history(
+    history.add(
         db,
         card_id=card_id,
         user_id=user_id,
         action="delete",
-        field=None,
-        old_value=title_before,
-        new_value=None,
+        old_value=db_card.title,
     )
+    if not _trash_mode():
+        _archive_history(db, card_id)
 
-    db.commit()
+    _remove_cards(db, models.Card.id == card_id, datetime.utcnow())
+
+    if commit:
+        db.commit()
     return {"ok": True}
 
 
-def get_card_history(db: Session, card_id: int):
+# ---------- Batch ----------
+
+# Obergrenze für POST /batch
+MAX_BATCH_OPERATIONS = 500
+
+
+def _batch_error(index: int, exc: HTTPException) -> HTTPException:
+    return HTTPException(
+        status_code=exc.status_code,
+        detail={"index": index, "detail": exc.detail},
+    )
+
+
+class _BatchRefs:
+    """
+    Vorab geladene Daten eines Batches. Die Operationen lesen daraus statt
+    einzeln nachzufragen und schreiben sie fort (neue Ränge, neue und
+    gelöschte Spalten).
+    """
+
+    def __init__(self) -> None:
+        # Spalte -> Board
+        self.column_boards: dict[int, int] = {}
+        # Spalte -> höchster Rang (None = leere Spalte)
+        self.last_ranks: dict[int, Optional[str]] = {}
+        # Die Identity Map hält Objekte nur schwach; ohne diese Referenzen
+        # würden vorab geladene Karten pro Operation neu abgefragt
+        self.objects: list = []
+
+    def column_created(self, column: models.KanbanColumn) -> None:
+        self.column_boards[column.id] = column.board_id
+        self.last_ranks[column.id] = None
+
+    def column_changed(self, column_id: int) -> None:
+        # Board oder Existenz hat sich geändert: wieder nachfragen
+        self.column_boards.pop(column_id, None)
+        self.last_ranks.pop(column_id, None)
+
+
+def _check_refs(
+    db: Session,
+    model,
+    refs: list[tuple[int, int]],
+    detail: str,
+    value=None,
+) -> dict:
     """
-    Liefert alle History-Einträge zu einer Karte (neueste zuerst).
+    Prüft alle referenzierten IDs eines Typs mit einer IN-Abfrage.
+    Liefert {id: value} für die gefundenen Zeilen.
     """
+    ids = {ref_id for _, ref_id in refs}
+    if not ids:
+        return {}
+    query = db.query(model.id, model.id if value is None else value).filter(model.id.in_(ids))
+    if hasattr(model, "deleted_at"):
+        query = query.filter(model.deleted_at.is_(None))
+    found = dict(query.all())
+    for index, ref_id in refs:
+        if ref_id not in found:
+            raise _batch_error(index, HTTPException(status_code=404, detail=detail))
+    return found
+
+
+def _validate_batch(db: Session, operations: list) -> _BatchRefs:
+    """
+    Prüft Spalten, Boards und Assignees aller Operationen vorab mit je
+    einer Abfrage und lädt die betroffenen Karten und Spalten in die
+    Session (update/delete holen sie dann per db.get ohne Abfrage).
+    Board und letzter Rang der Zielspalten kommen ebenfalls mit je einer
+    Abfrage, create_card/update_card lesen sie aus dem Ergebnis.
+    """
+    columns, boards, assignees, cards, own_columns = [], [], [], [], []
+    for index, operation in enumerate(operations):
+        data = getattr(operation, "data", None)
+        if operation.op in ("create_card", "update_card"):
+            if data.column_id is not None:
+                columns.append((index, data.column_id))
+            if data.assignee_id is not None:
+                assignees.append((index, data.assignee_id))
+        elif operation.op in ("create_column", "update_column") and data.board_id is not None:
+            boards.append((index, data.board_id))
+        if operation.op in ("update_card", "delete_card"):
+            cards.append((index, operation.id))
+        elif operation.op in ("update_column", "delete_column"):
+            own_columns.append((index, operation.id))
+
+    refs = _BatchRefs()
+    refs.column_boards = _check_refs(
+        db, models.KanbanColumn, columns, "Column not found", value=models.KanbanColumn.board_id
+    )
+    _check_refs(db, models.Board, boards, "Board not found")
+    _check_refs(db, models.User, assignees, "Assignee not found")
+
+    if refs.column_boards:
+        refs.last_ranks = dict.fromkeys(refs.column_boards)
+        refs.last_ranks.update(
+            db.query(models.Card.column_id, func.max(models.Card.rank))
+            .filter(models.Card.column_id.in_(refs.column_boards))
+            .group_by(models.Card.column_id)
+            .all()
+        )
+    if cards:
+        refs.objects += db.query(models.Card).filter(
+            models.Card.id.in_({card_id for _, card_id in cards})
+        ).all()
+    if own_columns:
+        refs.objects += db.query(models.KanbanColumn).filter(
+            models.KanbanColumn.id.in_({column_id for _, column_id in own_columns})
+        ).all()
+    return refs
+
+
+def _apply_operation(db: Session, operation, user_id: Optional[int], refs: _BatchRefs) -> dict:
+    op = operation.op
+    if op == "create_card":
+        card = create_card(db, operation.data, user_id=user_id, commit=False, refs=refs)
+        return {"op": op, "id": card.id, "card": card}
+    if op == "update_card":
+        card = update_card(
+            db, operation.id, operation.data, user_id=user_id, commit=False, refs=refs
+        )
+        return {"op": op, "id": card.id, "card": card}
+    if op == "delete_card":
+        delete_card(db, operation.id, user_id=user_id, commit=False)
+        return {"op": op, "id": operation.id}
+    if op == "create_column":
+        column = create_column(db, operation.data, commit=False)
+        refs.column_created(column)
+        return {"op": op, "id": column.id, "column": column}
+    if op == "update_column":
+        column = update_column(db, operation.id, operation.data, commit=False)
+        if column is None:
+            raise HTTPException(status_code=404, detail="Column not found")
+        refs.column_changed(column.id)
+        return {"op": op, "id": column.id, "column": column}
+    if op == "delete_column":
+        if not delete_column(db, operation.id, commit=False):
+            raise HTTPException(status_code=404, detail="Column not found")
+        refs.column_changed(operation.id)
+        return {"op": op, "id": operation.id}
+    raise HTTPException(status_code=400, detail=f"Unknown operation: {op}")
+
+
+def apply_batch(db: Session, operations: list, user_id: Optional[int] = None) -> list[dict]:
+    """
+    Führt Karten- und Spaltenoperationen der Reihe nach in einer
+    Transaktion aus: entweder alle oder keine. Ein Fehler liefert den
+    Index der Operation im detail. History und Änderungsprotokoll werden
+    erst beim gemeinsamen Commit geschrieben (History als ein INSERT).
+    """
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_OPERATIONS} operations per batch",
+        )
+    try:
+        refs = _validate_batch(db, operations)
+        results = []
+        for index, operation in enumerate(operations):
+            try:
+                results.append(_apply_operation(db, operation, user_id, refs))
+                # Folgende Operationen sehen den neuen Stand (autoflush ist aus)
+                db.flush()
+            except HTTPException as exc:
+                raise _batch_error(index, exc)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return results
+
+
+def _history_rows(query, cursor: Optional[str], limit: int) -> list[models.CardHistory]:
+    """Keyset-Abfrage über (created_at, id), neueste zuerst; limit + 1 Zeilen."""
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor, datetime, int)
+        query = query.filter(
+            tuple_(models.CardHistory.created_at, models.CardHistory.id)
+            < tuple_(last_created_at, last_id)
+        )
     return (
-        db.query(models.CardHistory)
-        .filter(models.CardHistory.card_id == card_id)
-        .order_by(models.CardHistory.created_at.desc())
+        query.order_by(models.CardHistory.created_at.desc(), models.CardHistory.id.desc())
+        .limit(limit + 1)
         .all()
     )
+
+
+def _history_key(entry) -> tuple[datetime, int]:
+    return (entry.created_at, entry.id)
+
+
+def _has_archived_history(db: Session, card_id: int) -> bool:
+    row = db.query(models.Card.history_archived_at).filter(models.Card.id == card_id).first()
+    # Endgültig gelöschte Karte: ihr Lösch-Eintrag liegt im Archiv
+    return row is None or row.history_archived_at is not None
+
+
+def get_card_history(
+    db: Session,
+    card_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> tuple[list[models.CardHistory], Optional[str]]:
+    """
+    History-Einträge einer Karte (neueste zuerst), seitenweise.
+    Liefert (Einträge, Cursor für ältere Einträge oder None).
+
+    Liest transparent aus dem Archiv weiter (siehe retention.py), sobald
+    card_history für diese Seite nicht mehr genug Einträge hat. Gefragt
+    wird es nur, wenn cards.history_archived_at gesetzt ist; für alle
+    anderen Karten kostet das eine PK-Abfrage statt z.B. das Entpacken
+    einer Archivdatei.
+    """
+    query = db.query(models.CardHistory).filter(models.CardHistory.card_id == card_id)
+    rows = _history_rows(query, cursor, limit)
+    if len(rows) <= limit and _has_archived_history(db, card_id):
+        before = decode_cursor(cursor, datetime, int) if cursor else None
+        archived = retention.archive.read(db, card_id, before, limit + 1)
+        rows = sorted(rows + archived, key=_history_key, reverse=True)[: limit + 1]
+    return split_page(rows, limit, key=_history_key)
+
+
+def get_board_activity(
+    db: Session,
+    board_id: int,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    field: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> tuple[list[models.CardHistory], Optional[str]]:
+    """
+    History aller Karten eines Boards (neueste zuerst), seitenweise.
+    Join Karten -> History; beide Stufen laufen über einen Index
+    (cards.board_id, card_id bzw. user_id + created_at).
+    Archivierte Einträge sind hier nicht enthalten.
+    """
+    query = (
+        db.query(models.CardHistory)
+        .join(models.Card, models.Card.id == models.CardHistory.card_id)
+        .filter(models.Card.board_id == board_id, models.Card.deleted_at.is_(None))
+    )
+    if user_id is not None:
+        query = query.filter(models.CardHistory.user_id == user_id)
+    if action is not None:
+        query = query.filter(models.CardHistory.action == action)
+    if field is not None:
+        query = query.filter(models.CardHistory.field == field)
+    if since is not None:
+        query = query.filter(models.CardHistory.created_at >= since)
+    if until is not None:
+        query = query.filter(models.CardHistory.created_at < until)
+    rows = _history_rows(query, cursor, limit)
+    return split_page(rows, limit, key=_history_key)
@@ -0,0 +1,80 @@
+"""
+Async-Varianten der crud-Funktionen.
+
+Die Logik bleibt in crud.py; hier wird nur entschieden, wie sie läuft:
+- AsyncSession (DB_ASYNC=1): per run_sync direkt im Event-Loop, die
+  Datenbank-I/O wartet dabei asynchron auf asyncpg / aiosqlite
+- Session: im Threadpool, wie zuvor bei den sync-Routen
+"""
+import functools
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from . import analytics, changes, crud
+
+T = TypeVar("T")
+
+
+def _async(fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(fn)
+    async def wrapper(db, *args, **kwargs):
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+
+    return wrapper
+
+
+# ---------- Boards ----------
+
+create_board = _async(crud.create_board)
+get_boards = _async(crud.get_boards)
+get_board = _async(crud.get_board)
+update_board = _async(crud.update_board)
+delete_board = _async(crud.delete_board)
+get_board_full = _async(crud.get_board_full)
+get_changes = _async(changes.get_changes)
+board_metrics = _async(analytics.board_metrics)
+current_cursor = _async(changes.current_cursor)
+column_cursor = _async(changes.column_cursor)
+list_version = _async(changes.list_version)
+
+# ---------- Users ----------
+
+create_user = _async(crud.create_user)
+get_users = _async(crud.get_users)
+get_user = _async(crud.get_user)
+get_user_by_name = _async(crud.get_user_by_name)
+update_password_hash = _async(crud.update_password_hash)
+update_user = _async(crud.update_user)
+change_user_password = _async(crud.change_user_password)
+admin_reset_password = _async(crud.admin_reset_password)
+
+# ---------- Columns ----------
+
+create_column = _async(crud.create_column)
+get_column = _async(crud.get_column)
+get_all_columns = _async(crud.get_all_columns)
+get_columns_by_board = _async(crud.get_columns_by_board)
+update_column = _async(crud.update_column)
+reorder_columns = _async(crud.reorder_columns)
+delete_column = _async(crud.delete_column)
+
+# ---------- Cards & History ----------
+
+create_card = _async(crud.create_card)
+get_card = _async(crud.get_card)
+get_cards = _async(crud.get_cards)
+get_cards_by_column = _async(crud.get_cards_by_column)
+search_cards = _async(crud.search_cards)
+get_assigned_cards = _async(crud.get_assigned_cards)
+update_card = _async(crud.update_card)
+delete_card = _async(crud.delete_card)
+get_card_history = _async(crud.get_card_history)
+get_board_activity = _async(crud.get_board_activity)
+
+# ---------- Batch ----------
+
+apply_batch = _async(crud.apply_batch)
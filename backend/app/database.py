@@ -1,33 +1,161 @@
-import os
+import threading
+import time
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
-# Standard: lokal SQLite (für Entwicklung)
-DEFAULT_SQLALCHEMY_DATABASE_URL = "sqlite:///./kanban.db"
+from .config import settings
 
-# In Docker / Produktion per ENV konfigurierbar
-SQLALCHEMY_DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    DEFAULT_SQLALCHEMY_DATABASE_URL,
-)
+SQLALCHEMY_DATABASE_URL = settings.database_url
+DB_ASYNC = settings.db_async
 
 # Für SQLite braucht man extra connect_args, für Postgres nicht
 connect_args = {}
 if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args=connect_args,
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class PoolStats:
+    """Wartezeiten beim Auschecken einer Verbindung aus dem Pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": 1000 * self.wait_total / self.checkouts if self.checkouts else 0.0,
+                "wait_max_ms": 1000 * self.wait_max,
+            }
+
+
+def _instrumented(pool_class):
+    class InstrumentedPool(pool_class):
+        # Klassenattribut: bleibt auch nach pool.recreate() erhalten
+        stats = PoolStats()
+
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except Exception:
+                self.stats.record(time.perf_counter() - start, timed_out=True)
+                raise
+            self.stats.record(time.perf_counter() - start, timed_out=False)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+
+def _engine_options(pool_class) -> dict:
+    url = make_url(SQLALCHEMY_DATABASE_URL)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-Memory-SQLite hat nur eine Verbindung, kein Pooling
+        return {"connect_args": connect_args}
+    return {
+        "connect_args": connect_args,
+        "poolclass": _instrumented(pool_class),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(QueuePool))
+
+# expire_on_commit=False: Objekte bleiben nach dem Commit geladen und
+# können serialisiert werden, ohne erneut (ggf. im Event-Loop) zu laden
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+)
 
 Base = declarative_base()
 
-def get_db():
+# Sync-Treiber -> passender async Treiber
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver known for {parsed.drivername}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        async_database_url(SQLALCHEMY_DATABASE_URL),
+        **_engine_options(AsyncAdaptedQueuePool),
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Die eine Session-Dependency für alle Routen: im Async-Modus eine
+# AsyncSession, sonst eine normale Session (siehe crud_async.py)
+get_db = get_async_db if DB_ASYNC else get_sync_db
+
+
+def pool_status() -> dict:
+    """Aktueller Zustand des Pools, der die Requests bedient."""
+    active = async_engine if async_engine is not None else engine
+    pool = active.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(getattr(pool, "stats", None), PoolStats):
+        status.update(pool.stats.snapshot())
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.db_max_overflow,
+        })
+    return status
@@ -0,0 +1,314 @@
+"""
+Karten-History: Einträge sammeln und gebündelt schreiben.
+
+crud ruft history.add() auf; die Einträge liegen bis zum Commit in der
+Session. HISTORY_MODE steuert, wie sie geschrieben werden:
+
+- "inline": ein mehrzeiliges INSERT direkt vor dem Commit, also in
+            derselben Transaktion wie die Kartenänderung
+- "queue":  nach dem Commit an den HistoryWriter (Write-Behind). Der
+            hängt die Zeilen an ein Journal (NDJSON) an und schreibt sie
+            im Hintergrund gesammelt in die Datenbank. Schlägt das fehl
+            oder stirbt der Prozess, bleiben die Dateien liegen und
+            werden beim nächsten Flush bzw. Start nachgetragen
+            (at-least-once). Die History ist dann kurz verzögert sichtbar.
+
+Grenzen im Modus "queue":
+- Das Journal wird nach jedem Commit per fsync geschrieben
+  (HISTORY_FSYNC). Stirbt der Prozess zwischen dem Commit der
+  Kartenänderung und diesem Schreiben, fehlen deren Einträge.
+- Einträge von Karten, die vor dem Flush endgültig gelöscht wurden,
+  gehen direkt ins Archiv (wie beim Löschen, siehe crud.delete_card).
+- Ein Stapel, den die Datenbank wegen seiner Daten ablehnt, wird nach
+  MAX_BATCH_ATTEMPTS Versuchen als *.failed beiseitegelegt; die übrigen
+  Stapel laufen weiter. Zum erneuten Versuch in *.batch umbenennen.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import event, exc, func, insert, text
+from sqlalchemy.orm import Session
+
+from . import models, retention
+from .config import settings
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_PENDING_ROWS = "history_pending_rows"
+
+# Versuche für einen Stapel mit fehlerhaften Daten, danach *.failed
+MAX_BATCH_ATTEMPTS = 3
+
+
+def add(
+    db: Session,
+    card_id: int,
+    user_id: Optional[int],
+    action: str,
+    field: Optional[str] = None,
+    old_value: Optional[str] = None,
+    new_value: Optional[str] = None,
+) -> None:
+    db.info.setdefault(_PENDING_ROWS, []).append({
+        "card_id": card_id,
+        "user_id": user_id,
+        "action": action,
+        "field": field,
+        "old_value": old_value,
+        "new_value": new_value,
+        "created_at": datetime.utcnow(),
+    })
+
+
+def has_pending(db: Session) -> bool:
+    return bool(db.info.get(_PENDING_ROWS))
+
+
+def discard(db: Session, card_ids) -> list[dict]:
+    """
+    Verwirft noch nicht geschriebene Einträge endgültig gelöschter Karten
+    und liefert sie zurück.
+    """
+    rows = db.info.get(_PENDING_ROWS)
+    if not rows:
+        return []
+    card_ids = set(card_ids)
+    discarded = [row for row in rows if row["card_id"] in card_ids]
+    rows[:] = [row for row in rows if row["card_id"] not in card_ids]
+    return discarded
+
+
+def allocate_ids(db: Session, count: int) -> list[int]:
+    """
+    Reserviert `count` ids aus dem Nummernkreis von card_history, ohne
+    Zeilen anzulegen; für Einträge, die direkt ins Archiv gehen.
+    """
+    if not count:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return list(db.execute(
+            text(
+                "SELECT nextval(pg_get_serial_sequence('card_history', 'id')) "
+                "FROM generate_series(1, :count)"
+            ),
+            {"count": count},
+        ).scalars())
+
+    # SQLite: Zähler von AUTOINCREMENT (sqlite_sequence) hochsetzen. Ältere
+    # Tabellen ohne AUTOINCREMENT vergeben max(id) + 1 und können ids
+    # wiederverwenden; im Archiv stört das nicht (eigener Schlüssel).
+    last = db.execute(
+        text("UPDATE sqlite_sequence SET seq = seq + :count WHERE name = 'card_history' RETURNING seq"),
+        {"count": count},
+    ).scalar()
+    if last is None:
+        last = (db.query(func.max(models.CardHistory.id)).scalar() or 0) + count
+        db.execute(
+            text("INSERT INTO sqlite_sequence (name, seq) VALUES ('card_history', :seq)"),
+            {"seq": last},
+        )
+    return list(range(last - count + 1, last + 1))
+
+
+def _insert(db: Session, rows: list[dict]) -> None:
+    # Core-Insert auf die Tabelle: ein executemany über alle Zeilen (das
+    # ORM-Bulk-Insert würde nach gesetzten Spalten gruppieren)
+    db.execute(insert(models.CardHistory.__table__), rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session: Session) -> None:
+    if writer is None:
+        rows = session.info.pop(_PENDING_ROWS, None)
+        if rows:
+            _insert(session, rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    rows = session.info.pop(_PENDING_ROWS, None)
+    if rows and writer is not None:
+        writer.enqueue(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_ROWS, None)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class HistoryWriter:
+    """
+    Write-Behind-Queue pro Prozess. Dateien im Spool-Verzeichnis:
+
+    <pid>.journal        laufendes Journal dieses Prozesses
+    <pid>-<ns>.batch     versiegelter Stapel, wartet auf das INSERT
+    <pid>-<ns>.<n>.batch derselbe nach n fehlgeschlagenen Versuchen
+    *.inflight-<pid>     Stapel, den Prozess <pid> gerade schreibt
+    <pid>-<ns>.failed    beiseitegelegt (siehe MAX_BATCH_ATTEMPTS)
+    """
+
+    def __init__(self, spool_dir: str, batch_size: int, flush_seconds: float) -> None:
+        self.spool_dir = Path(spool_dir)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def _journal(self) -> Path:
+        return self.spool_dir / f"{os.getpid()}.journal"
+
+    def start(self) -> None:
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._recover()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def enqueue(self, rows: list[dict]) -> None:
+        lines = "".join(json.dumps(row, default=datetime.isoformat) + "\n" for row in rows)
+        with self._lock:
+            with self._journal.open("a", encoding="utf-8") as f:
+                f.write(lines)
+                if settings.history_fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.pending += len(rows)
+            if self.pending >= self.batch_size:
+                self._wakeup.set()
+
+    def flush(self) -> None:
+        """Versiegelt das Journal und schreibt alle offenen Stapel."""
+        with self._lock:
+            if self.pending:
+                self._journal.rename(self.spool_dir / f"{os.getpid()}-{time.time_ns()}.batch")
+                self.pending = 0
+
+        for batch in sorted(self.spool_dir.glob("*.batch")):
+            inflight = batch.with_name(f"{batch.name}.inflight-{os.getpid()}")
+            try:
+                batch.rename(inflight)
+            except FileNotFoundError:
+                continue  # anderer Worker war schneller
+            try:
+                self._write(inflight)
+            except (exc.IntegrityError, exc.DataError, ValueError):
+                # Fehler in den Daten dieses Stapels: die übrigen nicht blockieren
+                self._failed(batch, inflight)
+                continue
+            except Exception:
+                # z.B. Datenbank nicht erreichbar: beim nächsten Flush erneut
+                logger.exception("history flush failed, keeping %s", batch.name)
+                inflight.rename(batch)
+                return
+            inflight.unlink()
+
+    def _failed(self, batch: Path, inflight: Path) -> None:
+        name, _, attempts = batch.name.removesuffix(".batch").partition(".")
+        attempts = int(attempts or 0) + 1
+        if attempts < MAX_BATCH_ATTEMPTS:
+            logger.exception("history batch %s failed (attempt %d)", name, attempts)
+            inflight.rename(batch.with_name(f"{name}.{attempts}.batch"))
+        else:
+            logger.exception("history batch %s failed %d times, set aside", name, attempts)
+            inflight.rename(batch.with_name(f"{name}.failed"))
+
+    def _write(self, path: Path) -> None:
+        rows = []
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                if not line.endswith("\n"):
+                    # Abgebrochene letzte Zeile (Absturz beim Anhängen)
+                    logger.warning("skipping truncated line in %s", path.name)
+                    continue
+                row = json.loads(line)
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+                rows.append(row)
+        if not rows:
+            return
+        db = SessionLocal()
+        try:
+            # Karten, die seit dem Commit endgültig gelöscht wurden: ihre
+            # Einträge ins Archiv statt als verwaiste Zeilen (bzw. FK-Fehler)
+            card_ids = {row["card_id"] for row in rows}
+            existing = {
+                card_id
+                for (card_id,) in db.query(models.Card.id).filter(models.Card.id.in_(card_ids))
+            }
+            orphaned = [row for row in rows if row["card_id"] not in existing]
+            rows = [row for row in rows if row["card_id"] in existing]
+            if rows:
+                _insert(db, rows)
+            if orphaned:
+                for row, row_id in zip(orphaned, allocate_ids(db, len(orphaned))):
+                    row["id"] = row_id
+                retention.archive.write(db, orphaned)
+            db.commit()
+        finally:
+            db.close()
+
+    def _recover(self) -> None:
+        """Übernimmt liegengebliebene Dateien abgestürzter Prozesse."""
+        for journal in self.spool_dir.glob("*.journal"):
+            pid = int(journal.stem)
+            if pid == os.getpid() or not _pid_alive(pid):
+                journal.rename(self.spool_dir / f"{pid}-{time.time_ns()}.batch")
+        for inflight in self.spool_dir.glob("*.batch.inflight-*"):
+            pid = int(inflight.name.rsplit("-", 1)[1])
+            if not _pid_alive(pid):
+                inflight.rename(inflight.with_name(inflight.name.split(".inflight-")[0]))
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("history flush failed")
+
+
+def create_writer(mode: str = settings.history_mode) -> Optional[HistoryWriter]:
+    if mode == "inline":
+        return None
+    if mode == "queue":
+        return HistoryWriter(
+            spool_dir=settings.history_spool_dir,
+            batch_size=settings.history_batch_size,
+            flush_seconds=settings.history_flush_seconds,
+        )
+    raise ValueError(f"Unknown HISTORY_MODE: {mode}")
+
+
+writer = create_writer()
@@ -0,0 +1,239 @@
+"""
+Index-Audit: führt die Lesepfade der Routen gegen eine befüllte Datenbank
+aus, zeichnet die erzeugten SELECTs auf und prüft per EXPLAIN, dass keiner
+davon auf einen Full Table Scan zurückfällt; Keyset-Seiten (SORT_FREE)
+dürfen außerdem keinen Sortierschritt brauchen. Geprüft werden die Aufrufe,
+die die Routen tatsächlich machen (meist as_rows=True, dazu die
+ETag-Abfragen); tests/test_index_audit.py führt das Audit bei jedem
+Testlauf aus.
+
+Aufruf (Exit-Code 1 bei Fund):
+
+    python -m app.index_audit [DATABASE_URL]
+
+Ohne URL wird eine temporäre SQLite-Datenbank verwendet. Bei einer
+echten Datenbank läuft alles in einer Transaktion, die am Ende
+zurückgerollt wird.
+"""
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from . import analytics, changes, crud, models, schemas, search, security, transfer
+
+SEED_BOARDS = 3
+SEED_COLUMNS_PER_BOARD = 4
+SEED_CARDS_PER_COLUMN = 25
+
+
+
+def _next_page(fn: Callable[..., tuple], db: Session, **kwargs):
+    """Zweite Seite einer Keyset-Abfrage (prüft den Pfad mit Cursor)."""
+    _, cursor = fn(db, limit=2, **kwargs)
+    return fn(db, cursor=cursor, limit=20, **kwargs)
+
+
+# Diese Lesepfade werden geprüft: (Route bzw. Name, Funktion(db, ids)).
+# GET /boards/, /columns/ und /users/ lesen bewusst ganze Tabellen und
+# fehlen deshalb.
+AUDITED_QUERIES: list[tuple[str, Callable[[Session, dict], object]]] = [
+    ("ETag /boards/", lambda db, ids: changes.list_version(db, changes.BOARDS_LIST)),
+    (
+        "GET /boards/{id}/full",
+        lambda db, ids: crud.get_board_full(db, ids["board"], as_rows=True),
+    ),
+    (
+        "GET /columns/?board_id",
+        lambda db, ids: crud.get_columns_by_board(db, ids["board"], as_rows=True),
+    ),
+    ("ETag /columns/?board_id", lambda db, ids: changes.current_cursor(db, ids["board"])),
+    (
+        "GET /columns/{id}/cards",
+        lambda db, ids: crud.get_cards_by_column(db, ids["column"], as_rows=True),
+    ),
+    ("ETag /columns/{id}/cards", lambda db, ids: changes.column_cursor(db, ids["column"])),
+    ("GET /cards/", lambda db, ids: _next_page(crud.get_cards, db, as_rows=True)),
+    (
+        "GET /cards/?board_id",
+        lambda db, ids: _next_page(crud.get_cards, db, board_id=ids["board"], as_rows=True),
+    ),
+    (
+        "GET /cards/?column_id",
+        lambda db, ids: _next_page(crud.get_cards, db, column_id=ids["column"], as_rows=True),
+    ),
+    (
+        "GET /cards/?assignee_id",
+        lambda db, ids: _next_page(crud.get_cards, db, assignee_id=ids["user"], as_rows=True),
+    ),
+    (
+        "GET /cards/{id}/history",
+        lambda db, ids: _next_page(crud.get_card_history, db, card_id=ids["card"]),
+    ),
+    (
+        "GET /boards/{id}/activity",
+        lambda db, ids: _next_page(crud.get_board_activity, db, board_id=ids["board"]),
+    ),
+    (
+        "GET /boards/{id}/activity?user_id",
+        lambda db, ids: crud.get_board_activity(db, ids["board"], user_id=ids["user"]),
+    ),
+    ("GET /boards/{id}/changes", lambda db, ids: changes.get_changes(db, ids["board"], since=1)),
+    ("GET /boards/{id}/metrics", lambda db, ids: analytics.board_metrics(db, ids["board"], 30)),
+    (
+        "GET /search",
+        lambda db, ids: _next_page(crud.search_cards, db, q="karte", as_rows=True),
+    ),
+    (
+        "GET /search?board_id",
+        lambda db, ids: crud.search_cards(db, "kar", board_id=ids["board"], limit=20, as_rows=True),
+    ),
+    ("GET /users/{id}/cards", lambda db, ids: crud.get_assigned_cards(db, ids["user"], limit=20)),
+    (
+        "GET /users/{id}/cards?due=soon",
+        lambda db, ids: crud.get_assigned_cards(db, ids["user"], due="soon", limit=20),
+    ),
+    ("GET /boards/{id}/export", lambda db, ids: list(transfer.records(db, ids["board"]))),
+]
+
+# Keyset-Seiten müssen in Indexreihenfolge lesen: ein Sortierschritt
+# würde alle Treffer des Filters lesen, nicht nur limit + 1
+SORT_FREE = {
+    "GET /cards/",
+    "GET /cards/?board_id",
+    "GET /cards/?column_id",
+    "GET /cards/?assignee_id",
+    "GET /users/{id}/cards",
+    "GET /users/{id}/cards?due=soon",
+}
+
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+_SQLITE_SUBQUERY = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (\w+)$")
+
+
+def seed(db: Session) -> dict:
+    user = crud.create_user(
+        db,
+        schemas.UserCreate(name="audit", password="audit"),
+        password_hash=security.pwd_context.hash("audit"),
+    )
+    ids = {"user": user.id}
+    due = datetime.utcnow()
+    for b in range(SEED_BOARDS):
+        board = crud.create_board(db, schemas.BoardCreate(name=f"Board {b}"))
+        ids["board"] = board.id
+        for c in range(SEED_COLUMNS_PER_BOARD):
+            column = crud.create_column(
+                db,
+                schemas.ColumnCreate(title=f"Spalte {c}", position=c, board_id=board.id),
+            )
+            ids["column"] = column.id
+            for n in range(SEED_CARDS_PER_COLUMN):
+                card = crud.create_card(
+                    db,
+                    schemas.CardCreate(
+                        title=f"Karte {n}",
+                        column_id=column.id,
+                        assignee_id=user.id if n % 2 else None,
+                        due_date=due + timedelta(days=n),
+                    ),
+                    user_id=user.id,
+                )
+                ids["card"] = card.id
+    crud.update_card(db, ids["card"], schemas.CardUpdate(title="geändert"), user_id=user.id)
+    return ids
+
+
+def explain(conn: Connection, statement: str, parameters) -> list[str]:
+    """Liefert die Tabellen, die der Plan vollständig scannt."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        details = [row[-1] for row in rows]
+        # Scans über Unterabfragen (z.B. die Suchtreffer) sind keine Tabellen-Scans
+        subqueries = {m.group(1) for d in details if (m := _SQLITE_SUBQUERY.match(d))}
+        return [
+            m.group(1)
+            for d in details
+            if (m := _SQLITE_FULL_SCAN.match(d)) and m.group(1) not in subqueries
+        ]
+
+    rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+    plan = "\n".join(row[0] for row in rows)
+    return re.findall(r"Seq Scan on (\w+)", plan)
+
+
+def sorts(conn: Connection, statement: str, parameters) -> bool:
+    """True, wenn der Plan für ORDER BY einen eigenen Sortierschritt braucht."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        return any(row[-1] == "USE TEMP B-TREE FOR ORDER BY" for row in rows)
+
+    rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+    return any(re.match(r"\s*(->\s*)?Sort\b", row[0]) for row in rows)
+
+
+def run(url: str) -> list[str]:
+    engine = create_engine(url)
+    problems = []
+
+    with engine.connect() as conn:
+        outer = conn.begin()
+        try:
+            models.Base.metadata.create_all(bind=conn)
+            search.index.create(conn)
+            db = Session(bind=conn, join_transaction_mode="create_savepoint")
+            ids = seed(db)
+
+            if conn.dialect.name == "postgresql":
+                conn.exec_driver_sql("ANALYZE")
+                # Kleine Seed-Tabellen würde Postgres sonst ohnehin scannen;
+                # so zeigt sich, ob überhaupt ein Index nutzbar ist.
+                conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+            for name, fn in AUDITED_QUERIES:
+                captured = []
+
+                def capture(conn_, cursor, statement, parameters, context, executemany):
+                    if statement.lstrip().upper().startswith("SELECT"):
+                        captured.append((statement, parameters))
+
+                db.expire_all()
+                event.listen(conn, "before_cursor_execute", capture)
+                try:
+                    fn(db, ids)
+                finally:
+                    event.remove(conn, "before_cursor_execute", capture)
+
+                for statement, parameters in captured:
+                    for table in explain(conn, statement, parameters):
+                        problems.append(f"{name}: full scan on {table}\n    {statement}")
+                    if name in SORT_FREE and sorts(conn, statement, parameters):
+                        problems.append(f"{name}: sort step\n    {statement}")
+            db.close()
+        finally:
+            outer.rollback()
+
+    engine.dispose()
+    return problems
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) > 1:
+        url = argv[1]
+    else:
+        url = f"sqlite:///{tempfile.mkdtemp()}/index_audit.db"
+
+    problems = run(url)
+    for problem in problems:
+        print(problem)
+    print(f"{len(AUDITED_QUERIES)} Lesepfade geprüft, {len(problems)} Probleme gefunden")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
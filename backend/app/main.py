@@ -1,18 +1,41 @@
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
 
-from fastapi import FastAPI, Depends, HTTPException, Header
+import anyio
+from fastapi import BackgroundTasks, FastAPI, Depends, HTTPException, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 
-from . import models, schemas, crud
-from .database import SessionLocal, engine
+from . import auth, cache, changes, crud_async, history, ranking, realtime, schemas, security, crud, transfer
+from .config import settings
+from .database import SessionLocal, engine, get_db, pool_status
+from .migrations import upgrade_schema
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .responses import FastJSONResponse, etag_matches, not_modified, weak_etag
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.migrate_on_startup:
+        # Tabellen / Indizes erstellen bzw. nachziehen
+        await run_in_threadpool(upgrade_schema, engine)
+    await realtime.hub.start()
+    if history.writer is not None:
+        history.writer.start()
+    yield
+    await realtime.hub.stop()
+    if history.writer is not None:
+        # Restliche History-Einträge noch schreiben
+        await run_in_threadpool(history.writer.stop)
+    security.hash_pool.shutdown()
 
-# Tabellen erstellen
-models.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Kanban API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 origins = [
@@ -29,160 +52,475 @@ app.add_middleware(
 )
 
 
-def get_db():
-    db = SessionLocal()
+# ---------- Bedingte Requests ----------
+
+
+async def conditional(
+    if_none_match: Optional[str],
+    version: int,
+    respond: Callable[[], Awaitable[Response]],
+) -> Response:
+    """
+    ETag aus der Version (z.B. seq des Änderungsprotokolls, vor den Daten
+    gelesen). Passt If-None-Match, gibt es 304, ohne respond() aufzurufen.
+    Version 0 heißt: keine Änderungen bekannt, dann ohne ETag.
+    """
+    if not version:
+        return await respond()
+    etag = weak_etag(version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response = await respond()
+    response.headers["ETag"] = etag
+    return response
+
+
+def expected_version(if_match: Optional[str]) -> Optional[int]:
+    """Version aus If-Match ("3", W/"3" oder 3); ohne Header None."""
+    if not if_match:
+        return None
     try:
-        yield db
-    finally:
-        db.close()
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must contain a version")
+
+
+def version_etag(response: Response, version: int) -> None:
+    response.headers["ETag"] = f'"{version}"'
+
+
+# ---------- Auth ----------
+
+
+async def identify(db: Session, token: str) -> auth.Identity:
+    """
+    Identität aus einem Token. Berechtigungen kommen aus dem Cache, nur
+    bei einem Miss wird der Benutzer geladen.
+    """
+    user_id = auth.verify_token(token)
+    identity = auth.permission_cache.get(user_id)
+    if identity is None:
+        user = await crud_async.get_user(db, user_id)
+        if not user:
+            raise auth.unauthorized()
+        identity = auth.Identity.from_user(user)
+        auth.permission_cache.put(identity)
+
+    if not identity.is_active:
+        raise HTTPException(status_code=403, detail="Account not activated by admin")
+    return identity
+
+
+def anonymous() -> None:
+    """Request ohne Token: 401, mit AUTH_ALLOW_ANONYMOUS None (alte Clients)."""
+    if not settings.auth_allow_anonymous:
+        raise auth.unauthorized("Not authenticated")
+    return None
+
+
+async def get_identity(
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+) -> Optional[auth.Identity]:
+    """Identität aus "Authorization: Bearer <token>"."""
+    if not authorization:
+        return anonymous()
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise auth.unauthorized()
+    return await identify(db, token)
+
+
+async def get_stream_identity(
+    access_token: Optional[str] = Query(None),
+    authorization: Optional[str] = Header(None),
+    # Session vor dem Streamen schließen, nicht erst am Ende der Verbindung
+    db: Session = Depends(get_db, scope="function"),
+) -> Optional[auth.Identity]:
+    """Wie get_identity; EventSource kann keine Header setzen, daher auch ?access_token=."""
+    if access_token:
+        return await identify(db, access_token)
+    return await get_identity(authorization, db)
+
+
+def require(permission: str, identity_from: Callable = get_identity):
+    """Dependency: Token nötig (siehe anonymous), `permission` muss gesetzt sein."""
+
+    async def check(identity: Optional[auth.Identity] = Depends(identity_from)):
+        if identity is not None and not identity.allows(permission):
+            raise HTTPException(status_code=403, detail="Not permitted")
+        return identity
+
+    return check
+
+
+def acting_user_id(identity: Optional[auth.Identity], x_user_id: Optional[int]) -> Optional[int]:
+    # Token hat Vorrang vor dem (ungeprüften) x-user-id Header
+    return identity.user_id if identity is not None else x_user_id
 
 
 # ---------- Boards ----------
 
 
-@app.post("/boards/", response_model=schemas.Board)
-def create_board(board: schemas.BoardCreate, db: Session = Depends(get_db)):
-    return crud.create_board(db, board)
+@app.post("/boards/", response_model=schemas.Board, dependencies=[Depends(require("can_edit"))])
+async def create_board(board: schemas.BoardCreate, db: Session = Depends(get_db)):
+    return await crud_async.create_board(db, board)
 
 
-@app.get("/boards/", response_model=List[schemas.Board])
-def read_boards(db: Session = Depends(get_db)):
-    return crud.get_boards(db)
+@app.get(
+    "/boards/",
+    response_model=List[schemas.Board],
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_boards(
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+):
+    # Schnellpfad: Tupel statt ORM-Objekte, ohne Validierung pro Zeile;
+    # die fertigen Bytes liegen im Response-Cache (siehe cache.py)
+    return await conditional(
+        if_none_match,
+        await crud_async.list_version(db, changes.BOARDS_LIST),
+        lambda: cache.response_cache.json(
+            "boards", "boards", lambda: crud_async.get_boards(db, as_rows=True)
+        ),
+    )
 
 
-@app.get("/boards/{board_id}", response_model=schemas.Board)
-def read_board(board_id: int, db: Session = Depends(get_db)):
-    db_board = db.query(models.Board).filter(models.Board.id == board_id).first()
+@app.get(
+    "/boards/{board_id}",
+    response_model=schemas.Board,
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_board(board_id: int, db: Session = Depends(get_db)):
+    db_board = await crud_async.get_board(db, board_id)
     if not db_board:
         raise HTTPException(status_code=404, detail="Board not found")
     return db_board
 
 
-@app.patch("/boards/{board_id}", response_model=schemas.Board)
-def update_board(board_id: int, board: schemas.BoardUpdate, db: Session = Depends(get_db)):
-    return crud.update_board(db, board_id, board)
+@app.get(
+    "/boards/{board_id}/full",
+    response_model=schemas.BoardFull,
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_board_full(board_id: int, db: Session = Depends(get_db)):
+    board = await crud_async.get_board_full(db, board_id, as_rows=True)
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    return FastJSONResponse(board)
+
+
+@app.get(
+    "/boards/{board_id}/changes",
+    response_model=schemas.BoardChanges,
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_board_changes(
+    board_id: int,
+    since: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    return await crud_async.get_changes(db, board_id, since)
+
+
+@app.get(
+    "/boards/{board_id}/metrics",
+    response_model=schemas.BoardMetrics,
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_board_metrics(
+    board_id: int,
+    days: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_db),
+):
+    # Cumulative Flow, WIP, Lead-/Cycle-Time (siehe analytics.py); der
+    # Cache wird mit jeder Änderung am Board ungültig
+    if await crud_async.get_board(db, board_id) is None:
+        raise HTTPException(status_code=404, detail="Board not found")
+    return await cache.response_cache.json(
+        cache.board_scope(board_id),
+        f"metrics:{days}",
+        lambda: crud_async.board_metrics(db, board_id, days),
+    )
+
+
+@app.get(
+    "/boards/{board_id}/events",
+    dependencies=[Depends(require("can_view", get_stream_identity))],
+)
+async def board_events(board_id: int):
+    # Server-Sent Events: Hinweis auf neue Änderungen, Daten via /changes
+    return StreamingResponse(
+        realtime.event_stream(board_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.patch(
+    "/boards/{board_id}",
+    response_model=schemas.Board,
+    dependencies=[Depends(require("can_edit"))],
+)
+async def update_board(board_id: int, board: schemas.BoardUpdate, db: Session = Depends(get_db)):
+    return await crud_async.update_board(db, board_id, board)
+
+
+@app.delete("/boards/{board_id}", status_code=204, dependencies=[Depends(require("can_delete"))])
+async def delete_board(board_id: int, db: Session = Depends(get_db)):
+    # Spalten, Karten und History per Bulk-DELETE (bzw. Papierkorb)
+    if not await crud_async.delete_board(db, board_id):
+        raise HTTPException(status_code=404, detail="Board not found")
+    return None
+
+
+# ---------- Export / Import ----------
+
+
+def request_chunks(request: Request):
+    """Request-Body als synchroner Iterator, für Code im Threadpool."""
+    stream = request.stream()
+    while True:
+        try:
+            yield anyio.from_thread.run(stream.__anext__)
+        except StopAsyncIteration:
+            return
+
+
+@app.get("/boards/{board_id}/export", dependencies=[Depends(require("can_view"))])
+async def export_board(
+    board_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+):
+    # Gestreamt mit eigener Session, siehe transfer.py
+    if await crud_async.get_board(db, board_id) is None:
+        raise HTTPException(status_code=404, detail="Board not found")
+    return StreamingResponse(
+        transfer.export(board_id, format),
+        media_type=transfer.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="board-{board_id}.{format}"'},
+    )
+
+
+@app.post("/boards/import", response_model=schemas.ImportResult, status_code=201)
+async def import_board(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    x_user_id: Optional[int] = Header(None),
+    identity: Optional[auth.Identity] = Depends(require("can_edit")),
+):
+    """Legt aus einem Export (Request-Body, NDJSON oder CSV) ein neues Board an."""
+    return await run_in_threadpool(
+        transfer.import_board,
+        request_chunks(request),
+        format,
+        acting_user_id(identity, x_user_id),
+    )
 
 
 # ---------- Users ----------
 
 
 @app.post("/users/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    return crud.create_user(db, user)
+async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    password_hash = await security.hash_password(user.password)
+    return await crud_async.create_user(db, user, password_hash)
 
 
-@app.get("/users/", response_model=List[schemas.User])
-def read_users(db: Session = Depends(get_db)):
-    return crud.get_users(db)
+@app.get("/users/", response_model=List[schemas.User], dependencies=[Depends(require("can_view"))])
+async def read_users(db: Session = Depends(get_db)):
+    return await cache.response_cache.json(
+        "users", "users", lambda: crud_async.get_users(db, as_rows=True)
+    )
 
 
-@app.post("/login", response_model=schemas.User)
-def login(data: schemas.LoginRequest, db: Session = Depends(get_db)):
-    user = crud.authenticate_user(db, data.name, data.password)
+@app.post("/login", response_model=schemas.LoginResult)
+async def login(data: schemas.LoginRequest, db: Session = Depends(get_db)):
+    user = await crud_async.get_user_by_name(db, data.name)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    valid, new_hash = await security.verify_password(data.password, user.password_hash)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Kostenparameter geändert: Hash transparent erneuern
+        await crud_async.update_password_hash(db, user.id, new_hash)
+
     if not user.is_active:
         # Benutzer existiert, aber noch nicht vom Admin freigeschaltet
         raise HTTPException(status_code=403, detail="Account not activated by admin")
 
+    auth.permission_cache.put(auth.Identity.from_user(user))
+    user.access_token = auth.issue_token(user.id)
     return user
 
 
-@app.patch("/users/{user_id}", response_model=schemas.User)
-def update_user(
+@app.patch(
+    "/users/{user_id}",
+    response_model=schemas.User,
+    dependencies=[Depends(require("is_admin"))],
+)
+async def update_user(
     user_id: int,
     data: schemas.UserUpdate,
     db: Session = Depends(get_db),
 ):
-    db_user = crud.update_user(db, user_id, data)
+    db_user = await crud_async.update_user(db, user_id, data)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 
+@app.get(
+    "/users/{user_id}/cards",
+    response_model=schemas.AssignedCardPage,
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_assigned_cards(
+    user_id: int,
+    due: Optional[str] = Query(None, pattern="^(overdue|soon)$"),
+    soon_days: int = Query(7, ge=1, le=365),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """Zugewiesene Karten über alle Boards, nach Fälligkeit (ohne Datum zuletzt)."""
+    if await crud_async.get_user(db, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    cards, next_cursor = await crud_async.get_assigned_cards(
+        db, user_id, due=due, soon_days=soon_days, cursor=cursor, limit=limit
+    )
+    return FastJSONResponse({"items": cards, "next_cursor": next_cursor})
+
+
 # 🔐 Passwort ändern (User selbst, nach Login)
 @app.post("/users/{user_id}/change_password", response_model=schemas.User)
-def change_password(
+async def change_password(
     user_id: int,
     data: schemas.UserPasswordChange,
     db: Session = Depends(get_db),
+    identity: Optional[auth.Identity] = Depends(get_identity),
 ):
-    # Aktuell kein serverseitiger Admin-/Identity-Check,
-    # das regeln wir vorerst im Frontend.
-    return crud.change_user_password(
+    # Mit Token: nur das eigene Passwort (oder als Admin)
+    if identity is not None and identity.user_id != user_id and not identity.is_admin:
+        raise HTTPException(status_code=403, detail="Not permitted")
+    password_hash = await security.hash_password(data.new_password)
+    return await crud_async.change_user_password(
         db,
         user_id=user_id,
-        new_password=data.new_password,
+        password_hash=password_hash,
     )
 
 
 # 🔐 Passwort-Reset durch Admin (temporäres Passwort, must_change_password = True)
-@app.post("/users/{user_id}/reset_password", response_model=schemas.User)
-def reset_password(
+@app.post(
+    "/users/{user_id}/reset_password",
+    response_model=schemas.User,
+    dependencies=[Depends(require("is_admin"))],
+)
+async def reset_password(
     user_id: int,
     data: schemas.UserPasswordReset,
     db: Session = Depends(get_db),
 ):
-    # Aktuell kein harter Admin-Check auf Backend-Seite,
-    # Frontend sorgt dafür, dass nur Admins diesen Button sehen.
-    return crud.admin_reset_password(
+    # Admin-Check per Token (siehe require)
+    password_hash = await security.hash_password(data.new_password)
+    return await crud_async.admin_reset_password(
         db,
         user_id=user_id,
-        new_password=data.new_password,
+        password_hash=password_hash,
     )
 
 
 # ---------- Columns ----------
 
 
-@app.post("/columns/", response_model=schemas.Column)
-def create_column(column: schemas.ColumnCreate, db: Session = Depends(get_db)):
-    board = db.query(models.Board).filter(models.Board.id == column.board_id).first()
+@app.post("/columns/", response_model=schemas.Column, dependencies=[Depends(require("can_edit"))])
+async def create_column(column: schemas.ColumnCreate, db: Session = Depends(get_db)):
+    board = await crud_async.get_board(db, column.board_id)
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
 
-    return crud.create_column(db, column)
+    return await crud_async.create_column(db, column)
+
+
+@app.get(
+    "/boards/{board_id}/columns",
+    response_model=List[schemas.Column],
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_columns_by_board(
+    board_id: int,
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+):
+    async def load():
+        board = await crud_async.get_board(db, board_id)
+        if not board:
+            raise HTTPException(status_code=404, detail="Board not found")
+        return await crud_async.get_columns_by_board(db, board_id=board_id, as_rows=True)
+
+    return await conditional(
+        if_none_match,
+        await crud_async.current_cursor(db, board_id),
+        lambda: cache.response_cache.json(cache.board_scope(board_id), "columns", load),
+    )
 
 
-@app.get("/boards/{board_id}/columns", response_model=List[schemas.Column])
-def read_columns_by_board(board_id: int, db: Session = Depends(get_db)):
-    board = db.query(models.Board).filter(models.Board.id == board_id).first()
+@app.put(
+    "/boards/{board_id}/column-order",
+    response_model=List[schemas.Column],
+    dependencies=[Depends(require("can_edit"))],
+)
+async def reorder_columns(
+    board_id: int,
+    order: schemas.ColumnOrder,
+    db: Session = Depends(get_db),
+):
+    board = await crud_async.get_board(db, board_id)
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
 
-    return crud.get_columns_by_board(db, board_id=board_id)
+    return await crud_async.reorder_columns(db, board_id, order.column_ids)
 
 
-@app.get("/columns/", response_model=List[schemas.Column])
-def read_all_columns(db: Session = Depends(get_db)):
-    return db.query(models.KanbanColumn).order_by(models.KanbanColumn.position).all()
+@app.get(
+    "/columns/",
+    response_model=List[schemas.Column],
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_all_columns(db: Session = Depends(get_db)):
+    return FastJSONResponse(await crud_async.get_all_columns(db, as_rows=True))
 
 
-@app.patch("/columns/{column_id}", response_model=schemas.Column)
-def update_column(
+@app.patch(
+    "/columns/{column_id}",
+    response_model=schemas.Column,
+    dependencies=[Depends(require("can_edit"))],
+)
+async def update_column(
     column_id: int,
     column_data: schemas.ColumnUpdate,
+    response: Response,
     db: Session = Depends(get_db),
+    if_match: Optional[str] = Header(None),
 ):
-    db_column = crud.update_column(db, column_id, column_data)
+    db_column = await crud_async.update_column(
+        db, column_id, column_data, expected_version=expected_version(if_match)
+    )
     if not db_column:
         raise HTTPException(status_code=404, detail="Column not found")
+    version_etag(response, db_column.version)
     return db_column
 
 
-@app.delete("/columns/{column_id}", status_code=204)
-def delete_column(column_id: int, db: Session = Depends(get_db)):
-    db_column = (
-        db.query(models.KanbanColumn)
-        .filter(models.KanbanColumn.id == column_id)
-        .first()
-    )
-    if not db_column:
+@app.delete("/columns/{column_id}", status_code=204, dependencies=[Depends(require("can_delete"))])
+async def delete_column(column_id: int, db: Session = Depends(get_db)):
+    if not await crud_async.delete_column(db, column_id):
         raise HTTPException(status_code=404, detail="Column not found")
-
-    db.delete(db_column)
-    db.commit()
     return None
 
 
@@ -190,81 +528,254 @@ def delete_column(column_id: int, db: Session = Depends(get_db)):
 
 
 @app.post("/cards/", response_model=schemas.Card)
-def create_card(
+async def create_card(
     card: schemas.CardCreate,
     db: Session = Depends(get_db),
     x_user_id: Optional[int] = Header(None),
+    identity: Optional[auth.Identity] = Depends(require("can_edit")),
 ):
-    column = (
-        db.query(models.KanbanColumn)
-        .filter(models.KanbanColumn.id == card.column_id)
-        .first()
-    )
+    column = await crud_async.get_column(db, card.column_id)
     if not column:
         raise HTTPException(status_code=404, detail="Column not found")
 
     # Optional: prüfen, ob assignee existiert
     if card.assignee_id is not None:
-        user = db.query(models.User).filter(models.User.id == card.assignee_id).first()
+        user = await crud_async.get_user(db, card.assignee_id)
         if not user:
             raise HTTPException(status_code=404, detail="Assignee not found")
 
     # History: user_id an crud weitergeben
-    return crud.create_card(db, card, user_id=x_user_id)
+    return await crud_async.create_card(
+        db,
+        card,
+        user_id=acting_user_id(identity, x_user_id),
+    )
 
 
-@app.get("/cards/", response_model=List[schemas.Card])
-def read_cards(db: Session = Depends(get_db)):
-    return db.query(models.Card).order_by(models.Card.created_at).all()
+@app.get("/cards/", response_model=schemas.CardPage, dependencies=[Depends(require("can_view"))])
+async def read_cards(
+    board_id: Optional[int] = None,
+    column_id: Optional[int] = None,
+    assignee_id: Optional[int] = None,
+    color: Optional[str] = None,
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    cards, next_cursor = await crud_async.get_cards(
+        db,
+        board_id=board_id,
+        column_id=column_id,
+        assignee_id=assignee_id,
+        color=color,
+        due_from=due_from,
+        due_to=due_to,
+        cursor=cursor,
+        limit=limit,
+        as_rows=True,
+    )
+    return FastJSONResponse({"items": cards, "next_cursor": next_cursor})
 
 
-@app.get("/columns/{column_id}/cards", response_model=List[schemas.Card])
-def read_cards_by_column(column_id: int, db: Session = Depends(get_db)):
-    return (
-        db.query(models.Card)
-        .filter(models.Card.column_id == column_id)
-        .order_by(models.Card.created_at)
-        .all()
+@app.get("/search", response_model=schemas.CardPage, dependencies=[Depends(require("can_view"))])
+async def search_cards(
+    q: str = Query(..., min_length=1, max_length=200),
+    board_id: Optional[int] = None,
+    assignee_id: Optional[int] = None,
+    color: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    cards, next_cursor = await crud_async.search_cards(
+        db,
+        q,
+        board_id=board_id,
+        assignee_id=assignee_id,
+        color=color,
+        cursor=cursor,
+        limit=limit,
+        as_rows=True,
     )
+    return FastJSONResponse({"items": cards, "next_cursor": next_cursor})
+
+
+@app.get(
+    "/columns/{column_id}/cards",
+    response_model=List[schemas.Card],
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_cards_by_column(
+    column_id: int,
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+):
+    async def load():
+        return FastJSONResponse(await crud_async.get_cards_by_column(db, column_id, as_rows=True))
+
+    return await conditional(if_none_match, await crud_async.column_cursor(db, column_id), load)
+
+
+def rebalance_column_ranks(column_id: int):
+    db = SessionLocal()
+    try:
+        crud.rebalance_column_ranks(db, column_id)
+    finally:
+        db.close()
 
 
 @app.patch("/cards/{card_id}", response_model=schemas.Card)
-def update_card(
+async def update_card(
     card_id: int,
     card_data: schemas.CardUpdate,
+    background_tasks: BackgroundTasks,
+    response: Response,
     db: Session = Depends(get_db),
     x_user_id: Optional[int] = Header(None),
+    if_match: Optional[str] = Header(None),
+    identity: Optional[auth.Identity] = Depends(require("can_edit")),
 ):
     # Optional: wenn assignee_id im Update, prüfen
     if card_data.assignee_id is not None:
-        user = db.query(models.User).filter(models.User.id == card_data.assignee_id).first()
+        user = await crud_async.get_user(db, card_data.assignee_id)
         if not user:
             raise HTTPException(status_code=404, detail="Assignee not found")
 
-    db_card = crud.update_card(db, card_id, card_data, user_id=x_user_id)
+    db_card = await crud_async.update_card(
+        db,
+        card_id,
+        card_data,
+        user_id=acting_user_id(identity, x_user_id),
+        expected_version=expected_version(if_match),
+    )
     if not db_card:
         raise HTTPException(status_code=404, detail="Card not found")
+    version_etag(response, db_card.version)
+
+    # Zu lange Ränge nach der Antwort neu verteilen
+    if ranking.needs_rebalance(db_card.rank):
+        background_tasks.add_task(rebalance_column_ranks, db_card.column_id)
     return db_card
 
 
 @app.delete("/cards/{card_id}", status_code=204)
-def delete_card(
+async def delete_card(
     card_id: int,
     db: Session = Depends(get_db),
     x_user_id: Optional[int] = Header(None),
+    identity: Optional[auth.Identity] = Depends(require("can_delete")),
 ):
-    db_card = db.query(models.Card).filter(models.Card.id == card_id).first()
+    """
+    Löscht die Karte. Mit DELETE_MODE=trash bleibt sie samt History im
+    Papierkorb; sonst wandert die History samt Lösch-Eintrag ins
+    History-Archiv (weiter über GET /cards/{id}/history abrufbar).
+    """
+    db_card = await crud_async.get_card(db, card_id)
     if not db_card:
         raise HTTPException(status_code=404, detail="Card not found")
 
     # History im crud löschen/loggen
-    crud.delete_card(db, card_id, user_id=x_user_id)
+    await crud_async.delete_card(db, card_id, user_id=acting_user_id(identity, x_user_id))
     return None
 
 
+# ---------- Batch ----------
+
+
+@app.post("/batch", response_model=schemas.BatchResponse)
+async def apply_batch(
+    batch: schemas.BatchRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    x_user_id: Optional[int] = Header(None),
+    identity: Optional[auth.Identity] = Depends(get_identity),
+):
+    """
+    Mehrere Karten- und Spaltenoperationen in einer Transaktion (alles
+    oder nichts), z.B. für Massenverschiebungen in der Triage.
+    """
+    if identity is not None:
+        for operation in batch.operations:
+            permission = "can_delete" if operation.op.startswith("delete_") else "can_edit"
+            if not identity.allows(permission):
+                raise HTTPException(status_code=403, detail="Not permitted")
+
+    results = await crud_async.apply_batch(
+        db,
+        batch.operations,
+        user_id=acting_user_id(identity, x_user_id),
+    )
+
+    # Zu lange Ränge nach der Antwort neu verteilen (wie bei PATCH /cards)
+    for column_id in {
+        result["card"].column_id
+        for result in results
+        if "card" in result and ranking.needs_rebalance(result["card"].rank)
+    }:
+        background_tasks.add_task(rebalance_column_ranks, column_id)
+    return {"results": results}
+
+
 # ---------- Card History ----------
 
 
-@app.get("/cards/{card_id}/history", response_model=List[schemas.CardHistory])
-def read_card_history(card_id: int, db: Session = Depends(get_db)):
-    return crud.get_card_history(db, card_id)
+@app.get(
+    "/cards/{card_id}/history",
+    response_model=schemas.CardHistoryPage,
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_card_history(
+    card_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    entries, next_cursor = await crud_async.get_card_history(
+        db, card_id, cursor=cursor, limit=limit
+    )
+    return {"items": entries, "next_cursor": next_cursor}
+
+
+@app.get(
+    "/boards/{board_id}/activity",
+    response_model=schemas.CardHistoryPage,
+    dependencies=[Depends(require("can_view"))],
+)
+async def read_board_activity(
+    board_id: int,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    field: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    entries, next_cursor = await crud_async.get_board_activity(
+        db,
+        board_id,
+        user_id=user_id,
+        action=action,
+        field=field,
+        since=since,
+        until=until,
+        cursor=cursor,
+        limit=limit,
+    )
+    return {"items": entries, "next_cursor": next_cursor}
+
+
+# ---------- Metrics ----------
+
+
+@app.get("/metrics/db-pool", dependencies=[Depends(require("is_admin"))])
+async def read_pool_metrics():
+    return pool_status()
+
+
+@app.get("/metrics/cache", dependencies=[Depends(require("is_admin"))])
+async def read_cache_metrics():
+    return cache.response_cache.metrics()
@@ -0,0 +1,117 @@
+"""
+Schema-Upgrade für bestehende Datenbanken (siehe upgrade_schema()).
+
+Läuft beim Start der App (MIGRATE_ON_STARTUP) oder einmalig vor dem
+Start mehrerer Worker:
+
+    python -m app.migrations
+"""
+import sys
+from typing import Callable
+
+from sqlalchemy import inspect, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import analytics, changes, consistency, crud, models, retention, search
+from .database import Base, engine
+
+
+def _backfill_card_ranks(db: Session) -> None:
+    column_ids = [
+        column_id
+        for (column_id,) in db.query(models.Card.column_id)
+        .filter(models.Card.rank.is_(None))
+        .distinct()
+    ]
+    for column_id in column_ids:
+        crud.rebalance_column_ranks(db, column_id)
+
+
+def _backfill_updated_at(model) -> Callable[[Session], None]:
+    def backfill(db: Session) -> None:
+        db.execute(
+            update(model)
+            .where(model.updated_at.is_(None))
+            .values(updated_at=model.created_at)
+        )
+        db.commit()
+
+    return backfill
+
+
+def _backfill_version(model) -> Callable[[Session], None]:
+    def backfill(db: Session) -> None:
+        db.execute(update(model.__table__).where(model.version.is_(None)).values(version=1))
+        db.commit()
+
+    return backfill
+
+
+# Nachträglich hinzugefügte Spalten, die für Bestandsdaten befüllt werden müssen
+BACKFILLS: dict[tuple[str, str], Callable[[Session], None]] = {
+    ("cards", "rank"): _backfill_card_ranks,
+    ("cards", "board_id"): consistency.repair,
+    ("cards", "updated_at"): _backfill_updated_at(models.Card),
+    ("columns", "updated_at"): _backfill_updated_at(models.KanbanColumn),
+    ("cards", "version"): _backfill_version(models.Card),
+    ("columns", "version"): _backfill_version(models.KanbanColumn),
+    ("cards", "history_archived_at"): retention.backfill_archived_at,
+}
+
+# Nachträglich hinzugefügte Tabellen, die aus Bestandsdaten befüllt werden
+TABLE_BACKFILLS: dict[str, Callable[[Session], None]] = {
+    "analytics_card_transitions": analytics.rebuild,
+    "list_versions": changes.seed_list_versions,
+}
+
+def upgrade_schema(engine: Engine) -> None:
+    """
+    Bringt eine bestehende Datenbank auf den Stand der Models.
+    create_all legt nur fehlende Tabellen an; Spalten und Indizes, die
+    später zu bestehenden Tabellen hinzugekommen sind, werden hier
+    nachgezogen (Spalten immer nullable, ggf. mit Backfill).
+    """
+    existing_tables = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.exec_driver_sql(
+                    f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'
+                )
+            added.append((table.name, column.name))
+
+        existing_indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
+
+    for key in added:
+        backfill = BACKFILLS.get(key)
+        if backfill:
+            with Session(bind=engine) as db:
+                backfill(db)
+    for name, backfill in TABLE_BACKFILLS.items():
+        if existing_tables and name not in existing_tables:
+            with Session(bind=engine) as db:
+                backfill(db)
+
+    search.upgrade(engine)
+
+
+def main(argv: list[str]) -> int:
+    upgrade_schema(engine)
+    print("Schema aktuell")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
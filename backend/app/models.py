@@ -1,6 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, Column, Integer, String, Text, Date, DateTime, ForeignKey, Boolean, Index, event
+from sqlalchemy.orm import backref, relationship
 from .database import Base
 
 
@@ -11,11 +11,15 @@ class Board(Base):
   name = Column(String, nullable=False)
   color = Column(String, nullable=True)
   created_at = Column(DateTime, default=datetime.utcnow)
+  deleted_at = Column(DateTime, nullable=True)          # Papierkorb, siehe trash.py
 
+  # Gelöscht wird per Bulk-DELETE (crud.delete_board), nicht über das ORM
   columns = relationship(
     "KanbanColumn",
     back_populates="board",
     cascade="all, delete-orphan",
+    passive_deletes=True,
+    order_by="KanbanColumn.position",
   )
 
 
@@ -47,15 +51,27 @@ class KanbanColumn(Base):
   title = Column(String, nullable=False)
   position = Column(Integer, default=0)
   created_at = Column(DateTime, default=datetime.utcnow)
+  updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+  version = Column(Integer, nullable=False, default=1)   # Optimistic Locking
+  deleted_at = Column(DateTime, nullable=True)
 
-  board_id = Column(Integer, ForeignKey("boards.id"), nullable=False)
+  board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
   color = Column(String, nullable=True)
 
+  # Board laden: Spalten eines Boards in Reihenfolge
+  __table_args__ = (
+    Index("ix_columns_board_id_position", "board_id", "position"),
+  )
+  # UPDATE ... WHERE id = ? AND version = ?, zählt version hoch
+  __mapper_args__ = {"version_id_col": version}
+
   board = relationship("Board", back_populates="columns")
   cards = relationship(
     "Card",
     back_populates="column",
     cascade="all, delete-orphan",
+    passive_deletes=True,
+    order_by="[Card.rank, Card.id]",
   )
 
 
@@ -68,20 +84,57 @@ class Card(Base):
   link = Column(String, nullable=True)
   due_date = Column(DateTime, nullable=True)
   created_at = Column(DateTime, default=datetime.utcnow)
+  updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+  version = Column(Integer, nullable=False, default=1)   # Optimistic Locking
+  deleted_at = Column(DateTime, nullable=True)
+  # Jüngster archivierter History-Eintrag; None = nichts im Archiv (retention.py)
+  history_archived_at = Column(DateTime, nullable=True)
 
   color = Column(String, nullable=True)         # Priorität / Label
-  column_id = Column(Integer, ForeignKey("columns.id"), nullable=False)
+  rank = Column(String, nullable=True)          # Reihenfolge in der Spalte, siehe ranking.py
+  column_id = Column(Integer, ForeignKey("columns.id", ondelete="CASCADE"), nullable=False)
+  # Kopie von columns.board_id, damit Board-Abfragen ohne Join auskommen
+  # (crud hält sie aktuell, Prüfung siehe consistency.py)
+  board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
 
   assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Zuweisung
   assignee = relationship("User", back_populates="cards_assigned")
 
   column = relationship("KanbanColumn", back_populates="cards")
 
+  __table_args__ = (
+    # Karten einer Spalte / Board-Snapshot
+    Index("ix_cards_column_id_created_at", "column_id", "created_at"),
+    # Kartenreihenfolge innerhalb einer Spalte
+    Index("ix_cards_column_id_rank", "column_id", "rank"),
+    # "Meine Karten" nach Fälligkeit (Keyset über due_date, id)
+    Index("ix_cards_assignee_id_due_date_id", "assignee_id", "due_date", "id"),
+    # GET /cards/?assignee_id=... (Keyset über created_at, id)
+    Index("ix_cards_assignee_id_created_at_id", "assignee_id", "created_at", "id"),
+    # Keyset-Pagination von GET /cards/
+    Index("ix_cards_created_at_id", "created_at", "id"),
+    # Karten eines Boards (Snapshot, GET /cards/?board_id=..., Aktivität)
+    Index("ix_cards_board_id_created_at_id", "board_id", "created_at", "id"),
+    # Endgültiges Löschen aus dem Papierkorb. Partiell: lebende Karten
+    # (deleted_at NULL) stehen nicht darin, sonst wählt SQLite den Index
+    # für "deleted_at IS NULL" statt des eigentlichen Filter-Index
+    Index(
+      "ix_cards_deleted_at_not_null",
+      "deleted_at",
+      sqlite_where=deleted_at.is_not(None),
+      postgresql_where=deleted_at.is_not(None),
+    ),
+    # ids gelöschter Karten nicht wiederverwenden: archivierte History
+    # hängt an der card_id
+    {"sqlite_autoincrement": True},
+  )
+  __mapper_args__ = {"version_id_col": version}
+
 class CardHistory(Base):
     __tablename__ = "card_history"
 
     id = Column(Integer, primary_key=True, index=True)
-    card_id = Column(Integer, ForeignKey("cards.id"), nullable=False)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     action = Column(String(50), nullable=False)      # z.B. "create", "update", "delete"
@@ -91,5 +144,115 @@ class CardHistory(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
-    card = relationship("Card", backref="history")
-    user = relationship("User", backref="card_history")
\ No newline at end of file
+    # Keyset-Pagination (created_at, id) absteigend: History einer Karte
+    # bzw. Aktivität eines Benutzers; rückwärts gelesene Range-Scans
+    __table_args__ = (
+        Index("ix_card_history_card_id_created_at_id", card_id, created_at, id),
+        Index("ix_card_history_user_id_created_at_id", user_id, created_at, id),
+        # Auswahl archivierbarer Zeilen (retention.py)
+        Index("ix_card_history_created_at", created_at),
+        # ids nicht wiederverwenden, siehe history.allocate_ids
+        {"sqlite_autoincrement": True},
+    )
+
+    card = relationship("Card", backref=backref("history", passive_deletes=True))
+    user = relationship("User", backref="card_history")
+
+
+class CardHistoryArchive(Base):
+    """
+    Kalte Ablage für History-Einträge jenseits der Aufbewahrungsfrist
+    (HISTORY_ARCHIVE=table, siehe retention.py). ids bleiben erhalten,
+    dienen aber nur der Sortierung; der Schlüssel ist archive_id.
+    Bewusst ohne ForeignKeys: archivierte Einträge überleben ihre Karte.
+    """
+    __tablename__ = "card_history_archive"
+
+    archive_id = Column(Integer, primary_key=True)
+    id = Column(Integer, nullable=False)
+    card_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    action = Column(String(50), nullable=False)
+    field = Column(String(50), nullable=True)
+    old_value = Column(Text, nullable=True)
+    new_value = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_card_history_archive_card_id_created_at_id", card_id, created_at, id),
+    )
+
+
+class ColumnDay(Base):
+    """
+    Zu- und Abgänge einer Spalte pro Tag (UTC), für Cumulative Flow und
+    WIP. Die Kartenzahl am Ende eines Tages ist die Summe bis dahin.
+    Bewusst ohne ForeignKey, Aufräumen siehe analytics.py.
+    """
+    __tablename__ = "analytics_column_days"
+
+    column_id = Column(Integer, primary_key=True, autoincrement=False)
+    day = Column(Date, primary_key=True)
+    arrivals = Column(Integer, nullable=False, default=0)
+    departures = Column(Integer, nullable=False, default=0)
+
+
+class CardTransition(Base):
+    """
+    Zeitpunkt, zu dem eine Karte eine Spalte betreten hat (die Erstellung
+    zählt mit). Grundlage für Lead- und Cycle-Time, siehe analytics.py.
+    """
+    __tablename__ = "analytics_card_transitions"
+
+    id = Column(Integer, primary_key=True)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), nullable=False)
+    # Bewusst ohne ForeignKey: Übergänge überleben gelöschte Spalten
+    column_id = Column(Integer, nullable=False)
+    entered_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_analytics_card_transitions_card_id_entered_at", card_id, entered_at),
+        # Fertige Karten: Eintritte in die letzte Spalte eines Boards
+        Index("ix_analytics_card_transitions_column_id_entered_at", column_id, entered_at),
+    )
+
+
+class Change(Base):
+    """
+    Änderungsprotokoll pro Board für die Delta-Synchronisation.
+    seq ist monoton steigend und dient Clients als Cursor.
+    """
+    __tablename__ = "changes"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    # Bewusst ohne ForeignKey: Tombstones bleiben auch nach dem Löschen gültig
+    board_id = Column(Integer, nullable=False)
+    entity = Column(String(20), nullable=False)      # "board", "column", "card"
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False)          # "upsert" oder "delete"
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_changes_board_id_seq", "board_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+
+class ListVersion(Base):
+    """
+    Versionszähler für Listen über alle Boards (ETag von GET /boards/).
+    Jede Änderung an einem Board erhöht ihn in ihrer Transaktion; die
+    Zeilensperre ordnet die Werte in Commit-Reihenfolge (anders als
+    changes.seq über mehrere Boards).
+    """
+    __tablename__ = "list_versions"
+
+    name = Column(String(20), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+event.listen(
+    ListVersion.__table__,
+    "after_create",
+    DDL("INSERT INTO list_versions (name, version) VALUES ('boards', 0)"),
+)
@@ -0,0 +1,55 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import HTTPException
+
+# Standard- und Maximalgröße einer Seite für alle Listen-Endpunkte
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Kodiert die Sortierschlüssel des letzten Elements einer Seite
+    als undurchsichtigen, URL-sicheren Cursor.
+    """
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    data = json.dumps(raw, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: Callable[[Any], Any]) -> tuple:
+    """
+    Gegenstück zu encode_cursor. `types` gibt pro Position an, wie der
+    Wert zurückgewandelt wird (z.B. datetime, int). None bleibt None.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("wrong cursor length")
+        return tuple(
+            None if value is None else _convert(t, value)
+            for t, value in zip(types, raw)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _convert(t: Callable[[Any], Any], value: Any) -> Any:
+    if t is datetime:
+        return datetime.fromisoformat(value)
+    return t(value)
+
+
+def split_page(rows: list, limit: int, key: Callable[[Any], Sequence[Any]]) -> tuple[list, Optional[str]]:
+    """
+    Erwartet limit + 1 geladene Zeilen. Liefert die Seite und den Cursor
+    für die nächste Seite (None, wenn es keine weitere gibt).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(key(page[-1]))
@@ -0,0 +1,93 @@
+"""
+Rang-Strings für die Kartenreihenfolge innerhalb einer Spalte.
+
+Ein Rang ist der Nachkommateil einer Zahl zur Basis 36 ("i" = 0.5).
+Ränge werden als normale Strings verglichen; damit das der numerischen
+Reihenfolge entspricht, endet ein Rang nie auf "0". Zwischen zwei Rängen
+lässt sich immer ein weiterer finden, ein Verschieben ändert also nur
+die verschobene Karte.
+"""
+from typing import Optional
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+# Breite, auf der beim Anhängen/Voranstellen hoch- bzw. runtergezählt wird
+STEP_WIDTH = 4
+
+# Ab dieser Länge wird die Spalte im Hintergrund neu durchnummeriert
+REBALANCE_LENGTH = 16
+
+
+def _digit(rank: Optional[str], i: int, default: int) -> int:
+    if rank is None or i >= len(rank):
+        return default
+    return DIGITS.index(rank[i])
+
+
+def _to_int(rank: str, width: int) -> int:
+    value = 0
+    for i in range(width):
+        value = value * BASE + _digit(rank, i, 0)
+    return value
+
+
+def _from_int(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, d = divmod(value, BASE)
+        digits.append(DIGITS[d])
+    return "".join(reversed(digits)).rstrip("0")
+
+
+def _midpoint(before: Optional[str], after: Optional[str]) -> str:
+    result = []
+    i = 0
+    while True:
+        lo = _digit(before, i, 0)
+        hi = _digit(after, i, BASE)
+        if hi - lo > 1:
+            result.append(DIGITS[(lo + hi) // 2])
+            return "".join(result)
+        result.append(DIGITS[lo])
+        if lo < hi:
+            # Ab hier ist die Obergrenze bereits unterschritten
+            after = None
+        i += 1
+
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """
+    Liefert einen Rang mit before < Rang < after.
+    None steht für "Anfang" bzw. "Ende" der Spalte.
+    """
+    if before is not None and after is not None and not before < after:
+        raise ValueError(f"invalid rank interval: {before!r} >= {after!r}")
+
+    # Anhängen / Voranstellen zählt auf fester Breite, damit Ränge beim
+    # wiederholten Einfügen am Rand nicht wachsen.
+    if before is not None and after is None:
+        value = _to_int(before, STEP_WIDTH) + 1
+        if value < BASE ** STEP_WIDTH:
+            return _from_int(value, STEP_WIDTH)
+    if before is None and after is not None:
+        value = _to_int(after, STEP_WIDTH)
+        if len(after) <= STEP_WIDTH:
+            value -= 1
+        if value > 0:
+            return _from_int(value, STEP_WIDTH)
+
+    return _midpoint(before, after)
+
+
+def spread_ranks(count: int) -> list[str]:
+    """Gleichmäßig verteilte, möglichst kurze Ränge für `count` Karten."""
+    width = 1
+    while BASE ** width <= count * BASE:
+        width += 1
+    spacing = BASE ** width // (count + 1)
+    return [_from_int(spacing * (i + 1), width) for i in range(count)]
+
+
+def needs_rebalance(rank: Optional[str]) -> bool:
+    return rank is not None and len(rank) >= REBALANCE_LENGTH
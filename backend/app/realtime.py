@@ -0,0 +1,194 @@
+"""
+Live-Updates pro Board über Server-Sent Events.
+
+Nach jedem Commit mit protokollierten Änderungen (siehe changes.py)
+entsteht ein kompaktes Event {board_id, seq, entity, op, ids}. Der
+Broker verteilt es an alle Worker, der BoardHub jedes Workers an die
+verbundenen Clients dieses Boards. Clients holen die eigentlichen Daten
+anschließend über GET /boards/{id}/changes?since=<cursor>.
+
+Broker (per REALTIME_BROKER):
+- "memory":   nur innerhalb des Prozesses (ein Worker, Tests)
+- "database": liest die changes-Tabelle mit; funktioniert über mehrere
+              uvicorn-Worker hinweg ohne zusätzliche Infrastruktur
+"""
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator, Callable, Optional
+
+from . import changes, models
+from .config import settings
+from .database import SessionLocal
+
+# Puffer pro verbundenem Client; läuft er voll, bekommt der Client "resync"
+SUBSCRIBER_QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15.0
+
+Deliver = Callable[[dict], None]
+
+
+class Broker:
+    """Schnittstelle zwischen den Workern. deliver() ist thread-sicher."""
+
+    async def start(self, deliver: Deliver) -> None:
+        self.deliver = deliver
+
+    def publish(self, event: dict) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        pass
+
+
+class InProcessBroker(Broker):
+    def publish(self, event: dict) -> None:
+        self.deliver(event)
+
+
+class DatabaseBroker(Broker):
+    """
+    Liest neue Zeilen der changes-Tabelle im Intervall nach. Jeder Worker
+    sieht so auch die Commits der anderen; publish() ist daher leer.
+    """
+
+    POLL_SECONDS = 0.5
+    BATCH_SIZE = 1000
+    # seq-Werte können auf Postgres boardübergreifend leicht außer
+    # Commit-Reihenfolge sichtbar werden; ein Stück zurückschauen
+    LOOKBACK = 100
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._last_seq = 0
+        self._seen: deque[int] = deque(maxlen=10 * self.BATCH_SIZE)
+
+    async def start(self, deliver: Deliver) -> None:
+        await super().start(deliver)
+        self._last_seq = await asyncio.to_thread(self._max_seq)
+        self._task = asyncio.create_task(self._run())
+
+    def publish(self, event: dict) -> None:
+        pass
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+    def _max_seq(self) -> int:
+        db = SessionLocal()
+        try:
+            return db.query(models.Change.seq).order_by(models.Change.seq.desc()).limit(1).scalar() or 0
+        finally:
+            db.close()
+
+    def _poll(self) -> list[models.Change]:
+        db = SessionLocal()
+        try:
+            return (
+                db.query(models.Change)
+                .filter(models.Change.seq > self._last_seq - self.LOOKBACK)
+                .order_by(models.Change.seq)
+                .limit(self.BATCH_SIZE + self.LOOKBACK)
+                .all()
+            )
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.POLL_SECONDS)
+            try:
+                rows = await asyncio.to_thread(self._poll)
+            except Exception:
+                continue
+            seen = set(self._seen)
+            for row in rows:
+                if row.seq in seen:
+                    continue
+                self._seen.append(row.seq)
+                self._last_seq = max(self._last_seq, row.seq)
+                self.deliver({
+                    "board_id": row.board_id,
+                    "seq": row.seq,
+                    "entity": row.entity,
+                    "op": row.op,
+                    "ids": [row.entity_id],
+                })
+
+
+class BoardHub:
+    """Verteilt Events innerhalb eines Workers an die Clients eines Boards."""
+
+    def __init__(self, broker: Broker) -> None:
+        self.broker = broker
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        changes.on_commit(self._on_commit)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await self.broker.start(self._deliver)
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+        self._loop = None
+
+    def _on_commit(self, events: list[dict]) -> None:
+        # Läuft im Thread des Requests, der committet hat
+        if self._loop is None:
+            return
+        for event in events:
+            self.broker.publish(event)
+
+    def _deliver(self, event: dict) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: dict) -> None:
+        for queue in self._subscribers.get(event["board_id"], ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Client kommt nicht hinterher: Puffer leeren, Resync anfordern
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"board_id": event["board_id"], "op": "resync"})
+
+    async def subscribe(self, board_id: int) -> AsyncIterator[dict]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(board_id, set()).add(queue)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield {}
+        finally:
+            subscribers = self._subscribers.get(board_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[board_id]
+
+
+def create_broker(name: str = settings.realtime_broker) -> Broker:
+    if name == "database":
+        return DatabaseBroker()
+    if name == "memory":
+        return InProcessBroker()
+    raise ValueError(f"Unknown REALTIME_BROKER: {name}")
+
+
+hub = BoardHub(create_broker())
+
+
+async def event_stream(board_id: int) -> AsyncIterator[str]:
+    """SSE-Stream eines Boards; leere Events werden zu Heartbeats."""
+    yield "retry: 3000\n\n"
+    async for event in hub.subscribe(board_id):
+        if not event:
+            yield ": heartbeat\n\n"
+            continue
+        event_id = f"id: {event['seq']}\n" if "seq" in event else ""
+        yield f"{event_id}event: {event['op']}\ndata: {json.dumps(event)}\n\n"
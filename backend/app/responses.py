@@ -0,0 +1,44 @@
+"""
+JSON-Antworten über orjson für die großen Listen- und Snapshot-Routen.
+
+Diese Routen liefern bereits fertige dicts (crud-Funktionen mit
+as_rows=True). Wird eine Response direkt zurückgegeben, überspringt
+FastAPI die Validierung gegen das response_model; das Schema dient dann
+nur noch der Dokumentation. orjson serialisiert datetime im selben
+ISO-Format wie Pydantic.
+
+Bedingte Requests: Listen-Routen senden ein schwaches ETag aus einer
+billigen Version und antworten auf ein passendes If-None-Match mit 304,
+ohne die Liste zu laden. Die Version muss jeder relevante Commit unter
+einer Sperre erhöhen: für Listen eines Boards die seq aus dem
+Änderungsprotokoll (Board-Sperre), für GET /boards/ list_versions.
+"""
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import Response
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def weak_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Schwacher Vergleich wie bei If-None-Match vorgesehen (W/ zählt nicht)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
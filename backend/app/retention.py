@@ -0,0 +1,379 @@
+"""
+Aufbewahrung der Karten-History: verdichten und archivieren.
+
+- compact(): Läufe aufeinanderfolgender Änderungen desselben Felds einer
+  Karte durch denselben Benutzer (Abstand höchstens
+  HISTORY_COMPACT_GAP_SECONDS) werden zu einem Eintrag zusammengefasst:
+  alter Wert vom ersten, neuer Wert und Zeitpunkt vom letzten Edit.
+  Einträge jünger als HISTORY_COMPACT_AFTER_HOURS bleiben unberührt.
+- archive_old_entries(): Einträge älter als HISTORY_RETENTION_DAYS wandern aus
+  card_history in die kalte Ablage (HISTORY_ARCHIVE):
+    "table": Tabelle card_history_archive
+    "files": gzip-komprimiertes NDJSON, eine Datei pro Kartenbereich;
+             zuletzt gelesene Dateien bleiben dekodiert im Speicher
+             (ARCHIVE_CACHED_BUCKETS), nach Karte gruppiert
+
+crud.get_card_history liest über beide Ebenen hinweg; das Archiv wird
+erst gefragt, wenn die aktuelle Seite aus card_history nicht voll wird
+und die Karte überhaupt archivierte Einträge hat (cards.history_archived_at).
+
+Aufruf (z.B. nächtlich per Cron):
+
+    python -m app.retention [compact|archive|all]
+"""
+import gzip
+import json
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import bindparam, delete, event, func, insert, tuple_, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+
+# Karten pro Durchgang beim Verdichten, Zeilen pro Durchgang beim Archivieren
+COMPACT_CARD_BATCH = 500
+ARCHIVE_ROW_BATCH = 1000
+
+# Karten pro Archivdatei (HISTORY_ARCHIVE=files)
+ARCHIVE_BUCKET_SIZE = 1000
+# Dekodierte Archivdateien im Speicher (pro Prozess)
+ARCHIVE_CACHED_BUCKETS = 16
+
+_PENDING_ROWS = "retention_pending_rows"
+
+_COLUMNS = ("id", "card_id", "user_id", "action", "field", "old_value", "new_value", "created_at")
+
+Key = tuple[datetime, int]
+
+
+def _row(entry) -> dict:
+    return {name: getattr(entry, name) for name in _COLUMNS}
+
+
+# ---------- Verdichten ----------
+
+
+def _runs(entries: list[models.CardHistory], gap: timedelta) -> list[list[models.CardHistory]]:
+    """Zerlegt die Edits eines Felds (chronologisch) in Läufe."""
+    runs: list[list[models.CardHistory]] = []
+    for entry in entries:
+        last = runs[-1][-1] if runs else None
+        if (
+            last is not None
+            and last.user_id == entry.user_id
+            and entry.created_at - last.created_at <= gap
+        ):
+            runs[-1].append(entry)
+        else:
+            runs.append([entry])
+    return runs
+
+
+def compact(db: Session, now: Optional[datetime] = None) -> int:
+    """Verdichtet Edit-Läufe; liefert die Anzahl entfernter Zeilen."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(hours=settings.history_compact_after_hours)
+    gap = timedelta(seconds=settings.history_compact_gap_seconds)
+    removed = 0
+    last_card_id = 0
+
+    while True:
+        card_ids = [
+            card_id
+            for (card_id,) in db.query(models.CardHistory.card_id)
+            .filter(models.CardHistory.card_id > last_card_id)
+            .distinct()
+            .order_by(models.CardHistory.card_id)
+            .limit(COMPACT_CARD_BATCH)
+        ]
+        if not card_ids:
+            break
+        last_card_id = card_ids[-1]
+
+        entries = (
+            db.query(models.CardHistory)
+            .filter(
+                models.CardHistory.card_id.in_(card_ids),
+                models.CardHistory.action == "update",
+                models.CardHistory.created_at < cutoff,
+            )
+            .order_by(
+                models.CardHistory.card_id,
+                models.CardHistory.field,
+                models.CardHistory.created_at,
+                models.CardHistory.id,
+            )
+            .all()
+        )
+        by_field: dict[tuple[int, str], list[models.CardHistory]] = {}
+        for entry in entries:
+            by_field.setdefault((entry.card_id, entry.field), []).append(entry)
+
+        updates, delete_ids = [], []
+        for field_entries in by_field.values():
+            for run in _runs(field_entries, gap):
+                if len(run) < 2:
+                    continue
+                # Der letzte Eintrag bleibt und übernimmt den ältesten Wert
+                updates.append({"_id": run[-1].id, "old_value": run[0].old_value})
+                delete_ids.extend(entry.id for entry in run[:-1])
+
+        if updates:
+            db.execute(
+                update(models.CardHistory.__table__)
+                .where(models.CardHistory.__table__.c.id == bindparam("_id"))
+                .values(old_value=bindparam("old_value")),
+                updates,
+            )
+            db.execute(delete(models.CardHistory).where(models.CardHistory.id.in_(delete_ids)))
+            removed += len(delete_ids)
+        db.commit()
+        db.expunge_all()
+
+    return removed
+
+
+# ---------- Archiv ----------
+
+
+class Archive(ABC):
+    """
+    Kalte Ablage für History-Einträge. Bewusst ohne Standardverhalten:
+    ein write(), das nichts tut, würde archivierte History verwerfen.
+    """
+
+    @abstractmethod
+    def write(self, db: Session, rows: list[dict]) -> None:
+        ...
+
+    @abstractmethod
+    def read(
+        self,
+        db: Session,
+        card_id: int,
+        before: Optional[Key],
+        limit: int,
+    ) -> list:
+        """Bis zu `limit` Einträge einer Karte vor `before`, neueste zuerst."""
+
+    @abstractmethod
+    def newest(self, db: Session) -> dict[int, datetime]:
+        """Jüngster archivierter Zeitpunkt je Karte (Backfill)."""
+
+
+class TableArchive(Archive):
+    def write(self, db: Session, rows: list[dict]) -> None:
+        db.execute(insert(models.CardHistoryArchive.__table__), rows)
+
+    def read(self, db, card_id, before, limit):
+        query = db.query(models.CardHistoryArchive).filter(
+            models.CardHistoryArchive.card_id == card_id
+        )
+        if before is not None:
+            query = query.filter(
+                tuple_(models.CardHistoryArchive.created_at, models.CardHistoryArchive.id)
+                < tuple_(*before)
+            )
+        return (
+            query.order_by(
+                models.CardHistoryArchive.created_at.desc(),
+                models.CardHistoryArchive.id.desc(),
+            )
+            .limit(limit)
+            .all()
+        )
+
+    def newest(self, db):
+        return dict(
+            db.query(models.CardHistoryArchive.card_id, func.max(models.CardHistoryArchive.created_at))
+            .group_by(models.CardHistoryArchive.card_id)
+            .all()
+        )
+
+
+class FileArchive(Archive):
+    """
+    gzip-NDJSON, eine Datei pro ARCHIVE_BUCKET_SIZE Karten. Neue Einträge
+    werden als weiteres gzip-Member angehängt. Wird nach dem Schreiben der
+    Datei das DELETE nicht mehr committed, landen Einträge doppelt in der
+    Datei; beim Dekodieren fallen Duplikate anhand der id weg.
+
+    read() dekodiert eine Datei nur einmal und hält sie, nach Karte
+    gruppiert und sortiert, in einem LRU-Cache. Ändert sich die Datei
+    (Größe oder mtime, auch durch andere Prozesse), wird sie neu gelesen.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        # Pfad -> ((Größe, mtime), {card_id: Zeilen, neueste zuerst})
+        self._buckets: OrderedDict[Path, tuple[tuple, dict[int, list[dict]]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, card_id: int) -> Path:
+        return self.directory / f"card_history-{card_id // ARCHIVE_BUCKET_SIZE:06d}.ndjson.gz"
+
+    def write(self, db: Session, rows: list[dict]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        by_path: dict[Path, list[dict]] = {}
+        for row in rows:
+            by_path.setdefault(self._path(row["card_id"]), []).append(row)
+        for path, path_rows in by_path.items():
+            with gzip.open(path, "at", encoding="utf-8") as f:
+                for row in path_rows:
+                    f.write(json.dumps(row, default=datetime.isoformat) + "\n")
+
+    def _decode(self, path: Path) -> dict[int, list[dict]]:
+        by_id: dict[int, dict] = {}
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+                by_id[row["id"]] = row
+        by_card: dict[int, list[dict]] = {}
+        for row in sorted(by_id.values(), key=lambda r: (r["created_at"], r["id"]), reverse=True):
+            by_card.setdefault(row["card_id"], []).append(row)
+        return by_card
+
+    def _bucket(self, path: Path) -> dict[int, list[dict]]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return {}
+        version = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._buckets.get(path)
+            if cached is not None and cached[0] == version:
+                self._buckets.move_to_end(path)
+                return cached[1]
+        by_card = self._decode(path)
+        with self._lock:
+            self._buckets[path] = (version, by_card)
+            self._buckets.move_to_end(path)
+            while len(self._buckets) > ARCHIVE_CACHED_BUCKETS:
+                self._buckets.popitem(last=False)
+        return by_card
+
+    def read(self, db, card_id, before, limit):
+        rows = self._bucket(self._path(card_id)).get(card_id, [])
+        if before is not None:
+            rows = [row for row in rows if (row["created_at"], row["id"]) < before]
+        # Nicht an eine Session gebunden, nur zur Ausgabe
+        return [models.CardHistory(**row) for row in rows[:limit]]
+
+    def newest(self, db):
+        newest: dict[int, datetime] = {}
+        for path in sorted(self.directory.glob("card_history-*.ndjson.gz")):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    created_at = datetime.fromisoformat(row["created_at"])
+                    if created_at > newest.get(row["card_id"], datetime.min):
+                        newest[row["card_id"]] = created_at
+        return newest
+
+
+def create_archive(name: str = settings.history_archive) -> Archive:
+    if name == "table":
+        return TableArchive()
+    if name == "files":
+        return FileArchive(settings.history_archive_dir)
+    raise ValueError(f"Unknown HISTORY_ARCHIVE: {name}")
+
+
+archive = create_archive()
+
+
+def archive_on_commit(db: Session, rows: list[dict]) -> None:
+    """
+    Schreibt Einträge (mit id) beim Commit direkt ins Archiv, z.B. die
+    History einer endgültig gelöschten Karte. Bei Rollback entfallen sie.
+    """
+    db.info.setdefault(_PENDING_ROWS, []).extend(rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session: Session) -> None:
+    rows = session.info.pop(_PENDING_ROWS, None)
+    if rows:
+        archive.write(session, rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_ROWS, None)
+
+
+def _mark_archived(db: Session, newest: dict[int, datetime]) -> None:
+    """Setzt cards.history_archived_at (Core-UPDATE, ohne version)."""
+    if not newest:
+        return
+    cards = models.Card.__table__
+    db.execute(
+        update(cards)
+        .where(cards.c.id == bindparam("_id"))
+        .values(history_archived_at=bindparam("archived_at")),
+        [{"_id": card_id, "archived_at": created_at} for card_id, created_at in newest.items()],
+    )
+
+
+def backfill_archived_at(db: Session) -> None:
+    """Watermark für Einträge, die schon vor der Spalte archiviert wurden."""
+    _mark_archived(db, archive.newest(db))
+    db.commit()
+
+
+def archive_old_entries(db: Session, now: Optional[datetime] = None) -> int:
+    """Verschiebt abgelaufene Einträge ins Archiv; liefert die Anzahl."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=settings.history_retention_days)
+    moved = 0
+
+    while True:
+        entries = (
+            db.query(models.CardHistory)
+            .filter(models.CardHistory.created_at < cutoff)
+            .order_by(models.CardHistory.created_at)
+            .limit(ARCHIVE_ROW_BATCH)
+            .all()
+        )
+        if not entries:
+            break
+        ids = [entry.id for entry in entries]
+        archive.write(db, [_row(entry) for entry in entries])
+        # Aufsteigend sortiert: der letzte Eintrag je Karte ist der jüngste
+        _mark_archived(db, {entry.card_id: entry.created_at for entry in entries})
+        db.execute(delete(models.CardHistory).where(models.CardHistory.id.in_(ids)))
+        db.commit()
+        db.expunge_all()
+        moved += len(ids)
+
+    return moved
+
+
+def main(argv: list[str]) -> int:
+    command = argv[1] if len(argv) > 1 else "all"
+    if command not in ("compact", "archive", "all"):
+        print(__doc__)
+        return 2
+
+    db = SessionLocal()
+    try:
+        if command in ("compact", "all"):
+            print(f"{compact(db)} History-Einträge verdichtet")
+        if command in ("archive", "all"):
+            print(f"{archive_old_entries(db)} History-Einträge archiviert")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,7 +1,7 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Annotated, List, Literal, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # ---------- Boards ----------
@@ -67,6 +67,11 @@ class UserUpdate(BaseModel):
 class LoginRequest(BaseModel):
     name: str
     password: str
+
+
+class LoginResult(User):
+    access_token: str
+    token_type: str = "bearer"
     
 class UserPasswordChange(BaseModel):
     new_password: str
@@ -93,11 +98,19 @@ class ColumnUpdate(BaseModel):
   position: Optional[int] = None
   board_id: Optional[int] = None
   color: Optional[str] = None
+  # Erwartete Version (alternativ If-Match); weicht sie ab -> 409
+  version: Optional[int] = None
+
+
+class ColumnOrder(BaseModel):
+  column_ids: List[int]
 
 
 class Column(ColumnBase):
   id: int
   created_at: datetime
+  updated_at: Optional[datetime] = None
+  version: int = 1
 
   class Config:
     orm_mode = True
@@ -127,15 +140,40 @@ class CardUpdate(BaseModel):
   color: Optional[str] = None
   assignee_id: Optional[int] = None
   link: Optional[str] = None
+  # Platzierung in der (Ziel-)Spalte: zwischen diesen beiden Karten.
+  # Ohne Angabe landet eine verschobene Karte am Ende der Spalte.
+  after_card_id: Optional[int] = None
+  before_card_id: Optional[int] = None
+  # Erwartete Version (alternativ If-Match); weicht sie ab -> 409
+  version: Optional[int] = None
 
 
 class Card(CardBase):
   id: int
   created_at: datetime
+  updated_at: Optional[datetime] = None
+  version: int = 1
+  rank: Optional[str] = None
+  board_id: Optional[int] = None
 
   class Config:
     orm_mode = True
 
+class CardPage(BaseModel):
+  items: List[Card]
+  next_cursor: Optional[str] = None
+
+
+class AssignedCard(Card):
+  board_name: str
+  column_title: str
+
+
+class AssignedCardPage(BaseModel):
+  items: List[AssignedCard]
+  next_cursor: Optional[str] = None
+
+
 class CardHistory(BaseModel):
     id: int
     card_id: int
@@ -148,3 +186,128 @@ class CardHistory(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class CardHistoryPage(BaseModel):
+    items: List[CardHistory]
+    next_cursor: Optional[str] = None
+
+
+# ---------- Board-Snapshot ----------
+
+class ColumnWithCards(Column):
+  cards: List[Card] = []
+
+
+class BoardFull(Board):
+  columns: List[ColumnWithCards] = []
+  # Stand des Änderungsprotokolls, ab dem /changes weiterliefert
+  cursor: int = 0
+
+
+# ---------- Delta-Sync ----------
+
+class Tombstone(BaseModel):
+  entity: str
+  id: int
+
+
+class BoardChanges(BaseModel):
+  cursor: int
+  has_more: bool = False
+  board: Optional[Board] = None
+  columns: List[Column] = []
+  cards: List[Card] = []
+  deleted: List[Tombstone] = []
+
+
+# ---------- Kennzahlen ----------
+
+class DurationStats(BaseModel):
+  # Stunden; None, wenn keine Karte im Zeitraum fertig wurde
+  count: int
+  mean: Optional[float] = None
+  p50: Optional[float] = None
+  p85: Optional[float] = None
+  p95: Optional[float] = None
+
+
+class ColumnFlow(BaseModel):
+  column_id: int
+  title: str
+  wip: int
+  # Kartenzahl am Ende jedes Tages in BoardMetrics.days
+  counts: List[int]
+
+
+class BoardMetrics(BaseModel):
+  board_id: int
+  days: List[date]
+  columns: List[ColumnFlow]
+  lead_time: DurationStats
+  cycle_time: DurationStats
+
+
+# ---------- Import ----------
+
+class ImportResult(BaseModel):
+  board_id: int
+  columns: int
+  cards: int
+  history: int
+
+
+# ---------- Batch ----------
+
+class CreateCardOp(BaseModel):
+  op: Literal["create_card"]
+  data: CardCreate
+
+
+class UpdateCardOp(BaseModel):
+  op: Literal["update_card"]
+  id: int
+  data: CardUpdate
+
+
+class DeleteCardOp(BaseModel):
+  op: Literal["delete_card"]
+  id: int
+
+
+class CreateColumnOp(BaseModel):
+  op: Literal["create_column"]
+  data: ColumnCreate
+
+
+class UpdateColumnOp(BaseModel):
+  op: Literal["update_column"]
+  id: int
+  data: ColumnUpdate
+
+
+class DeleteColumnOp(BaseModel):
+  op: Literal["delete_column"]
+  id: int
+
+
+BatchOperation = Annotated[
+  Union[CreateCardOp, UpdateCardOp, DeleteCardOp, CreateColumnOp, UpdateColumnOp, DeleteColumnOp],
+  Field(discriminator="op"),
+]
+
+
+class BatchRequest(BaseModel):
+  # Werden der Reihe nach in einer Transaktion ausgeführt
+  operations: List[BatchOperation]
+
+
+class BatchResult(BaseModel):
+  op: str
+  id: int
+  card: Optional[Card] = None
+  column: Optional[Column] = None
+
+
+class BatchResponse(BaseModel):
+  results: List[BatchResult]
@@ -0,0 +1,319 @@
+"""
+Volltextsuche über Titel, Beschreibung und Link der Karten (GET /search).
+
+Der Suchindex liegt in einer eigenen Tabelle, je nach Datenbank:
+- SQLite:   FTS5-Tabelle cards_fts (rowid = Karten-ID), Ranking per bm25
+- Postgres: card_search (card_id, document tsvector) mit GIN-Index,
+            Ranking per ts_rank_cd; Sprache über SEARCH_CONFIG
+Der Index enthält nur den Text. Filter (Board, Assignee, Farbe,
+Papierkorb) laufen über den Join mit cards und sind damit immer aktuell.
+
+Bewertet werden nur die MAX_CANDIDATES neuesten Treffer (höchste IDs,
+in Indexreihenfolge gelesen, siehe candidates()); innerhalb dieser wird
+nach Relevanz sortiert und über (score, id) geblättert. Ein sehr
+häufiger Begriff kostet damit pro Seite nicht mehr als ein seltener.
+Ältere Treffer eines solchen Begriffs findet man über weitere Begriffe
+oder Filter.
+
+crud markiert Karten, deren Text sich ändert (mark()). Direkt vor dem
+Commit werden deren Einträge in derselben Transaktion neu geschrieben:
+ein INSERT ... SELECT für alle markierten Karten, das vorhandene
+Einträge ersetzt (OR REPLACE bzw. ON CONFLICT DO UPDATE).
+Endgültig gelöschte Karten entfernt crud.purge_cards.
+
+Neuaufbau (z.B. nach Änderung von SEARCH_CONFIG):
+
+    python -m app.search rebuild
+"""
+import re
+import sys
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    cast,
+    delete,
+    event,
+    func,
+    inspect,
+    insert,
+    literal,
+    literal_column,
+    select,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+from .database import SessionLocal, engine
+
+_PENDING_CARDS = "search_pending_cards"
+
+# Karten pro Durchgang beim Neuaufbau
+REBUILD_BATCH = 5000
+
+# Mehr Suchbegriffe werden ignoriert
+MAX_TERMS = 16
+
+# Höchstens so viele Treffer werden bewertet (die neuesten)
+MAX_CANDIDATES = 2000
+
+_TERM = re.compile(r"\w+")
+
+# Eigene Metadaten: die Indextabellen gibt es nur für ihre Datenbank,
+# Base.metadata.create_all darf sie nicht anlegen
+_metadata = MetaData()
+
+_cards = models.Card.__table__
+
+
+def terms(q: str) -> list[str]:
+    """Wörter der Suchanfrage; Operatoren und Sonderzeichen fallen weg."""
+    return _TERM.findall(q.lower())[:MAX_TERMS]
+
+
+class SearchIndex:
+    """
+    Schnittstelle für den Suchindex. match() liefert eine Abfrage mit den
+    Spalten card_id und score (kleiner = relevanter) für alle Karten, die
+    alle Begriffe enthalten; der letzte Begriff zählt auch als Präfix.
+    """
+
+    name = "none"
+
+    def create(self, conn: Connection) -> bool:
+        """Legt den Index an, falls er fehlt; True, wenn er neu ist."""
+        return False
+
+    def write(self, db: Session, card_ids) -> None:
+        pass
+
+    def remove(self, db: Session, card_ids) -> None:
+        pass
+
+    def match(self, words: list[str]):
+        raise HTTPException(
+            status_code=501,
+            detail=f"Full-text search not available for {engine.dialect.name}",
+        )
+
+
+class SqliteIndex(SearchIndex):
+    name = "fts5"
+
+    table = Table(
+        "cards_fts",
+        _metadata,
+        Column("rowid", Integer),
+        Column("title", Text),
+        Column("description", Text),
+        Column("link", Text),
+        # versteckte Spalten von FTS5
+        Column("cards_fts", Text),
+        Column("rank", Text),
+    )
+
+    def create(self, conn: Connection) -> bool:
+        if inspect(conn).has_table("cards_fts"):
+            return False
+        # Präfix-Indizes für die Suche während der Eingabe; Gewichte für
+        # bm25: Titel vor Beschreibung vor Link
+        conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE cards_fts USING fts5("
+            "title, description, link, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO cards_fts (cards_fts, rank) VALUES ('rank', 'bm25(10.0, 3.0, 1.0)')"
+        )
+        return True
+
+    def write(self, db: Session, card_ids) -> None:
+        # FTS5 ersetzt bei gleicher rowid den alten Eintrag
+        db.execute(
+            insert(self.table).prefix_with("OR REPLACE").from_select(
+                ["rowid", "title", "description", "link"],
+                select(
+                    _cards.c.id,
+                    _cards.c.title,
+                    func.coalesce(_cards.c.description, ""),
+                    func.coalesce(_cards.c.link, ""),
+                ).where(_cards.c.id.in_(card_ids)),
+            )
+        )
+
+    def remove(self, db: Session, card_ids) -> None:
+        db.execute(delete(self.table).where(self.table.c.rowid.in_(card_ids)))
+
+    def match(self, words: list[str]):
+        expression = " ".join(f'"{word}"' for word in words) + "*"
+        return select(
+            self.table.c.rowid.label("card_id"),
+            self.table.c.rank.label("score"),
+        ).where(self.table.c.cards_fts.op("MATCH")(expression))
+
+
+class PostgresIndex(SearchIndex):
+    name = "tsvector"
+
+    table = Table(
+        "card_search",
+        _metadata,
+        Column(
+            "card_id",
+            Integer,
+            ForeignKey(_cards.c.id, ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        Column("document", TSVECTOR, nullable=False),
+        Index("ix_card_search_document", "document", postgresql_using="gin"),
+    )
+
+    def _config(self):
+        return cast(literal(settings.search_config), REGCONFIG)
+
+    def _document(self):
+        config = self._config()
+        parts = [
+            # Gewicht als untypisiertes Literal: setweight erwartet "char"
+            func.setweight(
+                func.to_tsvector(config, func.coalesce(column, "")),
+                literal_column(f"'{weight}'"),
+            )
+            for column, weight in (
+                (_cards.c.title, "A"),
+                (_cards.c.description, "B"),
+                (_cards.c.link, "C"),
+            )
+        ]
+        return parts[0].op("||")(parts[1]).op("||")(parts[2])
+
+    def create(self, conn: Connection) -> bool:
+        if inspect(conn).has_table("card_search"):
+            return False
+        self.table.create(bind=conn)
+        return True
+
+    def write(self, db: Session, card_ids) -> None:
+        statement = pg_insert(self.table).from_select(
+            ["card_id", "document"],
+            select(_cards.c.id, self._document()).where(_cards.c.id.in_(card_ids)),
+        )
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[self.table.c.card_id],
+                set_={"document": statement.excluded.document},
+            )
+        )
+
+    def remove(self, db: Session, card_ids) -> None:
+        db.execute(delete(self.table).where(self.table.c.card_id.in_(card_ids)))
+
+    def match(self, words: list[str]):
+        # Begriffe bestehen nur aus Wortzeichen, Quoting genügt
+        expression = " & ".join(f"'{word}'" for word in words) + ":*"
+        query = func.to_tsquery(self._config(), expression)
+        return select(
+            self.table.c.card_id,
+            (-func.ts_rank_cd(self.table.c.document, query)).label("score"),
+        ).where(self.table.c.document.op("@@")(query))
+
+
+def create_index(dialect: str = engine.dialect.name) -> SearchIndex:
+    if dialect == "sqlite":
+        return SqliteIndex()
+    if dialect == "postgresql":
+        return PostgresIndex()
+    return SearchIndex()
+
+
+index = create_index()
+
+
+def candidates(words: list[str]):
+    """
+    Unterabfrage (card_id, score) über die MAX_CANDIDATES neuesten
+    Treffer. FTS5 liest dafür die rowids absteigend, Postgres sortiert
+    die GIN-Treffer per Top-N nach card_id; den score berechnen beide
+    nur für diese Zeilen.
+    """
+    match = index.match(words)
+    return (
+        match.order_by(match.selected_columns.card_id.desc())
+        .limit(MAX_CANDIDATES)
+        .subquery()
+    )
+
+
+def mark(db: Session, card_id: int) -> None:
+    """Karte beim nächsten Commit neu indexieren."""
+    db.info.setdefault(_PENDING_CARDS, set()).add(card_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session: Session) -> None:
+    card_ids = session.info.pop(_PENDING_CARDS, None)
+    if card_ids:
+        # INSERT ... SELECT liest die Karten, also erst deren UPDATEs senden
+        session.flush()
+        index.write(session, sorted(card_ids))
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_CARDS, None)
+
+
+def rebuild(db: Session) -> int:
+    """Indexiert alle Karten neu (in Stapeln); liefert die Anzahl."""
+    indexed, last_id = 0, 0
+    while True:
+        card_ids = [
+            card_id
+            for (card_id,) in db.query(models.Card.id)
+            .filter(models.Card.id > last_id)
+            .order_by(models.Card.id)
+            .limit(REBUILD_BATCH)
+        ]
+        if not card_ids:
+            return indexed
+        index.write(db, card_ids)
+        db.commit()
+        indexed += len(card_ids)
+        last_id = card_ids[-1]
+
+
+def upgrade(bind: Engine) -> None:
+    """Legt den Index an und befüllt ihn, wenn es ihn noch nicht gab."""
+    with bind.begin() as conn:
+        created = index.create(conn)
+    if created:
+        with Session(bind=bind) as db:
+            rebuild(db)
+
+
+def main(argv: list[str]) -> int:
+    command = argv[1] if len(argv) > 1 else "rebuild"
+    if command != "rebuild":
+        print(__doc__)
+        return 2
+
+    db = SessionLocal()
+    try:
+        print(f"{rebuild(db)} Karten indexiert ({index.name})")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
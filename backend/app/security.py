@@ -0,0 +1,92 @@
+"""
+Passwort-Hashing in einem eigenen Prozess-Pool.
+
+PBKDF2 ist absichtlich teuer (zig Millisekunden CPU pro Aufruf) und hält
+dabei den GIL. Deshalb läuft es nicht im Request-Worker, sondern in
+separaten Prozessen. Die Anzahl wartender Aufträge ist begrenzt; ist die
+Warteschlange voll, antwortet der Server sofort mit 429 statt alle
+anderen Requests mit auszubremsen.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from .config import settings
+
+# min/max = default: Hashes mit abweichenden Runden gelten als veraltet
+# und werden beim nächsten erfolgreichen Login neu erzeugt
+_ROUNDS = settings.password_hash_rounds
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    pbkdf2_sha256__default_rounds=_ROUNDS,
+    pbkdf2_sha256__min_rounds=_ROUNDS,
+    pbkdf2_sha256__max_rounds=_ROUNDS,
+)
+
+
+# Laufen im Worker-Prozess (müssen daher auf Modulebene liegen)
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, password_hash: str) -> tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+class HashPool:
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn statt fork: der Server hat bereits Threads / Event-Loop
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many concurrent password operations",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hash_pool = HashPool(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
+
+
+async def hash_password(password: str) -> str:
+    return await hash_pool.run(_hash, password)
+
+
+async def verify_password(password: str, password_hash: str) -> tuple[bool, Optional[str]]:
+    """
+    Liefert (gültig, neuer Hash). Der neue Hash ist nur gesetzt, wenn das
+    Passwort stimmt und der alte Hash nicht mehr den aktuellen
+    Kostenparametern entspricht.
+    """
+    return await hash_pool.run(_verify_and_update, password, password_hash)
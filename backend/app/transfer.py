@@ -0,0 +1,420 @@
+"""
+Export und Import ganzer Boards (GET /boards/{id}/export, POST /boards/import).
+
+Ein Export ist eine Folge von Datensätzen mit "type": erst das board,
+dann alle column, dann alle card, dann alle history. Formate:
+- "ndjson": ein JSON-Objekt pro Zeile
+- "csv":    eine Zeile pro Datensatz, Spalten CSV_FIELDS (leer = None)
+
+Beide Richtungen brauchen konstant viel Speicher:
+- Export: Abfragen mit yield_per (auf Postgres serverseitige Cursor),
+  die Zeilen gehen blockweise an die StreamingResponse
+- Import: der Request-Body wird zeilenweise gelesen und in Blöcken von
+  IMPORT_BATCH Datensätzen per executemany eingefügt. Pro Karte entsteht
+  im selben Block ein History-Eintrag "import"; Änderungsprotokoll und
+  Benutzerprüfung laufen ebenfalls pro Block. Nur die Zuordnung alter
+  zu neuen IDs wächst mit (ein int pro Spalte bzw. Karte). Fehlen
+  Ränge (z.B. in einer von Hand geschriebenen CSV-Datei), wird jede
+  betroffene Spalte am Ende einmal per rebalance_column_ranks sortiert.
+
+Der Import legt immer ein neues Board an und läuft in einer Transaktion.
+IDs werden neu vergeben, Verweise über die alten IDs aufgelöst.
+Benutzer werden nicht mitexportiert: assignee_id und user_id bleiben nur
+erhalten, wenn es den Benutzer im Ziel gibt. Archivierte History
+(retention.py) ist nicht Teil des Exports.
+"""
+import codecs
+import csv
+import io
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from . import analytics, changes, crud, models, ranking, search
+from .database import SessionLocal, engine
+
+# Zeilen pro Block beim Export bzw. Datensätze pro INSERT beim Import
+EXPORT_BATCH = 1000
+IMPORT_BATCH = 1000
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+_FIELDS = {
+    "board": (models.Board, ("id", "name", "color", "created_at")),
+    "column": (models.KanbanColumn, ("id", "title", "position", "color", "created_at")),
+    "card": (
+        models.Card,
+        (
+            "id", "column_id", "title", "description", "link", "due_date",
+            "color", "rank", "assignee_id", "created_at",
+        ),
+    ),
+    "history": (
+        models.CardHistory,
+        ("card_id", "user_id", "action", "field", "old_value", "new_value", "created_at"),
+    ),
+}
+
+CSV_FIELDS = ["type"] + list(dict.fromkeys(
+    name for _, names in _FIELDS.values() for name in names
+))
+
+_INT_FIELDS = {"id", "column_id", "card_id", "position", "assignee_id", "user_id"}
+_DATETIME_FIELDS = {"due_date", "created_at"}
+
+
+# ---------- Export ----------
+
+
+def _select(kind: str):
+    model, names = _FIELDS[kind]
+    return select(*(getattr(model, name) for name in names))
+
+
+def records(db: Session, board_id: int) -> Iterator[dict]:
+    """Alle Datensätze eines Boards, ohne Papierkorb."""
+    board = db.execute(
+        _select("board").where(models.Board.id == board_id, models.Board.deleted_at.is_(None))
+    ).mappings().first()
+    if board is None:
+        return
+    yield {"type": "board", **board}
+
+    statements = (
+        (
+            "column",
+            _select("column")
+            .where(
+                models.KanbanColumn.board_id == board_id,
+                models.KanbanColumn.deleted_at.is_(None),
+            )
+            .order_by(models.KanbanColumn.position, models.KanbanColumn.id),
+        ),
+        (
+            "card",
+            _select("card")
+            .where(models.Card.board_id == board_id, models.Card.deleted_at.is_(None))
+            .order_by(models.Card.column_id, models.Card.rank, models.Card.id),
+        ),
+        (
+            # Ohne ORDER BY: eine Sortierung über die History des ganzen
+            # Boards würde erst nach dem letzten Eintrag die erste Zeile liefern
+            "history",
+            _select("history")
+            .join(models.Card, models.Card.id == models.CardHistory.card_id)
+            .where(models.Card.board_id == board_id, models.Card.deleted_at.is_(None)),
+        ),
+    )
+    for kind, statement in statements:
+        rows = db.execute(statement.execution_options(yield_per=EXPORT_BATCH)).mappings()
+        for row in rows:
+            yield {"type": kind, **row}
+
+
+def _ndjson(items: Iterable[dict]) -> Iterator[bytes]:
+    lines = []
+    for item in items:
+        lines.append(orjson.dumps(item))
+        if len(lines) == EXPORT_BATCH:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv(items: Iterable[dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_FIELDS)
+    writer.writeheader()
+    for n, item in enumerate(items, 1):
+        writer.writerow({name: _csv_value(value) for name, value in item.items()})
+        if n % EXPORT_BATCH == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _export_session() -> Session:
+    if engine.dialect.name == "postgresql":
+        # Alle Abfragen des Exports sehen denselben Stand
+        return Session(
+            bind=engine.execution_options(isolation_level="REPEATABLE READ"),
+            autoflush=False,
+        )
+    return SessionLocal()
+
+
+def export(board_id: int, fmt: str) -> Iterator:
+    """
+    Body für die StreamingResponse. Läuft mit eigener Session, weil der
+    Stream länger lebt als die Session des Requests.
+    """
+    db = _export_session()
+    try:
+        encode = _csv if fmt == "csv" else _ndjson
+        yield from encode(records(db, board_id))
+    finally:
+        db.close()
+
+
+# ---------- Import ----------
+
+
+def _lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """UTF-8-Zeilen (mit "\\n") aus beliebig zerteilten Blöcken."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    rest = ""
+    for chunk in chunks:
+        *lines, rest = (rest + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    rest += decoder.decode(b"", final=True)
+    if rest:
+        yield rest
+
+
+def _error(line: int, detail: str) -> HTTPException:
+    return HTTPException(status_code=400, detail={"line": line, "detail": detail})
+
+
+def _parse_ndjson(lines: Iterable[str]) -> Iterator[tuple[int, dict]]:
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            raise _error(n, "Invalid JSON")
+        if not isinstance(item, dict):
+            raise _error(n, "Expected an object")
+        yield n, item
+
+
+def _parse_csv(lines: Iterable[str]) -> Iterator[tuple[int, dict]]:
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or "type" not in reader.fieldnames:
+        raise _error(1, "Missing column 'type'")
+    for row in reader:
+        yield reader.line_num, {name: value or None for name, value in row.items() if name}
+
+
+def _convert(n: int, item: dict) -> dict:
+    values = {}
+    for name, value in item.items():
+        if value is None:
+            values[name] = None
+            continue
+        try:
+            if name in _INT_FIELDS:
+                value = int(value)
+            elif name in _DATETIME_FIELDS:
+                value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise _error(n, f"Invalid value for {name}")
+        values[name] = value
+    return values
+
+
+def _valid_rank(rank: Optional[str]) -> Optional[str]:
+    if rank and not rank.endswith("0") and all(c in ranking.DIGITS for c in rank):
+        return rank
+    return None
+
+
+class _Importer:
+    def __init__(self, db: Session, user_id: Optional[int]) -> None:
+        self.db = db
+        self.now = datetime.utcnow()
+        self.board_id: Optional[int] = None
+        # alte -> neue IDs
+        self.columns: dict[int, int] = {}
+        self.cards: dict[int, int] = {}
+        self.user_id = user_id if user_id in self._users([user_id]) else None
+        self.kind: Optional[str] = None
+        self.pending: list[tuple[int, dict]] = []
+        self.counts = {"columns": 0, "cards": 0, "history": 0}
+
+    def add(self, n: int, item: dict) -> None:
+        kind = item.get("type")
+        if kind not in _FIELDS:
+            raise _error(n, f"Unknown type: {kind}")
+        if kind == "board":
+            self._board(n, _convert(n, item))
+            return
+        if self.board_id is None:
+            raise _error(n, "The board record must come first")
+        if kind != self.kind or len(self.pending) == IMPORT_BATCH:
+            self.flush()
+            self.kind = kind
+        self.pending.append((n, _convert(n, item)))
+
+    def flush(self) -> None:
+        if self.pending:
+            insert_batch = {"column": self._columns, "card": self._cards, "history": self._history}
+            insert_batch[self.kind](self.pending)
+            self.pending = []
+
+    def _users(self, user_ids: Iterable[Optional[int]]) -> set[int]:
+        """Die vorhandenen unter den user_ids eines Blocks."""
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if not user_ids:
+            return set()
+        return set(self.db.scalars(select(models.User.id).where(models.User.id.in_(user_ids))))
+
+    def _insert(self, model, rows: list[dict]) -> list[int]:
+        table = model.__table__
+        result = self.db.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+        )
+        return list(result.scalars())
+
+    def _board(self, n: int, item: dict) -> None:
+        if self.board_id is not None:
+            raise _error(n, "Only one board record allowed")
+        if not item.get("name"):
+            raise _error(n, "Missing name")
+        (self.board_id,) = self._insert(models.Board, [{
+            "name": item["name"],
+            "color": item.get("color"),
+            "created_at": item.get("created_at") or self.now,
+            "deleted_at": None,
+        }])
+        changes.record_change(self.db, self.board_id, "board", self.board_id)
+
+    def _columns(self, items: list[tuple[int, dict]]) -> None:
+        rows = []
+        for n, item in items:
+            if not item.get("title"):
+                raise _error(n, "Missing title")
+            rows.append({
+                "title": item["title"],
+                "position": item.get("position") or 0,
+                "color": item.get("color"),
+                "board_id": self.board_id,
+                "created_at": item.get("created_at") or self.now,
+                "updated_at": self.now,
+                "version": 1,
+                "deleted_at": None,
+            })
+        new_ids = self._insert(models.KanbanColumn, rows)
+        for (n, item), new_id in zip(items, new_ids):
+            if item.get("id") is not None:
+                self.columns[item["id"]] = new_id
+        changes.record_changes(self.db, self.board_id, "column", new_ids)
+        self.counts["columns"] += len(new_ids)
+
+    def _cards(self, items: list[tuple[int, dict]]) -> None:
+        users = self._users(item.get("assignee_id") for n, item in items)
+        rows = []
+        for n, item in items:
+            if not item.get("title"):
+                raise _error(n, "Missing title")
+            column_id = self.columns.get(item.get("column_id"))
+            if column_id is None:
+                raise _error(n, "Unknown column_id")
+            rows.append({
+                "title": item["title"],
+                "description": item.get("description"),
+                "link": item.get("link"),
+                "due_date": item.get("due_date"),
+                "color": item.get("color"),
+                "rank": _valid_rank(item.get("rank")),
+                "assignee_id": item.get("assignee_id") if item.get("assignee_id") in users else None,
+                "column_id": column_id,
+                "board_id": self.board_id,
+                "created_at": item.get("created_at") or self.now,
+                "updated_at": self.now,
+                "version": 1,
+                "deleted_at": None,
+            })
+        new_ids = self._insert(models.Card, rows)
+        for (n, item), new_id in zip(items, new_ids):
+            if item.get("id") is not None:
+                self.cards[item["id"]] = new_id
+
+        # Im selben Block: Änderungsprotokoll, History, Suchindex, Kennzahlen
+        changes.record_changes(self.db, self.board_id, "card", new_ids)
+        self.db.execute(insert(models.CardHistory.__table__), [
+            {
+                "card_id": card_id,
+                "user_id": self.user_id,
+                "action": "import",
+                "field": None,
+                "old_value": None,
+                "new_value": row["title"],
+                "created_at": self.now,
+            }
+            for card_id, row in zip(new_ids, rows)
+        ])
+        search.index.write(self.db, new_ids)
+        for card_id, row in zip(new_ids, rows):
+            analytics.entered(self.db, card_id, row["column_id"], row["created_at"])
+        analytics.flush(self.db)
+        self.counts["cards"] += len(new_ids)
+
+    def _history(self, items: list[tuple[int, dict]]) -> None:
+        users = self._users(item.get("user_id") for n, item in items)
+        rows = []
+        for n, item in items:
+            card_id = self.cards.get(item.get("card_id"))
+            if card_id is None:
+                raise _error(n, "Unknown card_id")
+            if not item.get("action"):
+                raise _error(n, "Missing action")
+            rows.append({
+                "card_id": card_id,
+                "user_id": item.get("user_id") if item.get("user_id") in users else None,
+                "action": item["action"],
+                "field": item.get("field"),
+                "old_value": item.get("old_value"),
+                "new_value": item.get("new_value"),
+                "created_at": item.get("created_at") or self.now,
+            })
+        self.db.execute(insert(models.CardHistory.__table__), rows)
+        self.counts["history"] += len(rows)
+
+    def finish(self) -> dict:
+        self.flush()
+        if self.board_id is None:
+            raise HTTPException(status_code=400, detail="No board record")
+        # Karten ohne (gültigen) Rang ans Ende ihrer Spalte
+        for column_id in self.db.scalars(
+            select(models.Card.column_id)
+            .where(models.Card.board_id == self.board_id, models.Card.rank.is_(None))
+            .distinct()
+        ).all():
+            crud.rebalance_column_ranks(self.db, column_id, commit=False)
+        return {"board_id": self.board_id, **self.counts}
+
+
+def import_board(chunks: Iterable[bytes], fmt: str, user_id: Optional[int] = None) -> dict:
+    """
+    Legt ein Board aus einem Export an (alles oder nichts). Fehler
+    werden zu 400 mit {"line", "detail"}. Läuft synchron, also im
+    Threadpool aufrufen.
+    """
+    parse = _parse_csv if fmt == "csv" else _parse_ndjson
+    db = SessionLocal()
+    try:
+        importer = _Importer(db, user_id)
+        try:
+            for n, item in parse(_lines(chunks)):
+                importer.add(n, item)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Body is not valid UTF-8")
+        except csv.Error as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV: {exc}")
+        result = importer.finish()
+        db.commit()
+        return result
+    finally:
+        db.close()
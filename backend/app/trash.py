@@ -0,0 +1,86 @@
+"""
+Papierkorb (DELETE_MODE=trash): endgültiges Löschen markierter Zeilen.
+
+Mit DELETE_MODE=trash setzen die Lösch-Routen nur deleted_at; die Zeilen
+sind sofort für alle Lesezugriffe ausgeblendet, der eigentliche DELETE
+kostet den Request also nichts. purge() entfernt alles, was länger als
+TRASH_RETENTION_HOURS im Papierkorb liegt: Karten samt History in
+Stapeln, danach leere Spalten und Boards.
+
+Aufruf (z.B. stündlich per Cron):
+
+    python -m app.trash
+"""
+import sys
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, delete, exists, select
+from sqlalchemy.orm import Session
+
+from . import analytics, crud, models
+from .config import settings
+from .database import SessionLocal
+
+# Karten pro Transaktion; hält Sperren und Undo-Log klein
+PURGE_CARD_BATCH = 1000
+
+
+def purge(db: Session, now: Optional[datetime] = None) -> dict[str, int]:
+    """Löscht abgelaufene Einträge des Papierkorbs; liefert die Anzahl pro Tabelle."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(hours=settings.trash_retention_hours)
+    purged = {"cards": 0, "columns": 0, "boards": 0}
+
+    while True:
+        card_ids = [
+            card_id
+            for (card_id,) in db.query(models.Card.id)
+            .filter(models.Card.deleted_at < cutoff)
+            .limit(PURGE_CARD_BATCH)
+        ]
+        if not card_ids:
+            break
+        crud.purge_cards(db, models.Card.id.in_(card_ids))
+        db.commit()
+        purged["cards"] += len(card_ids)
+
+    # Spalten und Boards erst, wenn keine Karten bzw. Spalten mehr daran hängen
+    columns = and_(
+        models.KanbanColumn.deleted_at < cutoff,
+        ~exists().where(models.Card.column_id == models.KanbanColumn.id),
+    )
+    analytics.remove_columns(db, select(models.KanbanColumn.id).where(columns))
+    purged["columns"] = db.execute(
+        delete(models.KanbanColumn)
+        .where(columns)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    purged["boards"] = db.execute(
+        delete(models.Board)
+        .where(
+            models.Board.deleted_at < cutoff,
+            ~exists().where(models.KanbanColumn.board_id == models.Board.id),
+            ~exists().where(models.Card.board_id == models.Board.id),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return purged
+
+
+def main(argv: list[str]) -> int:
+    db = SessionLocal()
+    try:
+        purged = purge(db)
+    finally:
+        db.close()
+    print(
+        f"{purged['cards']} Karten, {purged['columns']} Spalten, "
+        f"{purged['boards']} Boards endgültig gelöscht"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,125 @@
+"""
+Gemeinsame Fixtures. Die Tests laufen gegen eine eigene SQLite-Datei;
+die Umgebung muss vor dem Import von app.* stehen (Settings werden beim
+Import gelesen). Jeder Test legt sein eigenes Board an, die Daten
+mehrerer Tests stören sich deshalb nicht. `client` ist als Admin
+angemeldet; `login` liefert Header für weitere Benutzer.
+"""
+import itertools
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="kanban-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP}/kanban.db")
+os.environ.setdefault("HISTORY_ARCHIVE_DIR", os.path.join(_TMP, "history-archive"))
+os.environ.setdefault("HISTORY_SPOOL_DIR", os.path.join(_TMP, "history-spool"))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models, retention
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+
+_names = itertools.count(1)
+
+
+def _create_user(client, **permissions) -> dict:
+    name = f"user{next(_names)}"
+    response = client.post("/users/", json={"name": name, "password": "pw"})
+    assert response.status_code == 200
+    user = response.json()
+    if permissions:
+        # Direkt in der Datenbank, damit auch der erste Admin so entsteht
+        db = SessionLocal()
+        try:
+            db.query(models.User).filter(models.User.id == user["id"]).update(permissions)
+            db.commit()
+        finally:
+            db.close()
+    return {**user, **permissions, "password": "pw"}
+
+
+def _bearer(client, user: dict) -> dict:
+    response = client.post("/login", json={"name": user["name"], "password": user["password"]})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Lifespan: Schema, Realtime-Hub, History-Writer
+    with TestClient(app) as client:
+        admin = _create_user(client, is_admin=True, is_active=True)
+        client.headers.update(_bearer(client, admin))
+        yield client
+
+
+@pytest.fixture
+def login(client):
+    """Legt einen Benutzer mit den angegebenen Rechten an; liefert (user, Header)."""
+
+    def login(**permissions) -> tuple[dict, dict]:
+        user = _create_user(client, is_active=True, **permissions)
+        return user, _bearer(client, user)
+
+    return login
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(client):
+    return _create_user(client)
+
+
+@pytest.fixture
+def board(client):
+    """Board mit drei leeren Spalten."""
+    board = client.post("/boards/", json={"name": f"Board {next(_names)}"}).json()
+    board["columns"] = [
+        client.post(
+            "/columns/",
+            json={"title": f"C{i}", "position": i, "board_id": board["id"]},
+        ).json()
+        for i in range(3)
+    ]
+    return board
+
+
+@pytest.fixture
+def make_card(client):
+    def make_card(column_id: int, title: str = "Karte", **fields) -> dict:
+        response = client.post("/cards/", json={"title": title, "column_id": column_id, **fields})
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return make_card
+
+
+@pytest.fixture(params=["table", "files"])
+def archive(request, monkeypatch, tmp_path):
+    """Beide History-Archive (HISTORY_ARCHIVE) nacheinander."""
+    if request.param == "files":
+        monkeypatch.setattr(retention, "archive", retention.FileArchive(str(tmp_path)))
+    else:
+        monkeypatch.setattr(retention, "archive", retention.TableArchive())
+    return retention.archive
+
+
+@pytest.fixture
+def hard_delete_mode(monkeypatch):
+    monkeypatch.setattr(settings, "delete_mode", "hard")
+
+
+@pytest.fixture
+def trash_mode(monkeypatch):
+    monkeypatch.setattr(settings, "delete_mode", "trash")
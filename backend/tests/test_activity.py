@@ -0,0 +1,47 @@
+def _pages(client, url, limit, **params):
+    entries, cursor = [], None
+    while True:
+        page = client.get(url, params={"limit": limit, **params, **({"cursor": cursor} if cursor else {})})
+        assert page.status_code == 200, page.text
+        entries += page.json()["items"]
+        cursor = page.json()["next_cursor"]
+        if cursor is None:
+            return entries
+
+
+def test_card_history_pages_newest_first(client, board, make_card):
+    card = make_card(board["columns"][0]["id"], "t0")
+    for n in range(1, 5):
+        client.patch(f"/cards/{card['id']}", json={"title": f"t{n}"})
+
+    entries = _pages(client, f"/cards/{card['id']}/history", limit=2)
+    assert [e["new_value"] for e in entries] == ["t4", "t3", "t2", "t1", "t0"]
+    assert entries[-1]["action"] == "create"
+
+
+def test_board_activity_filters(client, board, make_card, login):
+    editor, headers = login(can_edit=True, can_view=True)
+    first = make_card(board["columns"][0]["id"], "a")
+    second = make_card(board["columns"][1]["id"], "b")
+    client.patch(f"/cards/{first['id']}", json={"title": "a!"}, headers=headers)
+    client.patch(f"/cards/{second['id']}", json={"color": "red"})
+
+    url = f"/boards/{board['id']}/activity"
+    everything = _pages(client, url, limit=2)
+    assert [(e["card_id"], e["action"]) for e in everything] == [
+        (second["id"], "update"), (first["id"], "update"),
+        (second["id"], "create"), (first["id"], "create"),
+    ]
+    assert [e["card_id"] for e in _pages(client, url, 10, user_id=editor["id"])] == [first["id"]]
+    assert [e["card_id"] for e in _pages(client, url, 10, field="color")] == [second["id"]]
+    assert len(_pages(client, url, 10, action="create")) == 2
+
+    # since inklusive, until exklusive
+    window = _pages(client, url, 10, since=everything[-1]["created_at"], until=everything[1]["created_at"])
+    assert [e["id"] for e in window] == [e["id"] for e in everything[2:]]
+
+
+def test_other_boards_are_not_included(client, board, make_card):
+    other = client.post("/boards/", json={"name": "leer"}).json()
+    make_card(board["columns"][0]["id"])
+    assert client.get(f"/boards/{other['id']}/activity").json()["items"] == []
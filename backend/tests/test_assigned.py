@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def _due(days):
+    return (datetime.utcnow() + timedelta(days=days)).isoformat()
+
+
+@pytest.fixture
+def assigned(board, make_card, user):
+    """Karten des Benutzers: überfällig, bald fällig, später, ohne Datum."""
+    first, second = board["columns"][0]["id"], board["columns"][1]["id"]
+    make_card(first, "später", assignee_id=user["id"], due_date=_due(30))
+    make_card(second, "ohne Datum", assignee_id=user["id"])
+    make_card(first, "bald", assignee_id=user["id"], due_date=_due(2))
+    make_card(first, "überfällig", assignee_id=user["id"], due_date=_due(-1))
+    make_card(first, "fremd", due_date=_due(1))
+    return user
+
+
+def _titles(client, user_id, **params):
+    response = client.get(f"/users/{user_id}/cards", params=params)
+    assert response.status_code == 200, response.text
+    return [card["title"] for card in response.json()["items"]]
+
+
+def test_sorted_by_due_date_undated_last(client, board, assigned):
+    response = client.get(f"/users/{assigned['id']}/cards")
+    cards = response.json()["items"]
+    assert [card["title"] for card in cards] == ["überfällig", "bald", "später", "ohne Datum"]
+    assert cards[-1]["board_name"] == board["name"]
+    assert cards[-1]["column_title"] == "C1"
+
+
+def test_due_filters(client, assigned):
+    assert _titles(client, assigned["id"], due="overdue") == ["überfällig"]
+    assert _titles(client, assigned["id"], due="soon") == ["bald"]
+    assert _titles(client, assigned["id"], due="soon", soon_days=60) == ["bald", "später"]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_pages_cross_into_undated_cards(client, assigned, limit):
+    titles, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/users/{assigned['id']}/cards", params=params).json()
+        assert len(page["items"]) <= limit
+        titles += [card["title"] for card in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert titles == ["überfällig", "bald", "später", "ohne Datum"]
+
+
+def test_deleted_cards_are_skipped(client, assigned):
+    card = client.get(f"/users/{assigned['id']}/cards", params={"due": "overdue"}).json()["items"][0]
+    client.delete(f"/cards/{card['id']}")
+    assert _titles(client, assigned["id"], due="overdue") == []
+
+
+def test_unknown_user(client):
+    assert client.get("/users/999999/cards").status_code == 404
+
+
+def test_cards_list_by_assignee(client, assigned):
+    response = client.get("/cards/", params={"assignee_id": assigned["id"], "limit": 3})
+    first = response.json()
+    second = client.get(
+        "/cards/", params={"assignee_id": assigned["id"], "cursor": first["next_cursor"]}
+    ).json()
+    # Keyset über (created_at, id): Anlegereihenfolge
+    assert [card["title"] for card in first["items"] + second["items"]] == [
+        "später", "ohne Datum", "bald", "überfällig"
+    ]
@@ -0,0 +1,67 @@
+"""Session-Tokens und Berechtigungen (require / get_identity)."""
+import pytest
+
+from app import auth
+from app.config import settings
+
+NO_TOKEN = {"Authorization": ""}
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [
+        ("GET", "/boards/"),
+        ("POST", "/boards/"),
+        ("GET", "/users/"),
+        ("GET", "/cards/"),
+        ("GET", "/metrics/db-pool"),
+        ("GET", "/metrics/cache"),
+        ("GET", "/boards/1/events"),
+    ],
+)
+def test_requests_without_token_are_rejected(client, method, path):
+    response = client.request(method, path, json={"name": "B"}, headers=NO_TOKEN)
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_invalid_and_expired_tokens(client, user):
+    for token in ("kaputt", auth.issue_token(user["id"]) + "x", auth.issue_token(user["id"], ttl=-1)):
+        response = client.get("/boards/", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 401
+    assert client.get("/boards/", headers={"Authorization": "Basic abc"}).status_code == 401
+
+
+def test_inactive_user_cannot_log_in(client, user):
+    response = client.post("/login", json={"name": user["name"], "password": "pw"})
+    assert response.status_code == 403
+
+
+def test_viewer_can_read_but_not_write(client, board, login):
+    _, headers = login(can_view=True)
+    assert client.get("/boards/", headers=headers).status_code == 200
+    assert client.post("/boards/", json={"name": "B"}, headers=headers).status_code == 403
+    assert client.delete(f"/boards/{board['id']}", headers=headers).status_code == 403
+    assert client.get("/metrics/cache", headers=headers).status_code == 403
+
+
+def test_permission_change_applies_immediately(client, login):
+    viewer, headers = login(can_view=True)
+    assert client.post("/boards/", json={"name": "B"}, headers=headers).status_code == 403
+
+    # update_user verwirft den Eintrag im Berechtigungs-Cache
+    assert client.patch(f"/users/{viewer['id']}", json={"can_edit": True}).status_code == 200
+    assert client.post("/boards/", json={"name": "B"}, headers=headers).status_code == 200
+
+
+def test_event_stream_accepts_token_parameter(client, board, login):
+    _, headers = login(can_edit=True)
+    token = headers["Authorization"].removeprefix("Bearer ")
+    # Gültiges Token ohne can_view: geprüft und abgewiesen, bevor gestreamt wird
+    response = client.get(f"/boards/{board['id']}/events", params={"access_token": token}, headers=NO_TOKEN)
+    assert response.status_code == 403
+
+
+def test_anonymous_access_is_opt_in(client, monkeypatch):
+    monkeypatch.setattr(settings, "auth_allow_anonymous", True)
+    assert client.post("/boards/", json={"name": "B"}, headers=NO_TOKEN).status_code == 200
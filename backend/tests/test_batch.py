@@ -0,0 +1,70 @@
+def _titles(client, column_id):
+    return sorted(card["title"] for card in client.get(f"/columns/{column_id}/cards").json())
+
+
+def test_batch_applies_all_operations(client, board, make_card):
+    first, second = board["columns"][0]["id"], board["columns"][1]["id"]
+    card = make_card(first, "alt")
+
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {"op": "create_card", "data": {"title": "neu", "column_id": first}},
+                {"op": "update_card", "id": card["id"], "data": {"column_id": second}},
+                {"op": "create_column", "data": {"title": "C3", "position": 3, "board_id": board["id"]}},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["op"] for result in results] == ["create_card", "update_card", "create_column"]
+    assert results[1]["card"]["version"] == card["version"] + 1
+    assert _titles(client, first) == ["neu"]
+    assert _titles(client, second) == ["alt"]
+
+
+def test_batch_is_all_or_nothing(client, board, make_card):
+    first, second = board["columns"][0]["id"], board["columns"][1]["id"]
+    card = make_card(first, "alt")
+    columns_before = client.get(f"/boards/{board['id']}/columns").json()
+
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {"op": "create_card", "data": {"title": "neu", "column_id": first}},
+                {"op": "update_card", "id": card["id"], "data": {"title": "geändert", "column_id": second}},
+                {"op": "create_column", "data": {"title": "C3", "position": 3, "board_id": board["id"]}},
+                {"op": "delete_card", "id": card["id"]},
+                {"op": "update_card", "id": 10**9, "data": {"title": "fehlt"}},
+            ]
+        },
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"]["index"] == 4
+
+    assert _titles(client, first) == ["alt"]
+    assert _titles(client, second) == []
+    assert client.get(f"/boards/{board['id']}/columns").json() == columns_before
+    history = client.get(f"/cards/{card['id']}/history").json()["items"]
+    assert [entry["action"] for entry in history] == ["create"]
+
+
+def test_batch_version_conflict_rolls_back(client, board, make_card):
+    column_id = board["columns"][0]["id"]
+    card = make_card(column_id, "alt")
+    client.patch(f"/cards/{card['id']}", json={"title": "aktuell"})
+
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {"op": "create_card", "data": {"title": "neu", "column_id": column_id}},
+                {"op": "update_card", "id": card["id"], "data": {"title": "x", "version": card["version"]}},
+            ]
+        },
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"]["index"] == 1
+    assert _titles(client, column_id) == ["aktuell"]
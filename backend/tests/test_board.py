@@ -0,0 +1,40 @@
+import pytest
+
+
+def test_full_snapshot(client, board, make_card):
+    first, second, _ = board["columns"]
+    a = make_card(first["id"], "a")
+    b = make_card(first["id"], "b")
+    make_card(second["id"], "c")
+    client.patch(f"/cards/{b['id']}", json={"before_card_id": a["id"]})
+
+    full = client.get(f"/boards/{board['id']}/full").json()
+    assert full["name"] == board["name"]
+    assert [(c["title"], [card["title"] for card in c["cards"]]) for c in full["columns"]] == [
+        ("C0", ["b", "a"]), ("C1", ["c"]), ("C2", []),
+    ]
+
+
+def test_full_snapshot_unknown_board(client):
+    assert client.get("/boards/999999/full").status_code == 404
+
+
+def test_column_order(client, board):
+    ids = [column["id"] for column in board["columns"]]
+    response = client.put(f"/boards/{board['id']}/column-order", json={"column_ids": ids[::-1]})
+    assert response.status_code == 200, response.text
+    assert [c["id"] for c in response.json()] == ids[::-1]
+
+    columns = client.get(f"/boards/{board['id']}/columns").json()
+    assert [(c["id"], c["position"]) for c in columns] == [(ids[2], 1), (ids[1], 2), (ids[0], 3)]
+    # Versionen steigen mit (optimistisches Locking der Spalten)
+    assert all(c["version"] == 2 for c in columns)
+
+
+@pytest.mark.parametrize("order", [lambda ids: ids[:2], lambda ids: ids + ids[:1], lambda ids: ids[:2] + [999999]])
+def test_column_order_must_list_each_column_once(client, board, order):
+    ids = [column["id"] for column in board["columns"]]
+    response = client.put(f"/boards/{board['id']}/column-order", json={"column_ids": order(ids)})
+    assert response.status_code == 400
+    positions = [c["position"] for c in client.get(f"/boards/{board['id']}/columns").json()]
+    assert positions == [0, 1, 2]
@@ -0,0 +1,60 @@
+import time
+
+from app import cache
+
+
+def _hits(client, name):
+    return client.get("/metrics/cache").json()["hits"].get(name, 0)
+
+
+def test_board_list_is_cached_until_a_board_changes(client, board):
+    client.get("/boards/")
+    hits = _hits(client, "boards")
+    client.get("/boards/")
+    assert _hits(client, "boards") == hits + 1
+
+    client.patch(f"/boards/{board['id']}", json={"name": "umbenannt"})
+    names = {b["id"]: b["name"] for b in client.get("/boards/").json()}
+    assert names[board["id"]] == "umbenannt"
+
+
+def test_columns_follow_column_changes(client, board):
+    url = f"/boards/{board['id']}/columns"
+    assert len(client.get(url).json()) == 3
+    client.post("/columns/", json={"title": "neu", "position": 3, "board_id": board["id"]})
+    assert [c["title"] for c in client.get(url).json()] == ["C0", "C1", "C2", "neu"]
+
+
+def test_card_changes_invalidate_only_their_board(client, board, make_card):
+    other = client.post("/boards/", json={"name": "anderes"}).json()
+    client.get(f"/boards/{other['id']}/metrics")
+    client.get(f"/boards/{board['id']}/metrics")
+    hits = _hits(client, "metrics:30")
+
+    make_card(board["columns"][0]["id"])
+    client.get(f"/boards/{other['id']}/metrics")
+    metrics = client.get(f"/boards/{board['id']}/metrics").json()
+    assert _hits(client, "metrics:30") == hits + 1
+    assert metrics["columns"][0]["wip"] == 1
+
+
+def test_user_list_follows_user_changes(client, user):
+    names = {u["id"]: u["name"] for u in client.get("/users/").json()}
+    assert names[user["id"]] == user["name"]
+    client.post("/users/", json={"name": f"{user['name']}-zwei", "password": "pw"})
+    assert f"{user['name']}-zwei" in {u["name"] for u in client.get("/users/").json()}
+
+
+def test_memory_backend_evicts_and_expires(monkeypatch):
+    backend = cache.MemoryBackend(max_entries=2, ttl=10.0)
+    for key in ("a", "b", "c"):
+        backend.set(key, key.encode())
+    assert (backend.get("a"), backend.get("c")) == (None, b"c")
+
+    now = time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 11)
+    assert backend.get("c") is None
+
+    generation = backend.generation("board:1")
+    backend.bump("board:1")
+    assert backend.generation("board:1") == generation + 1
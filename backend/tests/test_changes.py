@@ -0,0 +1,91 @@
+"""Änderungsprotokoll und Delta-Sync (GET /boards/{id}/changes), inkl. Tombstones."""
+from app import changes
+
+
+def _changes(client, board_id, since=0):
+    response = client.get(f"/boards/{board_id}/changes", params={"since": since})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _deleted(delta):
+    return {(item["entity"], item["id"]) for item in delta["deleted"]}
+
+
+def test_full_sync_from_zero(client, board, make_card):
+    card = make_card(board["columns"][0]["id"])
+    delta = _changes(client, board["id"])
+    assert delta["board"]["id"] == board["id"]
+    assert [column["id"] for column in delta["columns"]] == [column["id"] for column in board["columns"]]
+    assert [item["id"] for item in delta["cards"]] == [card["id"]]
+    assert delta["deleted"] == []
+    assert not delta["has_more"]
+
+
+def test_delta_contains_only_newer_changes(client, board, make_card):
+    first = make_card(board["columns"][0]["id"], "eins")
+    second = make_card(board["columns"][0]["id"], "zwei")
+    cursor = _changes(client, board["id"])["cursor"]
+
+    client.patch(f"/cards/{second['id']}", json={"title": "zwei!"})
+    delta = _changes(client, board["id"], cursor)
+    assert [(item["id"], item["title"]) for item in delta["cards"]] == [(second["id"], "zwei!")]
+    assert delta["columns"] == [] and delta["board"] is None
+    assert delta["cursor"] > cursor
+    assert first["id"] not in {item["id"] for item in delta["cards"]}
+
+    # Nichts Neues: Cursor bleibt stehen
+    assert _changes(client, board["id"], delta["cursor"])["cursor"] == delta["cursor"]
+
+
+def test_deleted_card_becomes_tombstone(client, board, make_card):
+    card = make_card(board["columns"][0]["id"])
+    cursor = _changes(client, board["id"])["cursor"]
+
+    client.patch(f"/cards/{card['id']}", json={"title": "geändert"})
+    assert client.delete(f"/cards/{card['id']}").status_code == 204
+
+    # Nur die letzte Operation zählt: kein Upsert mehr, nur der Tombstone
+    delta = _changes(client, board["id"], cursor)
+    assert delta["cards"] == []
+    assert _deleted(delta) == {("card", card["id"])}
+
+
+def test_deleted_column_has_tombstones_for_its_cards(client, board, make_card):
+    column_id = board["columns"][1]["id"]
+    cards = [make_card(column_id)["id"] for _ in range(3)]
+    cursor = _changes(client, board["id"])["cursor"]
+
+    assert client.delete(f"/columns/{column_id}").status_code == 204
+    delta = _changes(client, board["id"], cursor)
+    assert _deleted(delta) == {("column", column_id)} | {("card", card_id) for card_id in cards}
+
+
+def test_card_moved_to_other_board_is_gone_from_old_board(client, board, make_card):
+    other = client.post("/boards/", json={"name": "Ziel"}).json()
+    target = client.post("/columns/", json={"title": "T", "position": 0, "board_id": other["id"]}).json()
+    card = make_card(board["columns"][0]["id"])
+    cursor = _changes(client, board["id"])["cursor"]
+
+    client.patch(f"/cards/{card['id']}", json={"column_id": target["id"]})
+    assert _deleted(_changes(client, board["id"], cursor)) == {("card", card["id"])}
+    assert [item["id"] for item in _changes(client, other["id"])["cards"]] == [card["id"]]
+
+
+def test_deleted_board_tombstone(client, board):
+    cursor = _changes(client, board["id"])["cursor"]
+    assert client.delete(f"/boards/{board['id']}").status_code == 204
+    assert ("board", board["id"]) in _deleted(_changes(client, board["id"], cursor))
+
+
+def test_pages_with_has_more(db, board, make_card):
+    for _ in range(5):
+        make_card(board["columns"][0]["id"])
+    seen, since = [], 0
+    while True:
+        delta = changes.get_changes(db, board["id"], since, limit=2)
+        seen.extend(card.id for card in delta["cards"])
+        since = delta["cursor"]
+        if not delta["has_more"]:
+            break
+    assert len(seen) == 5
@@ -0,0 +1,143 @@
+"""Mengenbasiertes Löschen (Spalte, Board) und Papierkorb (DELETE_MODE=trash)."""
+from datetime import datetime, timedelta
+
+from app import models, retention, trash
+from app.config import settings
+
+
+def _count(db, model, *conditions):
+    db.expire_all()
+    return db.query(model).filter(*conditions).count()
+
+
+def _fill(client, make_card, board, per_column=5):
+    cards = []
+    for column in board["columns"]:
+        for i in range(per_column):
+            card = make_card(column["id"], f"löschbar {column['title']} {i}")
+            client.patch(f"/cards/{card['id']}", json={"title": f"{card['title']}!"})
+            cards.append(card)
+    return cards
+
+
+def test_delete_column_removes_cards_and_history(client, db, board, make_card, hard_delete_mode):
+    cards = _fill(client, make_card, board)
+    column_id = board["columns"][0]["id"]
+    removed = [card["id"] for card in cards if card["column_id"] == column_id]
+    kept = [card["id"] for card in cards if card["column_id"] != column_id]
+
+    assert client.delete(f"/columns/{column_id}").status_code == 204
+    assert client.delete(f"/columns/{column_id}").status_code == 404
+
+    assert _count(db, models.KanbanColumn, models.KanbanColumn.id == column_id) == 0
+    assert _count(db, models.Card, models.Card.id.in_(removed)) == 0
+    assert _count(db, models.CardHistory, models.CardHistory.card_id.in_(removed)) == 0
+    assert _count(db, models.Card, models.Card.id.in_(kept)) == len(kept)
+    assert _count(db, models.CardHistory, models.CardHistory.card_id.in_(kept)) == 2 * len(kept)
+
+    # Tombstones für Spalte und Karten im Änderungsprotokoll
+    deleted = client.get(f"/boards/{board['id']}/changes").json()["deleted"]
+    assert {(item["entity"], item["id"]) for item in deleted} >= {("column", column_id)} | {
+        ("card", card_id) for card_id in removed
+    }
+
+
+def test_delete_board_removes_everything(client, db, board, make_card, hard_delete_mode):
+    cards = _fill(client, make_card, board, per_column=2)
+    card_ids = [card["id"] for card in cards]
+
+    assert client.delete(f"/boards/{board['id']}").status_code == 204
+    assert client.get(f"/boards/{board['id']}").status_code == 404
+
+    assert _count(db, models.KanbanColumn, models.KanbanColumn.board_id == board["id"]) == 0
+    assert _count(db, models.Card, models.Card.id.in_(card_ids)) == 0
+    assert _count(db, models.CardHistory, models.CardHistory.card_id.in_(card_ids)) == 0
+    assert client.get("/search", params={"q": "löschbar", "board_id": board["id"]}).json()["items"] == []
+
+
+def test_trash_hides_rows_until_purge(client, db, board, make_card, trash_mode):
+    cards = _fill(client, make_card, board, per_column=2)
+    card_ids = [card["id"] for card in cards]
+    single = cards[-1]["id"]
+    column_id = board["columns"][0]["id"]
+
+    assert client.delete(f"/cards/{single}").status_code == 204
+    assert client.delete(f"/columns/{column_id}").status_code == 204
+
+    # Sofort ausgeblendet, aber noch vorhanden
+    visible = client.get("/cards/", params={"board_id": board["id"]}).json()["items"]
+    assert single not in {card["id"] for card in visible}
+    assert all(card["column_id"] != column_id for card in visible)
+    assert column_id not in {column["id"] for column in client.get(f"/boards/{board['id']}/columns").json()}
+    assert _count(db, models.Card, models.Card.id.in_(card_ids)) == len(card_ids)
+    assert _count(db, models.Card, models.Card.id.in_(card_ids), models.Card.deleted_at.isnot(None)) == 3
+
+    # Vor Ablauf der Frist bleibt alles liegen
+    assert trash.purge(db) == {"cards": 0, "columns": 0, "boards": 0}
+
+    later = datetime.utcnow() + timedelta(hours=settings.trash_retention_hours, minutes=1)
+    purged = trash.purge(db, now=later)
+    assert purged["cards"] >= 3
+    assert purged["columns"] >= 1
+    assert _count(db, models.Card, models.Card.id.in_(card_ids)) == len(card_ids) - 3
+    assert _count(db, models.CardHistory, models.CardHistory.card_id == single) == 0
+    assert _count(db, models.KanbanColumn, models.KanbanColumn.id == column_id) == 0
+
+
+def test_trash_purges_deleted_board(client, db, board, make_card, trash_mode):
+    cards = _fill(client, make_card, board, per_column=1)
+
+    assert client.delete(f"/boards/{board['id']}").status_code == 204
+    assert client.get(f"/boards/{board['id']}").status_code == 404
+    assert _count(db, models.Board, models.Board.id == board["id"]) == 1
+
+    later = datetime.utcnow() + timedelta(hours=settings.trash_retention_hours, minutes=1)
+    trash.purge(db, now=later)
+    assert _count(db, models.Board, models.Board.id == board["id"]) == 0
+    assert _count(db, models.KanbanColumn, models.KanbanColumn.board_id == board["id"]) == 0
+    assert _count(db, models.Card, models.Card.id.in_([card["id"] for card in cards])) == 0
+
+
+def _actions(client, card_id):
+    response = client.get(f"/cards/{card_id}/history")
+    assert response.status_code == 200
+    return [(entry["action"], entry["field"]) for entry in response.json()["items"]]
+
+
+def test_hard_delete_archives_the_whole_trail(client, db, board, make_card, hard_delete_mode, archive):
+    card = make_card(board["columns"][0]["id"], "alt")
+    client.patch(f"/cards/{card['id']}", json={"title": "neu"})
+    client.patch(f"/cards/{card['id']}", json={"color": "red"})
+
+    assert client.delete(f"/cards/{card['id']}").status_code == 204
+    assert _count(db, models.Card, models.Card.id == card["id"]) == 0
+    assert _count(db, models.CardHistory, models.CardHistory.card_id == card["id"]) == 0
+    assert _actions(client, card["id"]) == [
+        ("delete", None), ("update", "color"), ("update", "title"), ("create", None)
+    ]
+
+
+def test_batch_delete_archives_unwritten_entries(client, board, make_card, hard_delete_mode, archive):
+    card = make_card(board["columns"][0]["id"], "alt")
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {"op": "update_card", "id": card["id"], "data": {"title": "neu"}},
+                {"op": "delete_card", "id": card["id"]},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    assert _actions(client, card["id"]) == [("delete", None), ("update", "title"), ("create", None)]
+
+
+def test_rolled_back_delete_archives_nothing(client, db, board, make_card, hard_delete_mode, archive):
+    card = make_card(board["columns"][0]["id"])
+    response = client.post(
+        "/batch",
+        json={"operations": [{"op": "delete_card", "id": card["id"]}, {"op": "delete_card", "id": 10**9}]},
+    )
+    assert response.status_code == 404
+    assert _actions(client, card["id"]) == [("create", None)]
+    assert retention.archive.read(db, card["id"], None, 10) == []
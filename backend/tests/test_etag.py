@@ -0,0 +1,51 @@
+"""Bedingte GETs: schwache ETags und 304 Not Modified."""
+from app import changes
+
+
+def test_column_cards_not_modified(client, board, make_card):
+    column_id = board["columns"][0]["id"]
+    make_card(column_id)
+
+    first = client.get(f"/columns/{column_id}/cards")
+    etag = first.headers["ETag"]
+    assert etag.startswith("W/")
+
+    again = client.get(f"/columns/{column_id}/cards", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+
+    # Nach einer Änderung gibt es wieder Daten und ein neues ETag
+    make_card(column_id, "zweite")
+    changed = client.get(f"/columns/{column_id}/cards", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert len(changed.json()) == 2
+    assert changed.headers["ETag"] != etag
+
+
+def test_board_lists_not_modified(client, board):
+    for path in ("/boards/", f"/boards/{board['id']}/columns"):
+        etag = client.get(path).headers["ETag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_boards_etag_follows_board_changes(client, board, make_card):
+    etag = client.get("/boards/").headers["ETag"]
+
+    # Karten ändern die Board-Liste nicht
+    make_card(board["columns"][0]["id"])
+    assert client.get("/boards/", headers={"If-None-Match": etag}).status_code == 304
+
+    client.patch(f"/boards/{board['id']}", json={"name": "umbenannt"})
+    changed = client.get("/boards/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert "umbenannt" in {item["name"] for item in changed.json()}
+    assert changed.headers["ETag"] != etag
+
+
+def test_list_version_counts_board_commits(client, db, board):
+    before = changes.list_version(db, changes.BOARDS_LIST)
+    client.post("/boards/", json={"name": "neu"})
+    client.delete(f"/boards/{board['id']}")
+    db.rollback()
+    assert changes.list_version(db, changes.BOARDS_LIST) == before + 2
@@ -0,0 +1,83 @@
+"""Write-Behind der Karten-History (HISTORY_MODE=queue, HistoryWriter)."""
+import json
+
+import pytest
+
+from app import history, models
+
+
+@pytest.fixture
+def writer(monkeypatch, tmp_path):
+    # Ohne Hintergrund-Thread: die Tests rufen flush() selbst auf
+    writer = history.HistoryWriter(str(tmp_path), batch_size=10_000, flush_seconds=60)
+    writer.spool_dir.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(history, "writer", writer)
+    return writer
+
+
+def _history(client, card_id):
+    return [(entry["action"], entry["field"]) for entry in client.get(f"/cards/{card_id}/history").json()["items"]]
+
+
+def _batch(writer, name, rows):
+    path = writer.spool_dir / name
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    return path
+
+
+def test_rows_are_written_on_flush(client, db, board, make_card, writer):
+    card = make_card(board["columns"][0]["id"])
+    client.patch(f"/cards/{card['id']}", json={"title": "neu"})
+    assert _history(client, card["id"]) == []
+    assert writer.pending == 2
+
+    writer.flush()
+    assert _history(client, card["id"]) == [("update", "title"), ("create", None)]
+    assert list(writer.spool_dir.iterdir()) == []
+
+
+def test_rows_of_deleted_cards_go_to_the_archive(client, db, board, make_card, writer, hard_delete_mode):
+    card = make_card(board["columns"][0]["id"])
+    client.patch(f"/cards/{card['id']}", json={"title": "neu"})
+    assert client.delete(f"/cards/{card['id']}").status_code == 204
+
+    writer.flush()
+    assert list(writer.spool_dir.iterdir()) == []
+    assert db.query(models.CardHistory).filter(models.CardHistory.card_id == card["id"]).count() == 0
+    assert _history(client, card["id"]) == [("delete", None), ("update", "title"), ("create", None)]
+
+
+def test_bad_batch_does_not_block_the_queue(client, db, board, make_card, writer):
+    card = make_card(board["columns"][0]["id"])
+    row = {"card_id": card["id"], "user_id": None, "field": None, "old_value": None,
+           "new_value": None, "created_at": "2024-01-01T00:00:00"}
+    # action ist NOT NULL: die Datenbank lehnt den Stapel ab
+    _batch(writer, "1-1.batch", [{**row, "action": None}])
+    _batch(writer, "1-2.batch", [{**row, "action": "import"}])
+
+    writer.flush()
+    assert ("import", None) in _history(client, card["id"])
+    for _ in range(history.MAX_BATCH_ATTEMPTS - 1):
+        writer.flush()
+    assert sorted(path.name for path in writer.spool_dir.iterdir()) == ["1-1.failed"]
+
+
+def test_truncated_last_line_is_skipped(client, board, make_card, writer):
+    card = make_card(board["columns"][0]["id"])
+    writer.flush()
+    path = _batch(writer, "1-3.batch", [{
+        "card_id": card["id"], "user_id": None, "action": "import", "field": None,
+        "old_value": None, "new_value": None, "created_at": "2024-01-01T00:00:00",
+    }])
+    path.write_text(path.read_text() + '{"card_id": ')
+
+    writer.flush()
+    assert list(writer.spool_dir.iterdir()) == []
+    assert _history(client, card["id"]) == [("create", None), ("import", None)]
+
+
+def test_journal_is_fsynced(client, board, make_card, writer, monkeypatch):
+    synced = []
+    monkeypatch.setattr(history.os, "fsync", synced.append)
+    make_card(board["columns"][0]["id"])
+    assert len(synced) == 1
@@ -0,0 +1,6 @@
+from app import index_audit
+
+
+def test_read_paths_use_indexes(tmp_path):
+    problems = index_audit.run(f"sqlite:///{tmp_path}/index_audit.db")
+    assert problems == [], "\n".join(problems)
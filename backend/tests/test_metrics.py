@@ -0,0 +1,64 @@
+from app import analytics
+
+
+def _metrics(client, board_id, **params):
+    response = client.get(f"/boards/{board_id}/metrics", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _move(client, card, column):
+    response = client.patch(f"/cards/{card['id']}", json={"column_id": column["id"]})
+    assert response.status_code == 200, response.text
+
+
+def test_wip_and_flow_times(client, board, make_card):
+    todo, doing, done = board["columns"]
+    cards = [make_card(todo["id"], f"k{n}") for n in range(4)]
+    _move(client, cards[0], doing)
+    _move(client, cards[1], doing)
+    _move(client, cards[1], done)
+    _move(client, cards[2], done)
+
+    metrics = _metrics(client, board["id"], days=7)
+    assert len(metrics["days"]) == 7
+    assert [(c["title"], c["wip"]) for c in metrics["columns"]] == [("C0", 1), ("C1", 1), ("C2", 2)]
+    for column in metrics["columns"]:
+        assert column["counts"][-1] == column["wip"]
+        assert column["counts"][:-1] == [0] * 6
+
+    # Zwei Karten fertig; nur die über C1 hat eine Cycle Time ab C1,
+    # die direkt verschobene beginnt erst mit dem Eintritt in C2
+    assert metrics["lead_time"]["count"] == 2
+    assert metrics["cycle_time"]["count"] == 2
+    assert metrics["lead_time"]["p50"] >= 0
+
+
+def test_deleted_cards_leave_the_flow(client, board, make_card):
+    card = make_card(board["columns"][0]["id"])
+    make_card(board["columns"][0]["id"])
+    client.delete(f"/cards/{card['id']}")
+    assert _metrics(client, board["id"])["columns"][0]["wip"] == 1
+
+
+def test_empty_board(client, board):
+    metrics = _metrics(client, board["id"])
+    assert [c["wip"] for c in metrics["columns"]] == [0, 0, 0]
+    assert metrics["lead_time"] == {"count": 0, "mean": None, "p50": None, "p85": None, "p95": None}
+
+
+def test_unknown_board(client):
+    assert client.get("/boards/999999/metrics").status_code == 404
+
+
+def test_rebuild_matches_incremental_tables(client, db, board, make_card, hard_delete_mode):
+    todo, doing, done = board["columns"]
+    cards = [make_card(todo["id"], f"k{n}") for n in range(3)]
+    _move(client, cards[0], doing)
+    _move(client, cards[0], done)
+    _move(client, cards[1], doing)
+
+    before = analytics.board_metrics(db, board["id"], 7)
+    analytics.rebuild(db)
+    db.commit()
+    assert analytics.board_metrics(db, board["id"], 7) == before
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.pagination import decode_cursor, encode_cursor, split_page
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30)
+    cursor = encode_cursor([created_at, 42, None])
+    assert "=" not in cursor
+    assert decode_cursor(cursor, datetime, int, int) == (created_at, 42, None)
+
+
+@pytest.mark.parametrize("cursor", ["kaputt", encode_cursor([1, 2])])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, int)
+    assert exc.value.status_code == 400
+
+
+def test_split_page():
+    assert split_page([1, 2], 2, lambda row: [row]) == ([1, 2], None)
+    page, cursor = split_page([1, 2, 3], 2, lambda row: [row])
+    assert page == [1, 2]
+    assert decode_cursor(cursor, int) == (2,)
+
+
+def _pages(client, **params):
+    cursor = None
+    while True:
+        response = client.get("/cards/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        yield body["items"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return
+
+
+def test_card_pages_cover_all_cards(client, board, make_card):
+    column_ids = [column["id"] for column in board["columns"]]
+    created = [make_card(column_ids[i % 3], f"k{i}")["id"] for i in range(23)]
+
+    pages = list(_pages(client, board_id=board["id"], limit=5))
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    seen = [card["id"] for page in pages for card in page]
+    assert sorted(seen) == sorted(created)
+
+
+def test_keyset_cursor_is_stable_under_inserts(client, board, make_card):
+    column_id = board["columns"][0]["id"]
+    created = [make_card(column_id, f"k{i}")["id"] for i in range(6)]
+
+    first = client.get("/cards/", params={"board_id": board["id"], "limit": 3}).json()
+    # Neue Karten zwischen zwei Seiten verschieben den Rest nicht
+    make_card(column_id, "neu")
+    second = client.get(
+        "/cards/",
+        params={"board_id": board["id"], "limit": 3, "cursor": first["next_cursor"]},
+    ).json()
+    first_ids = [card["id"] for card in first["items"]]
+    second_ids = [card["id"] for card in second["items"]]
+    assert first_ids + second_ids == created
+
+
+def test_invalid_cursor_is_rejected(client, board):
+    response = client.get("/cards/", params={"board_id": board["id"], "cursor": "kaputt"})
+    assert response.status_code == 400
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from app import ranking
+
+
+def test_rank_between_open_bounds():
+    first = ranking.rank_between(None, None)
+    assert ranking.rank_between(None, first) < first < ranking.rank_between(first, None)
+
+
+def test_rank_between_keeps_order_for_random_inserts():
+    rng = random.Random(7)
+    ranks = [ranking.rank_between(None, None)]
+    for _ in range(500):
+        i = rng.randint(0, len(ranks))
+        before = ranks[i - 1] if i > 0 else None
+        after = ranks[i] if i < len(ranks) else None
+        rank = ranking.rank_between(before, after)
+        assert (before is None or before < rank) and (after is None or rank < after)
+        assert not rank.endswith("0")
+        ranks.insert(i, rank)
+    assert ranks == sorted(ranks)
+    assert len(set(ranks)) == len(ranks)
+
+
+def test_rank_between_same_neighbours():
+    # Immer wieder direkt hinter dieselbe Karte einfügen
+    before, after = "a", "b"
+    for _ in range(100):
+        rank = ranking.rank_between(before, after)
+        assert before < rank < after
+        after = rank
+
+
+def test_rank_between_append_does_not_grow():
+    rank = None
+    for _ in range(1000):
+        rank = ranking.rank_between(rank, None)
+    assert len(rank) == ranking.STEP_WIDTH
+    assert not ranking.needs_rebalance(rank)
+
+
+def test_rank_between_rejects_invalid_interval():
+    with pytest.raises(ValueError):
+        ranking.rank_between("b", "a")
+    with pytest.raises(ValueError):
+        ranking.rank_between("a", "a")
+
+
+def test_spread_ranks_sorted_and_short():
+    ranks = ranking.spread_ranks(1000)
+    assert ranks == sorted(ranks)
+    assert len(set(ranks)) == 1000
+    assert max(len(rank) for rank in ranks) < ranking.REBALANCE_LENGTH
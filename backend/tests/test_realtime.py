@@ -0,0 +1,126 @@
+"""BoardHub mit InProcessBroker: Zustellung, Resync bei vollem Puffer, Commits."""
+import asyncio
+
+import pytest
+
+from app import realtime
+
+
+@pytest.fixture
+def heartbeat(monkeypatch):
+    # Kurzer Heartbeat: ein leeres Event heißt "Puffer leer"
+    monkeypatch.setattr(realtime, "HEARTBEAT_SECONDS", 0.05)
+
+
+async def _drain(stream) -> list[dict]:
+    events = []
+    while True:
+        event = await stream.__anext__()
+        if not event:
+            return events
+        events.append(event)
+
+
+async def _subscribed(hub: realtime.BoardHub, board_id: int):
+    stream = hub.subscribe(board_id)
+    # Erstes __anext__ registriert die Queue; es liefert den ersten Heartbeat
+    assert await stream.__anext__() == {}
+    return stream
+
+
+def test_events_reach_board_subscribers(heartbeat):
+    async def scenario():
+        hub = realtime.BoardHub(realtime.InProcessBroker())
+        await hub.start()
+        try:
+            stream = await _subscribed(hub, 1)
+            hub._on_commit([
+                {"board_id": 1, "op": "card", "seq": 1},
+                {"board_id": 2, "op": "card", "seq": 2},
+                {"board_id": 1, "op": "column", "seq": 3},
+            ])
+            events = await _drain(stream)
+            await stream.aclose()
+            assert [event["seq"] for event in events] == [1, 3]
+            assert hub._subscribers == {}
+        finally:
+            await hub.stop()
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_turns_into_resync(heartbeat):
+    async def scenario():
+        hub = realtime.BoardHub(realtime.InProcessBroker())
+        await hub.start()
+        try:
+            stream = await _subscribed(hub, 1)
+            hub._on_commit([
+                {"board_id": 1, "op": "card", "seq": seq}
+                for seq in range(realtime.SUBSCRIBER_QUEUE_SIZE + 10)
+            ])
+            events = await _drain(stream)
+            await stream.aclose()
+            # Alter Puffer verworfen, danach nur noch das Resync und der Rest
+            assert events[0] == {"board_id": 1, "op": "resync"}
+            assert [event["seq"] for event in events[1:]] == list(
+                range(realtime.SUBSCRIBER_QUEUE_SIZE + 1, realtime.SUBSCRIBER_QUEUE_SIZE + 10)
+            )
+        finally:
+            await hub.stop()
+
+    asyncio.run(scenario())
+
+
+def test_event_stream_sends_resync(monkeypatch, heartbeat):
+    async def scenario():
+        hub = realtime.BoardHub(realtime.InProcessBroker())
+        monkeypatch.setattr(realtime, "hub", hub)
+        await hub.start()
+        try:
+            stream = realtime.event_stream(7)
+            assert await stream.__anext__() == "retry: 3000\n\n"
+            assert await stream.__anext__() == ": heartbeat\n\n"
+            hub._on_commit([
+                {"board_id": 7, "op": "upsert", "seq": seq}
+                for seq in range(realtime.SUBSCRIBER_QUEUE_SIZE + 1)
+            ])
+            first = await stream.__anext__()
+            await stream.aclose()
+            assert first.startswith("event: resync\ndata: ")
+        finally:
+            await hub.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stopped_hub_publishes_nothing():
+    published = []
+    broker = realtime.InProcessBroker()
+    broker.publish = published.append
+    hub = realtime.BoardHub(broker)
+    hub._on_commit([{"board_id": 1, "op": "card", "seq": 1}])
+    assert published == []
+
+
+def test_commits_are_published(client, board, heartbeat):
+    async def scenario():
+        hub = realtime.BoardHub(realtime.InProcessBroker())
+        await hub.start()
+        try:
+            stream = await _subscribed(hub, board["id"])
+            # Der Commit läuft im Thread des TestClient
+            card = (
+                await asyncio.to_thread(
+                    client.post, "/cards/", json={"title": "live", "column_id": board["columns"][0]["id"]}
+                )
+            ).json()
+            events = await _drain(stream)
+            await stream.aclose()
+            assert [(event["entity"], event["op"], event["ids"]) for event in events] == [
+                ("card", "upsert", [card["id"]])
+            ]
+        finally:
+            await hub.stop()
+
+    asyncio.run(scenario())
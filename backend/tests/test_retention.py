@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from app import models, retention
+
+
+def _backdate(db, card_id, *ages):
+    """Setzt created_at der History einer Karte (älteste zuerst) auf now - age."""
+    entries = (
+        db.query(models.CardHistory)
+        .filter(models.CardHistory.card_id == card_id)
+        .order_by(models.CardHistory.created_at, models.CardHistory.id)
+        .all()
+    )
+    now = datetime.utcnow()
+    for entry, age in zip(entries, ages):
+        entry.created_at = now - age
+    db.commit()
+
+
+def _history(client, card_id, limit=2):
+    entries, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/cards/{card_id}/history", params=params).json()
+        entries += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return entries
+
+
+def test_compact_merges_edit_runs(client, db, board, make_card):
+    card = make_card(board["columns"][0]["id"], "t0")
+    for title in ("t1", "t2", "t3"):
+        client.patch(f"/cards/{card['id']}", json={"title": title})
+    client.patch(f"/cards/{card['id']}", json={"color": "red"})
+    two_days = timedelta(days=2)
+    _backdate(db, card["id"], *(two_days - timedelta(minutes=n) for n in range(5)))
+
+    assert retention.compact(db) >= 2
+    entries = _history(client, card["id"], limit=10)
+    assert [(e["action"], e["field"], e["old_value"], e["new_value"]) for e in entries] == [
+        ("update", "color", None, "red"),
+        ("update", "title", "t0", "t3"),
+        ("create", None, None, "t0"),
+    ]
+
+
+def test_compact_keeps_recent_edits(client, db, board, make_card):
+    card = make_card(board["columns"][0]["id"], "t0")
+    for title in ("t1", "t2"):
+        client.patch(f"/cards/{card['id']}", json={"title": title})
+
+    retention.compact(db)
+    assert len(_history(client, card["id"], limit=10)) == 3
+
+
+def test_history_pages_across_archive(client, db, board, make_card, archive):
+    card = make_card(board["columns"][0]["id"], "t0")
+    for n in range(1, 6):
+        client.patch(f"/cards/{card['id']}", json={"title": f"t{n}"})
+    before = [e["new_value"] for e in _history(client, card["id"], limit=10)]
+    old = timedelta(days=200)
+    _backdate(db, card["id"], *(old - timedelta(minutes=n) for n in range(3)))
+
+    assert retention.archive_old_entries(db) >= 3
+    db.expire_all()
+    assert db.query(models.CardHistory).filter(models.CardHistory.card_id == card["id"]).count() == 3
+    assert len(archive.read(db, card["id"], None, 10)) == 3
+
+    entries = _history(client, card["id"], limit=2)
+    assert [e["new_value"] for e in entries] == before
+    assert len({e["id"] for e in entries}) == 6
+
+
+def test_file_archive_reads_appends_and_drops_duplicates(tmp_path):
+    archive = retention.FileArchive(str(tmp_path))
+    now = datetime(2024, 1, 1)
+
+    def row(id, card_id, minutes):
+        return {
+            "id": id, "card_id": card_id, "user_id": None, "action": "update", "field": "title",
+            "old_value": None, "new_value": str(id), "created_at": now + timedelta(minutes=minutes),
+        }
+
+    archive.write(None, [row(1, 5, 0), row(2, 5, 1), row(3, 6, 0)])
+    assert [e.id for e in archive.read(None, 5, None, 10)] == [2, 1]
+
+    # Angehängtes Member (auch doppelt geschriebene Zeilen) wird gesehen
+    archive.write(None, [row(2, 5, 1), row(4, 5, 2)])
+    assert [e.id for e in archive.read(None, 5, None, 10)] == [4, 2, 1]
+    assert [e.id for e in archive.read(None, 5, (now + timedelta(minutes=2), 4), 1)] == [2]
+    assert archive.read(None, 5 + retention.ARCHIVE_BUCKET_SIZE, None, 10) == []
+    assert archive.newest(None) == {5: now + timedelta(minutes=2), 6: now}
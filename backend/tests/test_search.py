@@ -0,0 +1,78 @@
+import uuid
+
+import pytest
+
+from app import search
+
+
+@pytest.fixture
+def word():
+    """Ein Begriff, den nur die Karten dieses Tests enthalten."""
+    return "w" + uuid.uuid4().hex[:12]
+
+
+def _search(client, **params):
+    response = client.get("/search", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _all_pages(client, **params):
+    titles, pages, cursor = [], 0, None
+    while True:
+        page = _search(client, **params, **({"cursor": cursor} if cursor else {}))
+        titles += [card["title"] for card in page["items"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return titles, pages
+
+
+def test_title_hits_rank_first(client, board, make_card, word):
+    column_id = board["columns"][0]["id"]
+    make_card(column_id, "Beschreibung", description=f"enthält {word}")
+    make_card(column_id, f"{word} im Titel")
+    make_card(column_id, "nichts")
+
+    titles = [card["title"] for card in _search(client, q=word)["items"]]
+    assert titles == [f"{word} im Titel", "Beschreibung"]
+
+
+def test_last_term_matches_prefix(client, board, make_card, word):
+    make_card(board["columns"][0]["id"], f"{word}xyz")
+    assert [card["title"] for card in _search(client, q=word)["items"]] == [f"{word}xyz"]
+
+
+def test_pages_are_stable_and_complete(client, board, make_card, word):
+    column_id = board["columns"][0]["id"]
+    for n in range(7):
+        make_card(column_id, f"{word} {n}")
+
+    first = _search(client, q=word)["items"]
+    titles, pages = _all_pages(client, q=word, limit=3)
+    assert titles == [card["title"] for card in first]
+    assert pages == 3
+
+
+def test_only_newest_matches_are_ranked(client, board, make_card, word, monkeypatch):
+    monkeypatch.setattr(search, "MAX_CANDIDATES", 3)
+    column_id = board["columns"][0]["id"]
+    for n in range(5):
+        make_card(column_id, f"{word} {n}")
+
+    titles, pages = _all_pages(client, q=word, limit=2)
+    assert sorted(titles) == [f"{word} 2", f"{word} 3", f"{word} 4"]
+    assert pages == 2
+
+
+def test_deleted_cards_are_not_found(client, board, make_card, word):
+    card = make_card(board["columns"][0]["id"], word)
+    client.delete(f"/cards/{card['id']}")
+    assert _search(client, q=word)["items"] == []
+
+
+def test_edit_replaces_index_entry(client, board, make_card, word):
+    card = make_card(board["columns"][0]["id"], f"{word}alt")
+    client.patch(f"/cards/{card['id']}", json={"title": f"{word}neu"})
+    assert [c["title"] for c in _search(client, q=f"{word}neu")["items"]] == [f"{word}neu"]
+    assert _search(client, q=f"{word}alt")["items"] == []
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from passlib.hash import pbkdf2_sha256
+
+from app import models, security
+
+
+def test_hash_and_verify_in_pool():
+    password_hash = asyncio.run(security.hash_password("geheim"))
+    assert asyncio.run(security.verify_password("geheim", password_hash)) == (True, None)
+    assert asyncio.run(security.verify_password("falsch", password_hash)) == (False, None)
+
+
+def test_full_pool_answers_429():
+    pool = security.HashPool(workers=1, max_pending=0)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(pool.run(security._hash, "geheim"))
+    assert error.value.status_code == 429
+    assert pool.pending == 0
+
+
+def test_login_rehashes_outdated_hash(client, db, login):
+    user, _ = login()
+    outdated = pbkdf2_sha256.using(rounds=1000).hash(user["password"])
+    db.query(models.User).filter(models.User.id == user["id"]).update({"password_hash": outdated})
+    db.commit()
+
+    response = client.post("/login", json={"name": user["name"], "password": user["password"]})
+    assert response.status_code == 200, response.text
+    db.expire_all()
+    new_hash = db.get(models.User, user["id"]).password_hash
+    assert new_hash != outdated
+    assert security.pwd_context.verify(user["password"], new_hash)
+    assert not security.pwd_context.needs_update(new_hash)
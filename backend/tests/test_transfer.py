@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+
+import pytest
+
+
+def _content(client, board_id):
+    """Board-Inhalt ohne IDs: Spalten mit ihren Karten in Reihenfolge."""
+    full = client.get(f"/boards/{board_id}/full").json()
+    return full["name"], [
+        (
+            column["title"],
+            column["position"],
+            [(card["title"], card["description"], card["rank"], card["assignee_id"]) for card in column["cards"]],
+        )
+        for column in full["columns"]
+    ]
+
+
+def _types(text, fmt):
+    if fmt == "csv":
+        return [row["type"] for row in csv.DictReader(io.StringIO(text))]
+    return [json.loads(line)["type"] for line in text.rstrip("\n").split("\n")]
+
+
+@pytest.fixture
+def filled_board(client, board, make_card, user):
+    first, second = board["columns"][0]["id"], board["columns"][1]["id"]
+    cards = [
+        make_card(first, "eins", description="mit, Komma\nund Zeilenumbruch", assignee_id=user["id"]),
+        make_card(first, "zwei"),
+        make_card(second, "drei"),
+    ]
+    # Reihenfolge ändern und History erzeugen
+    client.patch(f"/cards/{cards[1]['id']}", json={"before_card_id": cards[0]["id"]})
+    client.patch(f"/cards/{cards[2]['id']}", json={"title": "drei!"})
+    return board
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_export_then_import(client, filled_board, fmt):
+    exported = client.get(f"/boards/{filled_board['id']}/export", params={"format": fmt})
+    assert exported.status_code == 200
+
+    imported = client.post("/boards/import", params={"format": fmt}, content=exported.content)
+    assert imported.status_code == 201, imported.text
+    result = imported.json()
+    assert (result["columns"], result["cards"]) == (3, 3)
+    assert result["history"] == _types(exported.text, fmt).count("history")
+    assert result["board_id"] != filled_board["id"]
+
+    assert _content(client, result["board_id"]) == _content(client, filled_board["id"])
+
+    # Importierte Karten haben History und tauchen im Änderungsprotokoll auf
+    changes = client.get(f"/boards/{result['board_id']}/changes").json()
+    assert len(changes["cards"]) == 3
+    assert len(changes["columns"]) == 3
+
+
+def test_ndjson_export_order(client, filled_board):
+    types = _types(client.get(f"/boards/{filled_board['id']}/export").text, "ndjson")
+    assert types == sorted(types, key=["board", "column", "card", "history"].index)
+    assert types.count("board") == 1
+
+
+def test_import_error_names_line(client):
+    body = b'{"type": "board", "id": 1, "name": "B"}\n{"type": "column", "id": "x"}\n'
+    response = client.post("/boards/import", content=body)
+    assert response.status_code == 400
+    assert response.json()["detail"]["line"] == 2
+
+
+def _board_export(cards, assignee_id=None):
+    lines = [
+        {"type": "board", "id": 1, "name": "Import"},
+        {"type": "column", "id": 1, "title": "Spalte", "position": 0},
+    ]
+    lines += [
+        {"type": "card", "id": n, "column_id": 1, "title": f"Karte {n}", "assignee_id": assignee_id}
+        for n in range(1, cards + 1)
+    ]
+    return "".join(json.dumps(line) + "\n" for line in lines).encode()
+
+
+def test_import_drops_unknown_assignees(client, user):
+    for assignee_id, expected in ((user["id"], user["id"]), (999999, None)):
+        result = client.post("/boards/import", content=_board_export(2, assignee_id)).json()
+        full = client.get(f"/boards/{result['board_id']}/full").json()
+        assert [card["assignee_id"] for card in full["columns"][0]["cards"]] == [expected, expected]
+
+
+def test_import_buffers_one_event_per_entity(client, monkeypatch):
+    from app import changes, transfer
+
+    monkeypatch.setattr(transfer, "IMPORT_BATCH", 2)
+    monkeypatch.setattr(changes, "MAX_EVENT_IDS", 3)
+    committed = []
+    monkeypatch.setattr(changes, "_commit_listeners", [*changes._commit_listeners, committed.extend])
+
+    result = client.post("/boards/import", content=_board_export(5)).json()
+    assert result["cards"] == 5
+    events = [event for event in committed if event["board_id"] == result["board_id"]]
+    # Drei Kartenblöcke, aber ein Event ohne ID-Liste
+    assert [(event["entity"], event["ids"] is None) for event in events] == [
+        ("board", False), ("column", False), ("card", True)
+    ]
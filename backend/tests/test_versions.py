@@ -0,0 +1,48 @@
+"""Optimistische Sperre über version bzw. If-Match."""
+
+
+def test_update_card_increments_version(client, board, make_card):
+    card = make_card(board["columns"][0]["id"])
+    response = client.patch(f"/cards/{card['id']}", json={"title": "neu", "version": card["version"]})
+    assert response.status_code == 200
+    assert response.json()["version"] == card["version"] + 1
+    assert response.headers["ETag"] == f'"{card["version"] + 1}"'
+
+
+def test_stale_version_is_conflict(client, board, make_card):
+    card = make_card(board["columns"][0]["id"])
+    client.patch(f"/cards/{card['id']}", json={"title": "erste"})
+
+    response = client.patch(f"/cards/{card['id']}", json={"title": "zweite", "version": card["version"]})
+    assert response.status_code == 409
+    assert client.get("/cards/", params={"column_id": card["column_id"]}).json()["items"][0]["title"] == "erste"
+
+
+def test_stale_if_match_is_conflict(client, board, make_card):
+    card = make_card(board["columns"][0]["id"])
+    updated = client.patch(f"/cards/{card['id']}", json={"title": "erste"})
+
+    stale = client.patch(
+        f"/cards/{card['id']}", json={"title": "zweite"}, headers={"If-Match": f'"{card["version"]}"'}
+    )
+    assert stale.status_code == 409
+
+    current = client.patch(
+        f"/cards/{card['id']}", json={"title": "zweite"}, headers={"If-Match": updated.headers["ETag"]}
+    )
+    assert current.status_code == 200
+
+
+def test_invalid_if_match(client, board, make_card):
+    card = make_card(board["columns"][0]["id"])
+    response = client.patch(f"/cards/{card['id']}", json={"title": "x"}, headers={"If-Match": "abc"})
+    assert response.status_code == 400
+
+
+def test_stale_column_version_is_conflict(client, board):
+    column = board["columns"][0]
+    assert client.patch(f"/columns/{column['id']}", json={"title": "A"}).status_code == 200
+    response = client.patch(
+        f"/columns/{column['id']}", json={"title": "B"}, headers={"If-Match": str(column["version"])}
+    )
+    assert response.status_code == 409
@@ -1,9 +1,20 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import axios from "axios";
 import Modal from "./components/modal";
 
 const API_URL = import.meta.env.VITE_API_URL || "/api";
 
+// Einträge pro Seite im Verlauf einer Karte
+const HISTORY_PAGE_SIZE = 50;
+
+// Zeilen per id ersetzen bzw. ergänzen (Delta-Sync)
+const mergeById = (list, updates) => {
+  const byId = new Map(updates.map((item) => [item.id, item]));
+  const merged = list.map((item) => byId.get(item.id) ?? item);
+  const known = new Set(list.map((item) => item.id));
+  return [...merged, ...updates.filter((item) => !known.has(item.id))];
+};
+
 const iconButtonStyle = {
   border: "none",
   background: "transparent",
@@ -158,6 +169,11 @@ function App() {
       return null;
     }
   });
+  // Session-Token aus /login (Authorization: Bearer ...)
+  const [accessToken, setAccessToken] = useState(() => {
+    if (typeof window === "undefined") return null;
+    return window.localStorage.getItem("accessToken");
+  });
   const [authError, setAuthError] = useState("");
 
   const [showRegisterModal, setShowRegisterModal] = useState(false);
@@ -208,6 +224,8 @@ function App() {
 
   // Card-History
   const [cardHistory, setCardHistory] = useState([]);
+  // Cursor für ältere History-Einträge (null = alles geladen)
+  const [cardHistoryCursor, setCardHistoryCursor] = useState(null);
 
   // Ansicht: Boards oder Admin
   const [viewMode, setViewMode] = useState("boards");
@@ -233,16 +251,103 @@ function App() {
     }
   }, [currentUser]);
 
+  useEffect(() => {
+    if (accessToken) {
+      axios.defaults.headers.common["Authorization"] = `Bearer ${accessToken}`;
+    } else {
+      delete axios.defaults.headers.common["Authorization"];
+    }
+  }, [accessToken]);
+
+  // Abgelaufenes / ungültiges Token verwerfen
+  useEffect(() => {
+    const id = axios.interceptors.response.use(undefined, (error) => {
+      const url = error.config?.url || "";
+      if (error.response?.status === 401 && !url.endsWith("/login")) {
+        persistAccessToken(null);
+      }
+      return Promise.reject(error);
+    });
+    return () => axios.interceptors.response.eject(id);
+  }, []);
+
+  // Stand des Änderungsprotokolls für den Delta-Sync
+  const syncCursor = useRef(0);
+
   // -------- Daten laden --------
   const loadColumnsAndCards = async (boardId) => {
-    const colRes = await axios.get(`${API_URL}/boards/${boardId}/columns`);
-    const cardRes = await axios.get(`${API_URL}/cards/`);
-    setColumns(colRes.data);
-    setCards(cardRes.data);
+    // Board-Snapshot: Spalten inkl. Karten in einem Request
+    const res = await axios.get(`${API_URL}/boards/${boardId}/full`);
+    const boardColumns = res.data.columns;
+    syncCursor.current = res.data.cursor;
+    setColumns(boardColumns.map(({ cards: _cards, ...col }) => col));
+    setCards(boardColumns.flatMap((col) => col.cards));
     setLoading(false);
   };
 
+  // Nur die seit dem letzten Stand geänderten Zeilen nachladen
+  const applyBoardChanges = async (boardId) => {
+    let hasMore = true;
+    while (hasMore) {
+      const res = await axios.get(`${API_URL}/boards/${boardId}/changes`, {
+        params: { since: syncCursor.current },
+      });
+      const delta = res.data;
+      const gone = (entity) =>
+        new Set(delta.deleted.filter((d) => d.entity === entity).map((d) => d.id));
+      const goneColumns = gone("column");
+      const goneCards = gone("card");
+
+      setColumns((prev) =>
+        mergeById(prev, delta.columns).filter((c) => !goneColumns.has(c.id))
+      );
+      setCards((prev) =>
+        mergeById(prev, delta.cards).filter(
+          (c) => !goneCards.has(c.id) && !goneColumns.has(c.column_id)
+        )
+      );
+      if (delta.board) {
+        setBoards((prev) => mergeById(prev, [delta.board]));
+      }
+      syncCursor.current = delta.cursor;
+      hasMore = delta.has_more;
+    }
+  };
+
+  // -------- Live-Updates (Server-Sent Events) --------
   useEffect(() => {
+    if (!currentBoardId || !accessToken) return undefined;
+
+    // EventSource kann keine Header setzen: Token als Query-Parameter
+    const source = new EventSource(
+      `${API_URL}/boards/${currentBoardId}/events?access_token=${encodeURIComponent(accessToken)}`
+    );
+    let syncing = Promise.resolve();
+    const onChange = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.seq !== undefined && data.seq <= syncCursor.current) return;
+      syncing = syncing
+        .then(() => applyBoardChanges(currentBoardId))
+        .catch((e) => console.error(e));
+    };
+    const onResync = () => {
+      syncing = syncing
+        .then(() => loadColumnsAndCards(currentBoardId))
+        .catch((e) => console.error(e));
+    };
+
+    source.addEventListener("upsert", onChange);
+    source.addEventListener("delete", onChange);
+    source.addEventListener("resync", onResync);
+    return () => source.close();
+  }, [currentBoardId, accessToken]);
+
+  useEffect(() => {
+    // Ohne Token antwortet die API mit 401: erst nach dem Login laden
+    if (!accessToken) {
+      setLoading(false);
+      return;
+    }
     const init = async () => {
       try {
         const usersRes = await axios.get(`${API_URL}/users/`);
@@ -265,7 +370,7 @@ function App() {
       }
     };
     init();
-  }, []);
+  }, [accessToken]);
 
   const persistCurrentUser = (userOrNull) => {
     if (typeof window === "undefined") return;
@@ -276,6 +381,16 @@ function App() {
     }
   };
 
+  const persistAccessToken = (tokenOrNull) => {
+    setAccessToken(tokenOrNull);
+    if (typeof window === "undefined") return;
+    if (tokenOrNull) {
+      window.localStorage.setItem("accessToken", tokenOrNull);
+    } else {
+      window.localStorage.removeItem("accessToken");
+    }
+  };
+
   // -------- Auth --------
 
   const openRegisterModal = () => {
@@ -328,8 +443,11 @@ function App() {
         name: loginName.trim(),
         password: loginPassword,
       });
-      setCurrentUser(res.data);
-      persistCurrentUser(res.data);
+      const { access_token, ...user } = res.data;
+      delete user.token_type;
+      persistAccessToken(access_token);
+      setCurrentUser(user);
+      persistCurrentUser(user);
       setShowLoginModal(false);
       setAuthError("");
 
@@ -354,12 +472,14 @@ function App() {
         setAuthError(msg);
       }
       persistCurrentUser(null);
+      persistAccessToken(null);
     }
   };
 
   const handleLogout = () => {
     setCurrentUser(null);
     persistCurrentUser(null);
+    persistAccessToken(null);
     setViewMode("boards");
     setBuildMode(false);
   };
@@ -483,6 +603,27 @@ function App() {
     }
   };
 
+  const deleteBoardFromModal = async () => {
+    if (!editingBoard || !canDelete || !isAdmin) return;
+    if (!window.confirm("Board mit allen Spalten und Karten wirklich löschen?"))
+      return;
+
+    await axios.delete(`${API_URL}/boards/${editingBoard.id}`);
+    const remaining = boards.filter((b) => b.id !== editingBoard.id);
+    setBoards(remaining);
+    setEditingBoard(null);
+    if (editingBoard.id !== currentBoardId) return;
+    if (remaining.length > 0) {
+      setCurrentBoardId(remaining[0].id);
+      setLoading(true);
+      await loadColumnsAndCards(remaining[0].id);
+    } else {
+      setCurrentBoardId(null);
+      setColumns([]);
+      setCards([]);
+    }
+  };
+
   // -------- Columns --------
 
   const openNewColumnModal = () => {
@@ -519,10 +660,20 @@ function App() {
 
   const saveColumnChanges = async () => {
     if (!editingColumn || !buildMode || !canEdit || !isAdmin) return;
-    const res = await axios.patch(`${API_URL}/columns/${editingColumn.id}`, {
-      title: editColumnTitle,
-      color: editColumnColor,
-    });
+    let res;
+    try {
+      res = await axios.patch(`${API_URL}/columns/${editingColumn.id}`, {
+        title: editColumnTitle,
+        color: editColumnColor,
+        version: editingColumn.version,
+      });
+    } catch (e) {
+      if (e.response?.status !== 409) throw e;
+      alert("Die Spalte wurde inzwischen geändert. Der aktuelle Stand wird geladen.");
+      setEditingColumn(null);
+      await loadColumnsAndCards(currentBoardId);
+      return;
+    }
     setColumns((prev) =>
       prev.map((c) => (c.id === editingColumn.id ? res.data : c))
     );
@@ -575,13 +726,19 @@ function App() {
     setCardHistory([]);
   };
 
-  const loadCardHistory = async (cardId) => {
+  const loadCardHistory = async (cardId, cursor = null) => {
     try {
-      const res = await axios.get(`${API_URL}/cards/${cardId}/history`);
-      setCardHistory(res.data);
+      const res = await axios.get(`${API_URL}/cards/${cardId}/history`, {
+        params: { limit: HISTORY_PAGE_SIZE, cursor: cursor || undefined },
+      });
+      setCardHistory((prev) =>
+        cursor ? [...prev, ...res.data.items] : res.data.items
+      );
+      setCardHistoryCursor(res.data.next_cursor);
     } catch (e) {
       console.error(e);
-      setCardHistory([]);
+      if (!cursor) setCardHistory([]);
+      setCardHistoryCursor(null);
     }
   };
 
@@ -603,15 +760,28 @@ function App() {
 
     const dueDateISO = cardDueDate ? new Date(cardDueDate).toISOString() : null;
 
-    const res = await axios.patch(`${API_URL}/cards/${editingCard.id}`, {
-      title: cardTitle,
-      description: cardDescription || null,
-      due_date: dueDateISO,
-      column_id: editingCard.column_id,
-      color: cardColor || null,
-      assignee_id: cardAssigneeId || null,
-      link: cardLink || null,
-    });
+    let res;
+    try {
+      res = await axios.patch(`${API_URL}/cards/${editingCard.id}`, {
+        title: cardTitle,
+        description: cardDescription || null,
+        due_date: dueDateISO,
+        column_id: editingCard.column_id,
+        color: cardColor || null,
+        assignee_id: cardAssigneeId || null,
+        link: cardLink || null,
+        // Optimistic Locking: Server antwortet mit 409, wenn die Karte
+        // inzwischen von jemand anderem geändert wurde
+        version: editingCard.version,
+      });
+    } catch (e) {
+      if (e.response?.status !== 409) throw e;
+      alert("Die Karte wurde inzwischen geändert. Der aktuelle Stand wird geladen.");
+      setEditingCard(null);
+      setCardHistory([]);
+      await loadColumnsAndCards(currentBoardId);
+      return;
+    }
 
     setCards((prev) =>
       prev.map((c) => (c.id === editingCard.id ? res.data : c))
@@ -653,9 +823,14 @@ function App() {
     );
 
     try {
-      await axios.patch(`${API_URL}/cards/${cardId}`, {
+      const res = await axios.patch(`${API_URL}/cards/${cardId}`, {
         column_id: columnId,
       });
+      // Neue version/rank übernehmen, sonst läuft das nächste Speichern
+      // im Modal mit veralteter version in einen 409
+      setCards((prev) =>
+        prev.map((c) => (c.id === cardId ? { ...c, ...res.data } : c))
+      );
     } catch (e) {
       console.error(e);
     }
@@ -696,11 +871,17 @@ function App() {
     setColumns(updated);
 
     try {
-      for (const col of updated) {
-        await axios.patch(`${API_URL}/columns/${col.id}`, {
-          position: col.position,
-        });
-      }
+      const res = await axios.put(
+        `${API_URL}/boards/${currentBoardId}/column-order`,
+        {
+          column_ids: updated.map((c) => c.id),
+        }
+      );
+      // Antwort enthält die neuen Versionen aller Spalten
+      const saved = new Map(res.data.map((c) => [c.id, c]));
+      setColumns((prev) =>
+        prev.map((c) => (saved.has(c.id) ? { ...c, ...saved.get(c.id) } : c))
+      );
     } catch (e) {
       console.error("Fehler beim Speichern der Spaltenreihenfolge", e);
     }
@@ -1265,12 +1446,33 @@ function App() {
               <option value="#7f1d1d">Rot</option>
             </select>
 
-            <button
-              onClick={saveBoardChanges}
-              style={{ ...primaryButtonStyle, marginTop: 10 }}
+            <div
+              style={{
+                marginTop: 10,
+                display: "flex",
+                justifyContent: "space-between",
+                gap: 8,
+              }}
             >
-              Speichern
-            </button>
+              <button
+                onClick={saveBoardChanges}
+                style={{ ...primaryButtonStyle }}
+              >
+                Speichern
+              </button>
+              {canDelete && isAdmin && (
+                <button
+                  onClick={deleteBoardFromModal}
+                  style={{
+                    ...primaryButtonStyle,
+                    borderColor: "#a33",
+                    background: "#331111",
+                  }}
+                >
+                  Board löschen
+                </button>
+              )}
+            </div>
           </Modal>
         )}
 
@@ -1606,6 +1808,17 @@ function App() {
                     </div>
                   );
                 })}
+                {cardHistoryCursor && (
+                  <button
+                    type="button"
+                    onClick={() =>
+                      loadCardHistory(editingCard.id, cardHistoryCursor)
+                    }
+                    style={{ fontSize: 11, marginTop: 4 }}
+                  >
+                    Ältere Einträge laden
+                  </button>
+                )}
               </div>
             )}
 